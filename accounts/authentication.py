@@ -0,0 +1,125 @@
+import copy
+
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import (AuthenticationFailed,
+                                                 InvalidToken)
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .tokens import CLAIMS
+from .user_cache import user_cache
+
+
+class ClaimsUser(TokenUser):
+    """
+    The request user as described by its access token's claims; no database
+    row behind it, so it has ``id``, ``role``, ``vendor_id`` and ``verified``
+    but no relations.
+    """
+
+    @cached_property
+    def id(self):
+        return int(self.token[api_settings.USER_ID_CLAIM])
+
+    @cached_property
+    def role(self):
+        return self.token["role"]
+
+    @cached_property
+    def vendor_id(self):
+        return self.token["vendor_id"]
+
+    @cached_property
+    def verified(self):
+        return self.token["verified"]
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication without the per-request user query, for views that
+    only need the claims in ``ClaimsUser`` (see tokens.py for how stale
+    they can be). Tokens issued without claims fall back to a lookup.
+    """
+
+    def get_user(self, validated_token):
+        if not all(claim in validated_token.payload for claim in CLAIMS):
+            return super().get_user(validated_token)
+        return ClaimsUser(validated_token)
+
+
+def _detached(user):
+    # every request gets its own copies, so nothing it changes on them
+    # leaks into the cache or into concurrent requests
+    clone = copy.copy(user)
+    profile = getattr(user, "vendor_profile", None)
+    if profile is not None:
+        clone.vendor_profile = copy.copy(profile)
+    return clone
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that resolves the user through ``user_cache``; also
+    usable from async views (see core/async_api.py) via ``aauthenticate``.
+    """
+
+    def _user_id(self, validated_token):
+        try:
+            return str(validated_token[api_settings.USER_ID_CLAIM])
+        except KeyError as e:
+            raise InvalidToken(
+                _("Token contained no recognizable user identification")
+            ) from e
+
+    def _query(self, user_id):
+        return (self.user_model.objects.select_related("vendor_profile")
+                .filter(**{api_settings.USER_ID_FIELD: user_id}))
+
+    def _cache_and_check(self, user_id, user, validated_token):
+        if user is None:
+            raise AuthenticationFailed(
+                _("User not found"), code="user_not_found")
+        user_cache.set(user_id, user)
+        return self._check(user, validated_token)
+
+    def _check(self, user, validated_token):
+        # the same checks as JWTAuthentication, on every hit
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(
+                _("User is inactive"), code="user_inactive")
+        if api_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+                api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(
+                user.password):
+            raise AuthenticationFailed(
+                _("The user's password has been changed."),
+                code="password_changed")
+        return _detached(user)
+
+    def get_user(self, validated_token):
+        user_id = self._user_id(validated_token)
+        user = user_cache.get(user_id)
+        if user is not None:
+            return self._check(user, validated_token)
+        return self._cache_and_check(
+            user_id, self._query(user_id).first(), validated_token)
+
+    async def aget_user(self, validated_token):
+        user_id = self._user_id(validated_token)
+        user = user_cache.get(user_id)
+        if user is not None:
+            return self._check(user, validated_token)
+        return self._cache_and_check(
+            user_id, await self._query(user_id).afirst(), validated_token)
+
+    async def aauthenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        return await self.aget_user(validated_token), validated_token
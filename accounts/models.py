@@ -1,4 +1,5 @@
 from django.contrib.auth.models import AbstractUser
+from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
 
 
@@ -17,15 +18,34 @@ class User(AbstractUser):
     def __str__(self):
         return f"{self.username} ({self.role})"
 
+    # mirror the JWT claims (see tokens.py), so views read them the same way
+    # whichever authentication class produced request.user
+    @property
+    def vendor_id(self):
+        profile = getattr(self, "vendor_profile", None)
+        return profile.pk if profile else None
+
+    @property
+    def verified(self):
+        profile = getattr(self, "vendor_profile", None)
+        return bool(profile and profile.verified)
+
 
 class VendorProfile(models.Model):
     user = models.OneToOneField(
         User, on_delete=models.CASCADE, related_name="vendor_profile")
     business_name = models.CharField(max_length=255, blank=True, null=True)
     logo = models.ImageField(upload_to="vendor_logos/", blank=True, null=True)
+    # resized copies of ``logo``, rendered after upload (see core/images.py)
+    logo_derivatives = models.JSONField(
+        default=dict, blank=True, editable=False)
     description = models.TextField(blank=True, null=True)
     verified = models.BooleanField(default=False)
     contact_email = models.EmailField(blank=True, null=True)
+    # overrides the category and platform commission rates, e.g. 0.0750
+    commission_rate = models.DecimalField(
+        max_digits=5, decimal_places=4, blank=True, null=True,
+        validators=[MinValueValidator(0), MaxValueValidator(1)])
 
     def __str__(self):
         return self.business_name or f"Vendor {self.user.username}"
@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from core.images import derivative_urls
 from .models import User, VendorProfile
 
 
@@ -30,9 +31,15 @@ class AdminUserSerializer(serializers.ModelSerializer):
 
 
 class VendorProfileSerializer(serializers.ModelSerializer):
+    logo_derivatives = serializers.SerializerMethodField()
+
     class Meta:
         model = VendorProfile
-        fields = ["id", "business_name", "logo",
+        fields = ["id", "business_name", "logo", "logo_derivatives",
                   "description", "verified", "contact_email"]
         # only admin can change 'verified'
         read_only_fields = ["id", "verified"]
+
+    def get_logo_derivatives(self, obj):
+        return derivative_urls(
+            obj.logo_derivatives, self.context.get("request"))
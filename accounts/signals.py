@@ -0,0 +1,23 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.images import needs_derivatives
+from .models import User, VendorProfile
+from .tasks import render_vendor_logo
+from .user_cache import evict_user
+
+
+@receiver(post_save, sender=VendorProfile)
+def render_logo_derivatives(sender, instance, raw=False, **kwargs):
+    if not raw and needs_derivatives(instance.logo, instance.logo_derivatives):
+        render_vendor_logo.enqueue(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=User)
+def evict_cached_user(sender, instance, **kwargs):
+    evict_user(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=VendorProfile)
+def evict_cached_vendor(sender, instance, **kwargs):
+    evict_user(instance.user_id)
@@ -0,0 +1,8 @@
+from core.images import refresh_derivatives
+from jobs.queue import task
+from .models import VendorProfile
+
+
+@task
+def render_vendor_logo(profile_id):
+    refresh_derivatives(VendorProfile, profile_id, "logo", "logo_derivatives")
@@ -1,3 +1,224 @@
-from django.test import TestCase
+from unittest import skipUnless
 
-# Create your tests here.
+import redis
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+from core.throttling import LocalBucketStore, RedisBucketStore, bucket_store
+from .models import User, VendorProfile
+from .user_cache import TTLLRUCache, user_cache
+
+
+class ClaimsTokenTests(APITestCase):
+    def setUp(self):
+        bucket_store().clear()
+        self.vendor = User.objects.create_user(
+            username="vendor", password="pass12345", role=User.Roles.VENDOR)
+        self.profile = VendorProfile.objects.create(user=self.vendor)
+
+    def login(self, username="vendor"):
+        response = self.client.post(reverse("token_obtain_pair"), {
+            "username": username, "password": "pass12345"})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def refresh(self, refresh):
+        return self.client.post(reverse("token_refresh"), {"refresh": refresh})
+
+    def test_login_embeds_role_and_vendor_claims(self):
+        access = AccessToken(self.login()["access"])
+        self.assertEqual(
+            (access["role"], access["vendor_id"], access["verified"]),
+            ("vendor", self.profile.pk, False))
+
+    def test_claims_authentication_skips_the_user_query(self):
+        access = self.login()["access"]
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse("seller-only"))
+        self.assertEqual(response.status_code, 200)
+        # the vendor profile is looked up by the claimed id, in one query
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("vendor-profile"))
+        self.assertEqual(response.data["id"], self.profile.pk)
+
+    def test_changes_reach_the_claims_on_refresh(self):
+        refresh = self.login()["refresh"]
+        self.profile.verified = True
+        self.profile.save()
+        User.objects.filter(pk=self.vendor.pk).update(role=User.Roles.ADMIN)
+
+        access = AccessToken(self.refresh(refresh).data["access"])
+        self.assertEqual((access["role"], access["verified"]), ("admin", True))
+
+    def test_refresh_is_refused_for_inactive_users(self):
+        refresh = self.login()["refresh"]
+        User.objects.filter(pk=self.vendor.pk).update(is_active=False)
+        self.assertEqual(self.refresh(refresh).status_code, 401)
+
+    def test_tokens_without_claims_fall_back_to_a_lookup(self):
+        plain = RefreshToken.for_user(self.vendor).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {plain}")
+        response = self.client.get(reverse("seller-only"))
+        self.assertEqual(response.status_code, 200)
+
+    def test_role_claim_is_enforced(self):
+        User.objects.create_user(username="buyer", password="pass12345")
+        access = self.login("buyer")["access"]
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+        self.assertEqual(self.client.get(reverse("seller-only")).status_code,
+                         403)
+        self.assertEqual(
+            self.client.get(reverse("customer-only")).status_code, 200)
+
+
+class TTLLRUCacheTests(TestCase):
+    def setUp(self):
+        self.now = 0.0
+        self.cache = TTLLRUCache(maxsize=2, ttl=10, clock=lambda: self.now)
+
+    def test_least_recently_used_entry_is_evicted(self):
+        self.cache.set("a", 1)
+        self.cache.set("b", 2)
+        self.cache.get("a")
+        self.cache.set("c", 3)
+        self.assertIsNone(self.cache.get("b"))
+        self.assertEqual((self.cache.get("a"), self.cache.get("c")), (1, 3))
+        self.assertEqual(self.cache.stats()["evictions"], 1)
+
+    def test_entries_expire(self):
+        self.cache.set("a", 1)
+        self.now = 10
+        self.assertIsNone(self.cache.get("a"))
+        stats = self.cache.stats()
+        self.assertEqual((stats["expirations"], stats["misses"]), (1, 1))
+
+
+class CachedAuthenticationTests(APITestCase):
+    def setUp(self):
+        user_cache.clear()
+        self.user = User.objects.create_user(
+            username="buyer", password="pass12345")
+        access = RefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+
+    def test_repeat_requests_skip_the_user_query(self):
+        with self.assertNumQueries(1):
+            self.client.get(reverse("profile"))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse("profile"))
+        self.assertEqual(response.data["role"], "customer")
+        stats = user_cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+
+    def test_saving_the_user_evicts_it(self):
+        self.client.get(reverse("profile"))
+        admin = User.objects.create_user(
+            username="admin", password="pass12345", role=User.Roles.ADMIN)
+        admin_client = self.client_class()
+        admin_client.force_authenticate(admin)
+        admin_client.patch(
+            reverse("user-role-update", args=[self.user.pk]),
+            {"role": "vendor"})
+
+        response = self.client.get(reverse("profile"))
+        self.assertEqual(response.data["role"], "vendor")
+
+    def test_deactivated_user_is_refused(self):
+        self.client.get(reverse("profile"))
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get(reverse("profile")).status_code, 401)
+
+    def test_stats_endpoint_is_admin_only(self):
+        self.assertEqual(
+            self.client.get(reverse("auth-cache-stats")).status_code, 403)
+        admin = User.objects.create_user(
+            username="admin", password="pass12345", role=User.Roles.ADMIN)
+        self.client.force_authenticate(admin)
+        response = self.client.get(reverse("auth-cache-stats"))
+        self.assertIn("hit_rate", response.data)
+
+
+def redis_available():
+    try:
+        return redis.Redis.from_url(settings.THROTTLE_REDIS_URL).ping()
+    except redis.ConnectionError:
+        return False
+
+
+class TokenBucketTests(TestCase):
+    def check_store(self, store):
+        buckets = [("k", 2, 1.0)]  # two tokens, one back per second
+        self.assertEqual(store.consume(buckets, 100.0), 0)
+        self.assertEqual(store.consume(buckets, 100.0), 0)
+        self.assertAlmostEqual(store.consume(buckets, 100.0), 1.0)
+        self.assertEqual(store.consume(buckets, 101.0), 0)
+        self.assertGreater(store.consume(buckets, 101.0), 0)
+
+    def test_local_store(self):
+        self.check_store(LocalBucketStore())
+
+    @skipUnless(redis_available(), "no Redis server at THROTTLE_REDIS_URL")
+    def test_redis_store(self):
+        store = RedisBucketStore(settings.THROTTLE_REDIS_URL)
+        store.clear()
+        self.check_store(store)
+
+    def test_unknown_backend_is_refused(self):
+        bucket_store.cache_clear()
+        self.addCleanup(bucket_store.cache_clear)
+        with self.settings(THROTTLE_BACKEND="cache"):
+            with self.assertRaises(ImproperlyConfigured):
+                bucket_store()
+
+    def test_request_is_refused_if_any_bucket_is_empty(self):
+        store = LocalBucketStore()
+        store.consume([("ip", 1, 60.0)], 0.0)
+        self.assertGreater(
+            store.consume([("ip", 1, 60.0), ("user", 5, 1.0)], 1.0), 0)
+        # nothing was charged to the bucket that had tokens left
+        for _ in range(5):
+            self.assertEqual(store.consume([("user", 5, 1.0)], 1.0), 0)
+
+
+def throttle_rates(**rates):
+    return override_settings(REST_FRAMEWORK={
+        **settings.REST_FRAMEWORK,
+        "DEFAULT_THROTTLE_RATES": {
+            scope.replace("_", "."): rate for scope, rate in rates.items()},
+    })
+
+
+class ThrottledEndpointTests(APITestCase):
+    def setUp(self):
+        bucket_store().clear()
+        User.objects.create_user(username="alice", password="pass12345")
+
+    def login(self, username):
+        return self.client.post(reverse("token_obtain_pair"), {
+            "username": username, "password": "wrong-password"})
+
+    @throttle_rates(login_ip="100/min", login_user="2/min")
+    def test_login_is_limited_per_account(self):
+        self.assertEqual(self.login("alice").status_code, 401)
+        self.assertEqual(self.login("Alice").status_code, 401)
+        response = self.login("alice")
+        self.assertEqual(response.status_code, 429)
+        # a token comes back every 30s, less the time the logins took
+        self.assertIn(int(response["Retry-After"]), range(25, 31))
+        self.assertEqual(self.login("bob").status_code, 401)
+
+    @throttle_rates(register_ip="1/hour")
+    def test_registration_is_limited_per_ip(self):
+        url = reverse("register")
+        data = {"username": "new", "password": "pass12345",
+                "email": "new@example.com"}
+        self.assertEqual(self.client.post(url, data).status_code, 201)
+        data["username"] = "other"
+        response = self.client.post(url, data)
+        self.assertEqual(response.status_code, 429)
+        self.assertIn("Retry-After", response)
@@ -0,0 +1,51 @@
+"""
+JWTs that carry the claims permission checks need.
+
+Tokens issued by ``ClaimsTokenObtainPairSerializer`` embed the user's
+``role``, ``vendor_id`` and the vendor's ``verified`` flag, so views using
+``ClaimsJWTAuthentication`` authorize a request from the token alone.
+
+The claims are a snapshot. A role change, vendor approval or deactivation
+reaches them on the next refresh, because ``ClaimsTokenRefreshSerializer``
+re-reads the user and rejects inactive ones. Until then an access token
+keeps its old claims for at most ``ACCESS_TOKEN_LIFETIME``. Views that must
+see such changes immediately (user and role administration) keep the
+database-backed ``JWTAuthentication``.
+"""
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.serializers import (TokenObtainPairSerializer,
+                                                  TokenRefreshSerializer)
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import User
+
+CLAIMS = ("role", "vendor_id", "verified")
+
+
+def add_claims(token, user):
+    for claim in CLAIMS:
+        token[claim] = getattr(user, claim)
+    return token
+
+
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    @classmethod
+    def get_token(cls, user):
+        # the access token inherits the refresh token's claims
+        return add_claims(super().get_token(user), user)
+
+
+class ClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    def validate(self, attrs):
+        refresh = self.token_class(attrs["refresh"])
+        user = (User.objects.select_related("vendor_profile")
+                .filter(**{api_settings.USER_ID_FIELD:
+                           refresh.payload.get(api_settings.USER_ID_CLAIM)})
+                .first())
+        if user is None or not api_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed(
+                self.error_messages["no_active_account"], "no_active_account")
+        add_claims(refresh, user)
+        # the re-signed token carries the fresh claims into the new access
+        # token; simplejwt handles rotation and blacklisting
+        return super().validate({"refresh": str(refresh)})
@@ -1,15 +1,15 @@
 from django.urls import path
-from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
-from .views import (RegisterView, ProfileView, SellerOnlyView, AdminOnlyView, CustomerOnlyView,
+from rest_framework_simplejwt.views import TokenRefreshView
+from .views import (RegisterView, LoginView, ProfileView, SellerOnlyView, AdminOnlyView, CustomerOnlyView,
                     UserListView, UserDetailView, UserRoleUpdateView,
                     VendorProfileView, VendorListView, SellerApprovalView,
-                    SellerRejectView
+                    SellerRejectView, AuthCacheStatsView
                     )
 
 urlpatterns = [
     path("register/", RegisterView.as_view(), name="register"),
     path("profile/", ProfileView.as_view(), name="profile"),
-    path("login/", TokenObtainPairView.as_view(), name="token_obtain_pair"),
+    path("login/", LoginView.as_view(), name="token_obtain_pair"),
     path("login/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
     # Role-based test endpoints
     path("seller-only/", SellerOnlyView.as_view(), name="seller-only"),
@@ -29,4 +29,6 @@ urlpatterns = [
          SellerApprovalView.as_view(), name="seller-approve"),
     path("sellers/<int:pk>/reject/",
          SellerRejectView.as_view(), name="seller-reject"),
+    path("auth-cache/stats/", AuthCacheStatsView.as_view(),
+         name="auth-cache-stats"),
 ]
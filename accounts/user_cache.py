@@ -0,0 +1,87 @@
+"""
+In-process cache of authenticated users and their vendor profiles.
+
+``CachedJWTAuthentication`` (authentication.py) resolves the token's user
+from a bounded LRU cache with a TTL before falling back to one query (user
+joined to vendor profile). Saving or deleting a ``User`` or ``VendorProfile`` evicts the
+entry in this process (see signals.py); other worker processes see the
+change once their entry expires, so ``AUTH_USER_CACHE_TTL`` bounds how long
+a role change or deactivation can go unnoticed there. Queryset
+``update()`` calls send no signals and are likewise bounded by the TTL.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import transaction
+
+
+class TTLLRUCache:
+    """A thread-safe mapping bounded by size and by age of its entries."""
+
+    def __init__(self, maxsize, ttl, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, expires = entry
+                if expires > self.clock():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+                self.expirations += 1
+            self.misses += 1
+            return None
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, self.clock() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+user_cache = TTLLRUCache(
+    maxsize=settings.AUTH_USER_CACHE_SIZE, ttl=settings.AUTH_USER_CACHE_TTL)
+
+
+def evict_user(user_id):
+    """
+    Drop ``user_id`` now and again on commit, so a request that cached the
+    pre-commit row in between cannot keep serving it.
+    """
+    user_cache.delete(str(user_id))
+    transaction.on_commit(lambda: user_cache.delete(str(user_id)))
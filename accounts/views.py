@@ -1,20 +1,35 @@
+from django.shortcuts import get_object_or_404
 from rest_framework import generics, status, permissions
 from .models import User, VendorProfile
 from .serializers import RegisterSerializer, AdminUserSerializer, VendorProfileSerializer
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework_simplejwt.views import TokenObtainPairView
+from core.throttling import TokenBucketThrottle
+from .authentication import CachedJWTAuthentication, ClaimsJWTAuthentication
 from .permissions import IsAdmin, IsVendor, IsCustomer
+from .user_cache import user_cache
 
 
 class RegisterView(generics.CreateAPIView):
     queryset = User.objects.all()
     serializer_class = RegisterSerializer
     permission_classes = [AllowAny]
+    throttle_classes = [TokenBucketThrottle]
+    throttle_scope = "register"  # password hashing is deliberately slow
+
+
+class LoginView(TokenObtainPairView):
+    throttle_classes = [TokenBucketThrottle]
+    throttle_scope = "login"
+    # also limit attempts per account, whatever the source IP
+    throttle_identity_field = "username"
 
 
 class ProfileView(APIView):
     permission_classes = [IsAuthenticated]
+    authentication_classes = [CachedJWTAuthentication]
 
     def get(self, request):
         return Response({
@@ -27,6 +42,7 @@ class ProfileView(APIView):
 
 class SellerOnlyView(APIView):
     permission_classes = [IsAuthenticated, IsVendor]
+    authentication_classes = [ClaimsJWTAuthentication]
 
     def get(self, request):
         return Response({"message": "Welcome Seller!"})
@@ -34,6 +50,7 @@ class SellerOnlyView(APIView):
 
 class AdminOnlyView(APIView):
     permission_classes = [IsAuthenticated, IsAdmin]
+    authentication_classes = [ClaimsJWTAuthentication]
 
     def get(self, request):
         return Response({"message": "Welcome Admin!"})
@@ -42,6 +59,7 @@ class AdminOnlyView(APIView):
 class CustomerOnlyView(APIView):
     """Example endpoint accessible only to Customers."""
     permission_classes = [IsAuthenticated, IsCustomer]
+    authentication_classes = [ClaimsJWTAuthentication]
 
     def get(self, request):
         return Response({"message": "Welcome Customer!"})
@@ -89,13 +107,15 @@ class UserRoleUpdateView(APIView):
 
 class VendorProfileView(APIView):
     permission_classes = [IsAuthenticated, IsVendor]
+    authentication_classes = [ClaimsJWTAuthentication]
 
     def get(self, request):
-        serializer = VendorProfileSerializer(request.user.vendor_profile)
+        profile = get_object_or_404(VendorProfile, pk=request.user.vendor_id)
+        serializer = VendorProfileSerializer(profile)
         return Response(serializer.data)
 
     def patch(self, request):
-        profile = request.user.vendor_profile
+        profile = get_object_or_404(VendorProfile, pk=request.user.vendor_id)
         serializer = VendorProfileSerializer(
             profile, data=request.data, partial=True)
         if serializer.is_valid():
@@ -134,3 +154,11 @@ class SellerRejectView(APIView):
             return Response({"message": f"Seller '{seller.business_name}' rejected/disabled."})
         except VendorProfile.DoesNotExist:
             return Response({"error": "Seller not found."}, status=404)
+
+
+class AuthCacheStatsView(APIView):
+    """Hit/miss counters of this process's authenticated-user cache."""
+    permission_classes = [IsAuthenticated, IsAdmin]
+
+    def get(self, request):
+        return Response(user_cache.stats())
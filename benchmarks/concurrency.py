@@ -0,0 +1,114 @@
+"""
+Sync and async versions of the same endpoint under concurrent load.
+
+Requests go through Django's async handler stack in-process, each in its
+own ``ThreadSensitiveContext`` as the ASGI handler runs them, so a sync
+view gets a thread for the whole request while an async view only needs
+one for its queries. ``slow_database`` adds a fixed latency to every query,
+in the thread that runs it, like a remote database would.
+"""
+import asyncio
+import statistics
+import threading
+import time
+
+from asgiref.sync import ThreadSensitiveContext
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.test import AsyncClient
+from django.urls import reverse
+
+from .runner import percentile
+
+# endpoint: (sync URL name, async URL name, URL arguments from the session)
+PAIRS = {
+    "product-list": ("product-list", "async-product-list", lambda s: []),
+    "product-detail": ("product-detail", "async-product-detail",
+                       lambda s: [s.product_ids[0]]),
+    "category-list": ("category-list", "async-category-list", lambda s: []),
+    "category-tree": ("category-tree", "async-category-tree", lambda s: []),
+    "cart": ("cart", "async-cart", lambda s: []),
+}
+
+
+class slow_database:
+    """Sleep ``latency`` seconds before every query while active."""
+
+    def __init__(self, latency):
+        self.latency = latency
+
+    def __call__(self, execute, sql, params, many, context):
+        time.sleep(self.latency)
+        return execute(sql, params, many, context)
+
+    def _install(self, sender=None, connection=None, **kwargs):
+        connection.execute_wrappers.append(self)
+
+    def __enter__(self):
+        if self.latency:
+            # the worker threads open their own connections as they go
+            connection_created.connect(self._install)
+            for connection in connections.all(initialized_only=True):
+                self._install(connection=connection)
+        return self
+
+    def __exit__(self, *exc_info):
+        connection_created.disconnect(self._install)
+        for connection in connections.all(initialized_only=True):
+            if self in connection.execute_wrappers:
+                connection.execute_wrappers.remove(self)
+
+
+async def _load(path, headers, requests, concurrency):
+    client = AsyncClient()
+    gate = asyncio.Semaphore(concurrency)
+    timings, peak_threads = [], threading.active_count()
+    done = asyncio.Event()
+
+    async def one():
+        async with gate:
+            start = time.perf_counter()
+            async with ThreadSensitiveContext():
+                response = await client.get(path, headers=headers)
+            timings.append((time.perf_counter() - start) * 1000)
+            if response.status_code != 200:
+                raise RuntimeError(
+                    f"{path} returned {response.status_code}")
+
+    async def watch_threads():
+        nonlocal peak_threads
+        while not done.is_set():
+            peak_threads = max(peak_threads, threading.active_count())
+            await asyncio.sleep(0.002)
+
+    watcher = asyncio.create_task(watch_threads())
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(one() for _ in range(requests)))
+    finally:
+        done.set()
+        await watcher
+    elapsed = time.perf_counter() - started
+
+    timings.sort()
+    return {
+        "requests_per_s": round(requests / elapsed, 1),
+        "p50_ms": round(percentile(timings, 50), 3),
+        "p95_ms": round(percentile(timings, 95), 3),
+        "mean_ms": round(statistics.fmean(timings), 3),
+        "peak_threads": peak_threads,
+    }
+
+
+def compare_endpoint(session, name, requests=100, concurrency=20):
+    """Load results of the sync and the async view of endpoint ``name``."""
+    sync_name, async_name, args = PAIRS[name]
+    headers = {}
+    if name == "cart":
+        headers["Authorization"] = session.customer_authorization
+    return {
+        mode: asyncio.run(_load(
+            reverse(url_name, args=args(session)), headers, requests,
+            concurrency))
+        for mode, url_name in (("sync", sync_name), ("async", async_name))
+    }
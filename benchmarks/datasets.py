@@ -0,0 +1,71 @@
+"""
+Seeded datasets for the endpoint benchmarks.
+
+A dataset is ``vendors`` vendors with ``products`` products each, every
+product with one image and ``variants`` variants, plus ``orders`` orders
+spread over a pool of customers, generated by the catalog seeder (see
+products/seeding.py), so the same ``seed`` always produces the same rows.
+"""
+from contextlib import contextmanager
+
+from django.test.utils import (setup_databases, setup_test_environment,
+                               teardown_databases, teardown_test_environment)
+
+from accounts.models import User
+from orders.models import Cart, CartItem
+from products.models import Product, ProductVariant
+from products.seeding import CatalogSeeder
+
+DATASETS = {
+    "tiny": {"vendors": 2, "products": 10, "variants": 2, "orders": 20},
+    "1k": {"vendors": 10, "products": 100, "variants": 3, "orders": 1_000},
+    "100k": {"vendors": 100, "products": 1_000, "variants": 3,
+             "orders": 100_000},
+}
+
+# plenty, so repeated checkouts never run a variant out
+STOCK = 1_000_000
+
+
+def seed_dataset(vendors, products, variants, orders, seed=0):
+    """
+    Write the dataset and return the benchmark customer, whose cart the
+    cart and checkout benchmarks use, and one product id per vendor.
+    """
+    seeder = CatalogSeeder(
+        vendors=vendors, products=products, variants=variants, images=1,
+        customers=max(orders // 10, 1), carts=0, orders=orders,
+        stock=(STOCK, STOCK), active=1, seed=seed)
+    seeder.run()
+    first_product = seeder.first_id[Product]
+
+    customer = User.objects.create_user(
+        username=f"bench-customer-{seeder.first_id[User]}")
+    Cart.objects.create(user=customer)
+    return customer, [first_product + n * products for n in range(vendors)]
+
+
+def fill_cart(user, product_ids):
+    """Replace ``user``'s cart with one variant of each of ``product_ids``."""
+    cart = Cart.objects.get(user=user)
+    cart.items.all().delete()
+    variants = {}
+    for variant in ProductVariant.objects.filter(
+            product_id__in=product_ids).order_by("-id"):
+        variants[variant.product_id] = variant
+    CartItem.objects.bulk_create([
+        CartItem(cart=cart, product_id=product_id, variant=variant)
+        for product_id, variant in variants.items()])
+
+
+@contextmanager
+def throwaway_database():
+    """A fresh test database, as the test runner creates, while active."""
+    setup_test_environment()
+    old_config = setup_databases(
+        verbosity=0, interactive=False, aliases={"default"})
+    try:
+        yield
+    finally:
+        teardown_databases(old_config, verbosity=0)
+        teardown_test_environment()
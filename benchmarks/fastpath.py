@@ -0,0 +1,48 @@
+"""
+A page of products built by ``ProductSerializer`` and by the fast path
+(products/fastpath.py), queries included, for pages larger than the API
+lets clients ask for.
+"""
+import statistics
+import time
+
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from products.fastpath import product_rows, product_values
+from products.models import Product
+from products.pagination import ProductCursorPagination
+from products.serializers import ProductSerializer
+
+
+def _time(build, iterations):
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        rows = build()
+        timings.append((time.perf_counter() - start) * 1000)
+    return len(rows), timings
+
+
+def compare_product_rows(rows=1000, iterations=10):
+    """Median milliseconds to build the first ``rows`` products both ways."""
+    request = Request(APIRequestFactory().get("/api/products/"))
+    products = Product.objects.filter(is_active=True).order_by(
+        *ProductCursorPagination.ordering)
+
+    def serializer():
+        page = products.prefetch_related("images", "variants")[:rows]
+        return ProductSerializer(
+            page, many=True, context={"request": request}).data
+
+    def fast_path():
+        return product_rows(list(product_values(products)[:rows]), request)
+
+    fast_path()  # warm up the connection and statement caches
+    count, serializer_ms = _time(serializer, iterations)
+    _, fast_ms = _time(fast_path, iterations)
+    serializer_ms = statistics.median(serializer_ms)
+    fast_ms = statistics.median(fast_ms)
+    return {"rows": count, "serializer_ms": serializer_ms,
+            "fast_path_ms": fast_ms,
+            "speedup": serializer_ms / fast_ms if fast_ms else None}
@@ -0,0 +1,103 @@
+import contextlib
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+
+from benchmarks.datasets import DATASETS, seed_dataset, throwaway_database
+from benchmarks.runner import (SCENARIOS, Session, compare, load_baseline,
+                               run_benchmark, save_baseline)
+
+
+class Command(BaseCommand):
+    help = "Benchmark the hot API endpoints against a seeded dataset"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dataset", choices=sorted(DATASETS), default="1k",
+            help="Preset dataset size")
+        for size in ("vendors", "products", "variants", "orders"):
+            parser.add_argument(
+                f"--{size}", type=int,
+                help=f"Override the preset's {size}"
+                     + (" per vendor" if size == "products" else "")
+                     + (" per product" if size == "variants" else ""))
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--endpoint", action="append", choices=list(SCENARIOS),
+            help="Benchmark only this endpoint (repeatable)")
+        parser.add_argument("--iterations", type=int, default=50)
+        parser.add_argument("--warmup", type=int, default=5)
+        parser.add_argument(
+            "--alloc-iterations", type=int, default=5,
+            help="Requests traced with tracemalloc, after the timed ones")
+        parser.add_argument(
+            "--warm-cache", action="store_true",
+            help="Keep the catalog response cache instead of clearing it "
+                 "before every request")
+        parser.add_argument(
+            "--baseline", metavar="PATH",
+            help="Fail if an endpoint regressed against this baseline")
+        parser.add_argument(
+            "--threshold", type=float, default=0.25,
+            help="Allowed p95 and allocation growth over the baseline, as a "
+                 "fraction (default: 0.25)")
+        parser.add_argument(
+            "--save-baseline", metavar="PATH",
+            help="Write the results to PATH as a new baseline")
+        parser.add_argument(
+            "--current-db", action="store_true",
+            help="Seed the configured database instead of a throwaway test "
+                 "database; the seeded rows are left behind")
+
+    def handle(self, *args, **options):
+        dataset = dict(DATASETS[options["dataset"]])
+        for size in dataset:
+            if options[size] is not None:
+                dataset[size] = options[size]
+        baseline = options["baseline"] and load_baseline(options["baseline"])
+
+        database = (contextlib.nullcontext() if options["current_db"]
+                    else throwaway_database())
+        # the test client's host, which is only allowed under the test runner
+        hosts = override_settings(
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"])
+        with database, hosts:
+            results = self.run(dataset, options)
+
+        if options["save_baseline"]:
+            save_baseline(options["save_baseline"], results)
+            self.stdout.write(f"Baseline written to {options['save_baseline']}")
+        if baseline:
+            regressions = compare(baseline, results, options["threshold"])
+            if regressions:
+                raise CommandError(
+                    "Regressed against the baseline:\n  "
+                    + "\n  ".join(regressions))
+            self.stdout.write(self.style.SUCCESS("No regressions."))
+
+    def run(self, dataset, options):
+        self.stdout.write("Seeding " + ", ".join(
+            f"{count} {size}" for size, count in dataset.items()) + "...")
+        customer, product_ids = seed_dataset(**dataset, seed=options["seed"])
+        session = Session(customer, product_ids,
+                          warm_cache=options["warm_cache"])
+
+        self.stdout.write(
+            f"{'endpoint':<16}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+            f"{'queries':>9}{'alloc KiB':>11}")
+        endpoints = {}
+        for name in options["endpoint"] or SCENARIOS:
+            try:
+                row = run_benchmark(
+                    session, name, iterations=max(options["iterations"], 1),
+                    warmup=options["warmup"],
+                    alloc_iterations=options["alloc_iterations"])
+            except RuntimeError as exc:
+                raise CommandError(str(exc))
+            endpoints[name] = row
+            self.stdout.write(
+                f"{name:<16}{row['p50_ms']:>10.2f}{row['p95_ms']:>10.2f}"
+                f"{row['p99_ms']:>10.2f}{row['queries']:>9}"
+                f"{row['peak_alloc_kib'] or 0:>11.1f}")
+        return {"dataset": dataset, "endpoints": endpoints}
@@ -0,0 +1,36 @@
+import contextlib
+
+from django.core.management.base import BaseCommand
+
+from benchmarks.datasets import DATASETS, seed_dataset, throwaway_database
+from benchmarks.fastpath import compare_product_rows
+
+
+class Command(BaseCommand):
+    help = ("Time a large product list page built by ProductSerializer "
+            "against the serializer-free fast path")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dataset", choices=sorted(DATASETS), default="1k")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--rows", type=int, default=1000, help="Products per page")
+        parser.add_argument("--iterations", type=int, default=10)
+        parser.add_argument(
+            "--current-db", action="store_true",
+            help="Seed the configured database instead of a throwaway test "
+                 "database; the seeded rows are left behind")
+
+    def handle(self, *args, **options):
+        database = (contextlib.nullcontext() if options["current_db"]
+                    else throwaway_database())
+        with database:
+            seed_dataset(**DATASETS[options["dataset"]], seed=options["seed"])
+            result = compare_product_rows(
+                max(options["rows"], 1), max(options["iterations"], 1))
+        self.stdout.write(
+            f"{result['rows']} rows: serializer "
+            f"{result['serializer_ms']:.1f}ms, fast path "
+            f"{result['fast_path_ms']:.1f}ms "
+            f"({result['speedup'] or 0:.1f}x)")
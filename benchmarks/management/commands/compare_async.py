@@ -0,0 +1,75 @@
+import contextlib
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+
+from benchmarks.concurrency import PAIRS, compare_endpoint, slow_database
+from benchmarks.datasets import DATASETS, seed_dataset, throwaway_database
+from benchmarks.runner import Session
+
+
+class Command(BaseCommand):
+    help = ("Load the sync and async versions of the catalog and cart reads "
+            "concurrently, with simulated database latency")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dataset", choices=sorted(DATASETS), default="tiny")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--endpoint", action="append", choices=list(PAIRS),
+            help="Compare only this endpoint (repeatable)")
+        parser.add_argument(
+            "--requests", type=int, default=200,
+            help="Requests per endpoint and mode")
+        parser.add_argument(
+            "--concurrency", type=int, default=20,
+            help="Requests in flight at once")
+        parser.add_argument(
+            "--db-latency", type=float, default=20,
+            help="Milliseconds added to every query (default: 20)")
+        parser.add_argument(
+            "--cache", action="store_true",
+            help="Keep the catalog response cache on; by default every "
+                 "request reaches the database")
+        parser.add_argument(
+            "--current-db", action="store_true",
+            help="Seed the configured database instead of a throwaway test "
+                 "database; the seeded rows are left behind")
+
+    def handle(self, *args, **options):
+        database = (contextlib.nullcontext() if options["current_db"]
+                    else throwaway_database())
+        caches = settings.CACHES
+        if not options["cache"]:
+            caches = {**caches, "catalog": {
+                "BACKEND": "django.core.cache.backends.dummy.DummyCache"}}
+
+        # the test client's host, which is only allowed under the test runner
+        hosts = [*settings.ALLOWED_HOSTS, "testserver"]
+        with database, override_settings(CACHES=caches, ALLOWED_HOSTS=hosts):
+            customer, product_ids = seed_dataset(
+                **DATASETS[options["dataset"]], seed=options["seed"])
+            session = Session(customer, product_ids)
+            self.stdout.write(
+                f"{options['requests']} requests per view, "
+                f"{options['concurrency']} at a time, "
+                f"{options['db_latency']:g}ms per query")
+            self.stdout.write(
+                f"{'endpoint':<16}{'view':<7}{'req/s':>9}{'p50 ms':>10}"
+                f"{'p95 ms':>10}{'threads':>9}")
+            with slow_database(options["db_latency"] / 1000):
+                for name in options["endpoint"] or PAIRS:
+                    try:
+                        results = compare_endpoint(
+                            session, name, max(options["requests"], 1),
+                            max(options["concurrency"], 1))
+                    except RuntimeError as exc:
+                        raise CommandError(str(exc))
+                    for mode, row in results.items():
+                        self.stdout.write(
+                            f"{name:<16}{mode:<7}"
+                            f"{row['requests_per_s']:>9.1f}"
+                            f"{row['p50_ms']:>10.2f}{row['p95_ms']:>10.2f}"
+                            f"{row['peak_threads']:>9}")
@@ -0,0 +1,196 @@
+"""
+Time the hot endpoints through the test client against a seeded dataset.
+
+Each endpoint is a scenario: a function that does any untimed preparation
+(filling the cart before a checkout) and returns the request to time. The
+catalog response cache and the throttle buckets are cleared before every
+request, so the numbers are those of the views themselves; allocations are
+measured in a separate pass because tracing them slows everything down.
+"""
+import json
+import math
+import statistics
+import time
+import tracemalloc
+from contextlib import ExitStack
+from functools import partial
+
+from django.core.cache import caches
+from django.db import connections
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from accounts.tokens import ClaimsTokenObtainPairSerializer
+from core.metrics import QueryTimer
+from core.throttling import bucket_store
+from .datasets import fill_cart
+
+
+class Session:
+    """Clients and fixtures shared by the scenarios."""
+
+    def __init__(self, customer, product_ids, warm_cache=False):
+        self.customer_user = customer
+        self.product_ids = product_ids
+        self.warm_cache = warm_cache
+        self.anonymous = APIClient()
+        self.customer_authorization = self.authorization(customer)
+        self.customer = APIClient()
+        self.customer.credentials(
+            HTTP_AUTHORIZATION=self.customer_authorization)
+        # the vendor of the first product, to list orders as
+        self.vendor = APIClient()
+        self.vendor.credentials(HTTP_AUTHORIZATION=self.authorization(
+            User.objects.get(vendor_profile__products__pk=product_ids[0])))
+        self._next = 0
+
+    @staticmethod
+    def authorization(user):
+        token = ClaimsTokenObtainPairSerializer.get_token(user).access_token
+        return f"Bearer {token}"
+
+    def next_product(self):
+        self._next += 1
+        return self.product_ids[self._next % len(self.product_ids)]
+
+    def reset(self):
+        if not self.warm_cache:
+            caches["catalog"].clear()
+        bucket_store().clear()
+
+
+def product_list(session):
+    return partial(session.anonymous.get, reverse("product-list"))
+
+
+def product_detail(session):
+    url = reverse("product-detail", args=[session.next_product()])
+    return partial(session.anonymous.get, url)
+
+
+def cart(session):
+    fill_cart(session.customer_user, session.product_ids[:3])
+    return partial(session.customer.get, reverse("cart"))
+
+
+def checkout(session):
+    fill_cart(session.customer_user, session.product_ids[:3])
+    return partial(session.customer.post, reverse("checkout"))
+
+
+def order_list(session):
+    return partial(session.vendor.get, reverse("order-list"))
+
+
+SCENARIOS = {
+    "product-list": product_list,
+    "product-detail": product_detail,
+    "cart": cart,
+    "checkout": checkout,
+    "order-list": order_list,
+}
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of sorted ``samples``."""
+    return samples[max(math.ceil(pct / 100 * len(samples)) - 1, 0)]
+
+
+def _run(session, scenario):
+    request = scenario(session)
+    session.reset()
+    timer = QueryTimer()
+    with ExitStack() as stack:
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(timer))
+        start = time.perf_counter()
+        response = request()
+        elapsed = time.perf_counter() - start
+    if response.status_code >= 400:
+        raise RuntimeError(
+            f"{scenario.__name__} returned {response.status_code}: "
+            f"{response.content[:200]!r}")
+    return elapsed, timer.queries
+
+
+def run_benchmark(session, name, iterations=50, warmup=5,
+                  alloc_iterations=5):
+    """Timings, queries and allocations of one request to endpoint ``name``."""
+    scenario = SCENARIOS[name]
+    for _ in range(warmup):
+        _run(session, scenario)
+    timings, queries = [], []
+    for _ in range(iterations):
+        elapsed, count = _run(session, scenario)
+        timings.append(elapsed * 1000)
+        queries.append(count)
+
+    allocated = []
+    tracemalloc.start()
+    try:
+        for _ in range(alloc_iterations):
+            request = scenario(session)
+            session.reset()
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            request()
+            allocated.append(tracemalloc.get_traced_memory()[1] - before)
+    finally:
+        tracemalloc.stop()
+
+    timings.sort()
+    return {
+        "requests": iterations,
+        "mean_ms": round(statistics.fmean(timings), 3),
+        "p50_ms": round(percentile(timings, 50), 3),
+        "p95_ms": round(percentile(timings, 95), 3),
+        "p99_ms": round(percentile(timings, 99), 3),
+        "queries": max(queries),
+        "peak_alloc_kib": round(
+            statistics.median(allocated) / 1024, 1) if allocated else None,
+    }
+
+
+def compare(baseline, results, threshold=0.25, noise_ms=1.0, noise_kib=64):
+    """
+    Regressions of ``results`` against ``baseline``: p95 latency or peak
+    allocations more than ``threshold`` (a fraction) above the baseline and
+    above the noise floor, or any increase in queries per request.
+    """
+    if baseline.get("dataset") != results.get("dataset"):
+        return ["baseline was recorded on a different dataset: "
+                f"{baseline.get('dataset')} != {results.get('dataset')}"]
+    regressions = []
+    for name, now in results["endpoints"].items():
+        before = baseline["endpoints"].get(name)
+        if before is None:
+            continue
+        if (now["p95_ms"] > before["p95_ms"] * (1 + threshold)
+                and now["p95_ms"] - before["p95_ms"] > noise_ms):
+            regressions.append(
+                f"{name}: p95 {now['p95_ms']}ms, was {before['p95_ms']}ms")
+        if now["queries"] > before["queries"]:
+            regressions.append(
+                f"{name}: {now['queries']} queries, was {before['queries']}")
+        if (before.get("peak_alloc_kib") is not None
+                and now["peak_alloc_kib"] is not None
+                and now["peak_alloc_kib"]
+                > before["peak_alloc_kib"] * (1 + threshold)
+                and now["peak_alloc_kib"] - before["peak_alloc_kib"]
+                > noise_kib):
+            regressions.append(
+                f"{name}: peak allocations {now['peak_alloc_kib']}KiB, "
+                f"was {before['peak_alloc_kib']}KiB")
+    return regressions
+
+
+def load_baseline(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_baseline(path, results):
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+        f.write("\n")
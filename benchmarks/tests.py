@@ -0,0 +1,88 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+from django.core.management import CommandError, call_command
+from django.test import TestCase, TransactionTestCase
+from .runner import compare, percentile
+
+
+class BenchEndpointsTests(TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.baseline = os.path.join(directory, "baseline.json")
+
+    def bench(self, *args):
+        out = StringIO()
+        call_command("bench_endpoints", "--current-db", "--dataset", "tiny",
+                     "--iterations", "3", "--warmup", "0",
+                     "--alloc-iterations", "1", *args, stdout=out)
+        return out.getvalue()
+
+    def test_every_endpoint_is_measured_and_saved(self):
+        self.bench("--save-baseline", self.baseline)
+        with open(self.baseline) as f:
+            results = json.load(f)
+        self.assertEqual(set(results["endpoints"]), {
+            "product-list", "product-detail", "cart", "checkout",
+            "order-list"})
+        row = results["endpoints"]["product-list"]
+        self.assertLessEqual(row["p50_ms"], row["p99_ms"])
+        self.assertGreater(row["queries"], 0)
+
+    def test_regressions_fail_the_run(self):
+        self.bench("--endpoint", "cart", "--save-baseline", self.baseline)
+        with open(self.baseline) as f:
+            results = json.load(f)
+        results["endpoints"]["cart"]["queries"] -= 1
+        with open(self.baseline, "w") as f:
+            json.dump(results, f)
+        with self.assertRaisesMessage(CommandError, "cart:"):
+            self.bench("--endpoint", "cart", "--baseline", self.baseline,
+                       "--seed", "1")
+
+
+class BenchProductRowsTests(TestCase):
+    def test_both_paths_build_the_page(self):
+        out = StringIO()
+        call_command("bench_product_rows", "--current-db", "--dataset",
+                     "tiny", "--rows", "15", "--iterations", "1", stdout=out)
+        self.assertIn("15 rows: serializer", out.getvalue())
+
+
+class CompareAsyncTests(TransactionTestCase):
+    # requests run in their own threads, which must see the seeded rows
+
+    def test_sync_and_async_views_are_both_loaded(self):
+        out = StringIO()
+        call_command("compare_async", "--current-db", "--requests", "4",
+                     "--concurrency", "2", "--db-latency", "0",
+                     "--endpoint", "product-list", "--endpoint", "cart",
+                     stdout=out)
+        rows = [line.split() for line in out.getvalue().splitlines()[2:]]
+        self.assertEqual([row[:2] for row in rows], [
+            ["product-list", "sync"], ["product-list", "async"],
+            ["cart", "sync"], ["cart", "async"]])
+
+
+class CompareTests(TestCase):
+    def results(self, p95, queries=4, alloc=100.0):
+        return {"dataset": {"products": 10}, "endpoints": {"product-list": {
+            "p95_ms": p95, "queries": queries, "peak_alloc_kib": alloc}}}
+
+    def test_thresholds(self):
+        baseline = self.results(10.0)
+        self.assertEqual(compare(baseline, self.results(12.0)), [])
+        self.assertEqual(len(compare(baseline, self.results(13.0))), 1)
+        self.assertEqual(len(compare(baseline, self.results(10.0, 5))), 1)
+        self.assertEqual(
+            len(compare(baseline, self.results(10.0, alloc=200.0))), 1)
+        # differences within the noise floor never count
+        self.assertEqual(compare(self.results(0.1), self.results(0.5)), [])
+
+    def test_percentile(self):
+        samples = list(range(1, 101))
+        self.assertEqual((percentile(samples, 50), percentile(samples, 99)),
+                         (50, 99))
@@ -0,0 +1,102 @@
+"""
+Native async read-only API views.
+
+DRF's ``APIView`` dispatches synchronously, so under ASGI every DRF request
+holds a thread from start to finish. ``async_api_view`` turns a plain
+``async def`` view into a JSON endpoint that behaves like a DRF one (DRF
+request wrapper, authentication, error bodies, JSON rendering) while the
+view awaits the async ORM and cache APIs. The thread is only held while a
+query runs, not while waiting on the cache or rendering.
+
+Views return the data to render, or an ``HttpResponse`` as is.
+"""
+import functools
+from calendar import timegm
+
+from django.http import Http404, HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework import exceptions
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.views import exception_handler
+
+
+def render(data, status=200, headers=None):
+    return HttpResponse(JSONRenderer().render(data), status=status,
+                        headers=headers, content_type="application/json")
+
+
+def _error_response(exc, request):
+    response = exception_handler(exc, {"request": request})
+    if response is None:
+        raise exc
+    headers = {name: value for name, value in response.items()
+               if name.lower() != "content-type"}
+    return render(response.data, status=response.status_code,
+                  headers=headers)
+
+
+def async_api_view(view=None, *, authentication=None, login_required=False):
+    """
+    Serve ``view`` for GET and HEAD, authenticating with an instance of
+    ``authentication`` (a class with an ``aauthenticate`` coroutine), and
+    refusing anonymous requests if ``login_required``.
+    """
+    if view is None:
+        return functools.partial(
+            async_api_view, authentication=authentication,
+            login_required=login_required)
+
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        request = Request(request)
+        try:
+            if request.method not in ("GET", "HEAD"):
+                raise exceptions.MethodNotAllowed(request.method)
+            if authentication is not None:
+                result = await authentication().aauthenticate(request)
+                if result is not None:
+                    request.user, request.auth = result
+            if login_required and not request.user.is_authenticated:
+                raise exceptions.NotAuthenticated()
+            result = await view(request, *args, **kwargs)
+        except (exceptions.APIException, Http404) as exc:
+            if isinstance(exc, (exceptions.NotAuthenticated,
+                                exceptions.AuthenticationFailed)):
+                # as APIView.handle_exception does for the first
+                # authenticator; without a challenge it would be a 403
+                authenticator = authentication and authentication()
+                header = authenticator and authenticator.authenticate_header(
+                    request)
+                if header:
+                    exc.auth_header = header
+                else:
+                    exc.status_code = 403
+            return _error_response(exc, request)
+        if isinstance(result, HttpResponse):
+            return result
+        return render(result)
+
+    return wrapper
+
+
+async def conditional_response(request, respond, etag=None,
+                               last_modified=None):
+    """
+    What ``django.views.decorators.http.condition`` does, for validators the
+    async view has already computed: a 304 (or 412) if the client's copy is
+    current, else the response of ``await respond()``, with validators.
+    """
+    etag = quote_etag(etag) if etag else None
+    timestamp = timegm(last_modified.utctimetuple()) if last_modified else None
+    response = get_conditional_response(
+        request, etag=etag, last_modified=timestamp)
+    if response is None:
+        response = await respond()
+    if request.method in ("GET", "HEAD"):
+        if timestamp and not response.has_header("Last-Modified"):
+            response.headers["Last-Modified"] = http_date(timestamp)
+        if etag:
+            response.headers.setdefault("ETag", etag)
+    return response
@@ -0,0 +1,157 @@
+"""
+Read replicas with read-your-writes.
+
+With ``DATABASE_REPLICAS`` set, reads made while handling a GET, HEAD or
+OPTIONS request go to one of the replicas. Everything else uses the
+primary ("default"): writes, reads in other requests or inside a
+transaction, and reads outside any request (management commands and jobs,
+which usually act on what they read).
+
+Replicas lag behind the primary. After a user's successful write request
+(a checkout, a product update or approval...) ``ReplicaPinMiddleware``
+pins that user's reads to the primary for ``DATABASE_PIN_SECONDS``, so
+they see their own change. Pins live in the "db_pins" cache, which must be
+shared by all worker processes. Shared caches must not store what was read
+from a replica, or a pinned user would be served the stale copy from there:
+build what they store inside ``primary_reads()``.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils.functional import LazyObject, empty
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+# the request being handled; follows it into sync_to_async threads
+_request_state = ContextVar("replica_request_state", default=None)
+
+
+def _pin_key(user_id):
+    return f"pin:{user_id}"
+
+
+def pin_to_primary(user_id):
+    """Read from the primary for ``user_id`` for ``DATABASE_PIN_SECONDS``."""
+    caches["db_pins"].set(
+        _pin_key(user_id), True, timeout=settings.DATABASE_PIN_SECONDS)
+
+
+async def apin_to_primary(user_id):
+    await caches["db_pins"].aset(
+        _pin_key(user_id), True, timeout=settings.DATABASE_PIN_SECONDS)
+
+
+def _authenticated_user_id(request):
+    # only a user that is already resolved (DRF assigns it when it
+    # authenticates); resolving the lazy session user here would query
+    user = request.__dict__.get("user")
+    if isinstance(user, LazyObject):
+        user = None if user._wrapped is empty else user._wrapped
+    if user is not None and user.is_authenticated:
+        return user.pk
+    return None
+
+
+class _RequestState:
+    def __init__(self, request):
+        self.request = request
+        self.primary = request.method not in SAFE_METHODS
+        self.user_id = None  # whose pin was last looked up
+        self.forced = 0  # primary_reads() blocks entered
+
+    def use_primary(self):
+        if self.primary or self.forced:
+            return True
+        user_id = _authenticated_user_id(self.request)
+        if user_id is not None and user_id != self.user_id:
+            # set first: a database cache backend routes its own read here
+            self.user_id = user_id
+            self.primary = bool(caches["db_pins"].get(_pin_key(user_id)))
+        return self.primary
+
+
+@contextmanager
+def primary_reads():
+    """Send the reads of the request being handled to the primary meanwhile."""
+    state = _request_state.get()
+    if state is None:
+        yield
+        return
+    state.forced += 1
+    try:
+        yield
+    finally:
+        state.forced -= 1
+
+
+class ReplicaRouter:
+    """Safe requests' reads to a replica, everything else to the primary."""
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label == "django_cache":
+            # database cache entries hold invalidation state: never stale
+            return DEFAULT_DB_ALIAS
+        instance = hints.get("instance")
+        if instance is not None and instance._state.db:
+            return instance._state.db  # related rows from the same copy
+        replicas = settings.DATABASE_REPLICAS
+        state = _request_state.get()
+        if (not replicas or state is None or state.use_primary()
+                or connections[DEFAULT_DB_ALIAS].in_atomic_block):
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # every replica holds the primary's rows
+        return True
+
+
+class ReplicaPinMiddleware:
+    """Track the request for ``ReplicaRouter`` and pin users who write."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        token = _request_state.set(_RequestState(request))
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_state.reset(token)
+        user_id = self.writer(request, response)
+        if user_id is not None:
+            pin_to_primary(user_id)
+        return response
+
+    async def __acall__(self, request):
+        token = _request_state.set(_RequestState(request))
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_state.reset(token)
+        user_id = self.writer(request, response)
+        if user_id is not None:
+            await apin_to_primary(user_id)
+        return response
+
+    def writer(self, request, response):
+        """The id of the user to pin after ``request``, if any."""
+        if (settings.DATABASE_REPLICAS and request.method not in SAFE_METHODS
+                and response.status_code < 400):
+            return _authenticated_user_id(request)
+        return None
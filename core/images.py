@@ -0,0 +1,135 @@
+"""
+Resized, re-encoded derivatives of uploaded images.
+
+Each upload is rendered once into every size in ``DERIVATIVE_SIZES`` and
+every format in ``DERIVATIVE_FORMATS`` next to the original, under
+``derivatives/``. The model stores a small manifest of the files written
+(see ``render_derivatives``) so serializers can hand clients a thumbnail
+instead of the raw upload without touching storage per request.
+"""
+import logging
+import posixpath
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+logger = logging.getLogger(__name__)
+
+# longest edge in pixels; images are never upscaled
+DERIVATIVE_SIZES = {
+    "thumbnail": 160,
+    "medium": 640,
+    "large": 1280,
+}
+
+# extension: (Pillow format, save options)
+DERIVATIVE_FORMATS = {
+    "webp": ("WEBP", {"quality": 80, "method": 4}),
+    "jpg": ("JPEG", {"quality": 82, "optimize": True, "progressive": True}),
+}
+
+
+def derivative_name(source_name, size, extension):
+    """``products/shoe.png`` -> ``derivatives/products/shoe.png/medium.webp``"""
+    # the source's extension stays: shoe.png and shoe.jpg are two images
+    return posixpath.join("derivatives", source_name, f"{size}.{extension}")
+
+
+def needs_derivatives(field_file, derivatives):
+    """Whether ``derivatives`` is missing or was rendered from another file."""
+    return bool(field_file) and derivatives.get("source") != field_file.name
+
+
+def _flatten(image, pillow_format):
+    if pillow_format == "JPEG" and image.mode != "RGB":
+        # JPEG has no alpha channel: composite onto white
+        rgba = image.convert("RGBA")
+        background = Image.new("RGB", rgba.size, (255, 255, 255))
+        background.paste(rgba, mask=rgba.getchannel("A"))
+        return background
+    if image.mode not in ("RGB", "RGBA"):
+        return image.convert("RGBA" if "A" in image.getbands() else "RGB")
+    return image
+
+
+def render_derivatives(source_name, storage=default_storage):
+    """
+    Write every derivative of the image stored at ``source_name`` and return
+    its manifest::
+
+        {"source": "products/shoe.png", "width": 3024, "height": 4032,
+         "sizes": {"thumbnail": {"webp": "derivatives/...", "jpg": ...}, ...}}
+
+    Returns ``{}`` when the source is missing or not an image. Only touches
+    storage, never the database, so it can run in a worker process.
+    """
+    try:
+        with storage.open(source_name, "rb") as source:
+            image = Image.open(source)
+            image = ImageOps.exif_transpose(image)
+            image.load()
+    except (OSError, UnidentifiedImageError) as exc:
+        logger.warning("Cannot render derivatives of %s: %s", source_name, exc)
+        return {}
+
+    sizes = {}
+    for size, edge in DERIVATIVE_SIZES.items():
+        resized = image.copy()
+        resized.thumbnail((edge, edge), Image.Resampling.LANCZOS)
+        sizes[size] = {}
+        for extension, (pillow_format, options) in DERIVATIVE_FORMATS.items():
+            buffer = BytesIO()
+            _flatten(resized, pillow_format).save(
+                buffer, pillow_format, **options)
+            name = derivative_name(source_name, size, extension)
+            # overwrite in place rather than let storage pick a new name
+            storage.delete(name)
+            sizes[size][extension] = storage.save(
+                name, ContentFile(buffer.getvalue()))
+    return {"source": source_name, "width": image.width,
+            "height": image.height, "sizes": sizes}
+
+
+def _derivative_names(derivatives):
+    return {name for formats in derivatives.get("sizes", {}).values()
+            for name in formats.values()}
+
+
+def delete_derivatives(derivatives, storage=default_storage, keep=None):
+    """Delete the files of ``derivatives``, except those ``keep`` (a newer
+    manifest of the same image) still lists."""
+    for name in _derivative_names(derivatives) - _derivative_names(keep or {}):
+        storage.delete(name)
+
+
+def derivative_urls(derivatives, request=None, storage=default_storage):
+    """``{size: {format: url}}`` for a manifest, absolute given ``request``."""
+    urls = {}
+    for size, formats in derivatives.get("sizes", {}).items():
+        urls[size] = {}
+        for extension, name in formats.items():
+            url = storage.url(name)
+            urls[size][extension] = (
+                request.build_absolute_uri(url) if request else url)
+    return urls
+
+
+def refresh_derivatives(model, pk, field="image", manifest="derivatives"):
+    """
+    Re-render the derivatives of ``model`` row ``pk`` if its ``field`` file
+    changed since they were last rendered; returns whether it did.
+    """
+    instance = model.objects.filter(pk=pk).only(field, manifest).first()
+    if instance is None:
+        return False
+    field_file, current = getattr(instance, field), getattr(instance, manifest)
+    if not needs_derivatives(field_file, current):
+        return False
+    rendered = render_derivatives(field_file.name)
+    model.objects.filter(pk=pk).update(**{manifest: rendered})
+    # only once the row points at the new files; re-rendering the same
+    # source overwrites its files in place, and those are kept
+    delete_derivatives(current, keep=rendered)
+    return True
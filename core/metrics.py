@@ -0,0 +1,276 @@
+"""
+Per-view request metrics in Prometheus text format.
+
+``MetricsMiddleware`` records, per resolved URL name and method, the number
+of requests by status, a latency histogram, and the database queries, time
+spent in the database and response bytes they took, for sync and async
+views alike. ``metrics_view`` serves them at ``/metrics``, to scrapers
+holding ``METRICS_TOKEN`` or, without one, from ``METRICS_ALLOWED_IPS``.
+
+Each process keeps its numbers in memory. With ``METRICS_DIR`` set (required
+with more than one worker process) every process also writes them to its
+own file there, at most every ``METRICS_FLUSH_INTERVAL`` seconds, and
+``/metrics`` adds up all the files, so whichever worker answers reports the
+whole server. Files of exited processes are kept so totals never go
+backwards; empty the directory when the server is (re)deployed.
+"""
+import atexit
+import bisect
+import json
+import os
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+                   10.0)
+UNMATCHED = "<unmatched>"
+# any other method is recorded as "other", so clients cannot add series
+METHODS = frozenset({"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE",
+                     "OPTIONS", "TRACE", "CONNECT"})
+
+
+class Registry:
+    """This process's counters, written to ``METRICS_DIR`` if it is set."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._reset()
+        atexit.register(self.flush)
+
+    def _reset(self):
+        # called again in a forked child, which must not report as its parent
+        self.pid = os.getpid()
+        self.filename = f"{self.pid}-{uuid.uuid4().hex}.json"
+        self.last_flush = time.monotonic()
+        self.statuses = {}  # (view, method, status) -> requests
+        # (view, method) -> [bucket counts..., seconds, queries, db seconds,
+        #                    bytes]
+        self.views = {}
+
+    def clear(self):
+        with self._lock:
+            self._reset()
+
+    def record(self, view, method, status, seconds, queries, db_seconds,
+               size):
+        with self._lock:
+            if self.pid != os.getpid():
+                self._reset()
+            key = (view, method, str(status))
+            self.statuses[key] = self.statuses.get(key, 0) + 1
+            row = self.views.get((view, method))
+            if row is None:
+                row = self.views[(view, method)] = \
+                    [0] * (len(LATENCY_BUCKETS) + 1) + [0.0, 0, 0.0, 0]
+            row[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+            row[-4] += seconds
+            row[-3] += queries
+            row[-2] += db_seconds
+            row[-1] += size
+            due = (time.monotonic() - self.last_flush
+                   >= settings.METRICS_FLUSH_INTERVAL)
+        if due:
+            self.flush()
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "statuses": [[*key, n] for key, n in self.statuses.items()],
+                "views": [[*key, *row] for key, row in self.views.items()],
+            }
+
+    def flush(self):
+        directory = settings.METRICS_DIR
+        # one writer at a time; a concurrent flush carries our numbers too
+        if not directory or not self._flush_lock.acquire(blocking=False):
+            return
+        try:
+            self.last_flush = time.monotonic()
+            path = os.path.join(directory, self.filename)
+            with open(f"{path}.tmp", "w") as f:
+                json.dump(self.snapshot(), f)
+            os.replace(f"{path}.tmp", path)
+        finally:
+            self._flush_lock.release()
+
+    def collect(self):
+        """Snapshots of this process and, from ``METRICS_DIR``, all others."""
+        snapshots = [self.snapshot()]
+        directory = settings.METRICS_DIR
+        if directory:
+            own = os.path.join(directory, self.filename)
+            for entry in os.scandir(directory):
+                if entry.name.endswith(".json") and entry.path != own:
+                    try:
+                        with open(entry.path) as f:
+                            snapshots.append(json.load(f))
+                    except (OSError, ValueError):
+                        continue  # replaced or removed while we read it
+        return snapshots
+
+
+registry = Registry()
+
+
+class QueryTimer:
+    """``execute_wrapper`` counting queries and the time they take."""
+
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - start
+            self.queries += 1
+
+
+# the timer of the request being handled; context variables follow the
+# request into the threads async views run their queries in
+_request_timer = ContextVar("request_timer", default=None)
+
+
+def _time_query(execute, sql, params, many, context):
+    timer = _request_timer.get()
+    if timer is None:
+        return execute(sql, params, many, context)
+    return timer(execute, sql, params, many, context)
+
+
+def _install_query_timer(sender=None, connection=None, **kwargs):
+    if _time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_time_query)
+
+
+def install_query_timer():
+    """Time the queries of every connection, including ones opened later."""
+    connection_created.connect(_install_query_timer)
+    for connection in connections.all(initialized_only=True):
+        _install_query_timer(connection=connection)
+
+
+class MetricsMiddleware:
+    """Record every request in ``registry``; goes first in MIDDLEWARE."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+        install_query_timer()
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        timer = QueryTimer()
+        token = _request_timer.set(timer)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_timer.reset(token)
+        self.record(request, response, time.perf_counter() - start, timer)
+        return response
+
+    async def __acall__(self, request):
+        timer = QueryTimer()
+        token = _request_timer.set(timer)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_timer.reset(token)
+        self.record(request, response, time.perf_counter() - start, timer)
+        return response
+
+    def record(self, request, response, seconds, timer):
+        match = getattr(request, "resolver_match", None)
+        # unresolved paths share one label so scanners cannot add series
+        view = (match and match.url_name) or UNMATCHED
+        if response.streaming:
+            size = int(response.get("Content-Length", 0))
+        else:
+            size = len(response.content)
+        method = request.method if request.method in METHODS else "other"
+        registry.record(view, method, response.status_code, seconds,
+                        timer.queries, timer.seconds, size)
+
+
+def _labels(**labels):
+    pairs = ",".join(
+        f'{name}="{value}"' for name, value in labels.items())
+    return "{" + pairs + "}"
+
+
+def render(snapshots):
+    """Merge ``snapshots`` into the Prometheus text exposition format."""
+    statuses, views = {}, {}
+    for snapshot in snapshots:
+        for *key, n in snapshot["statuses"]:
+            statuses[tuple(key)] = statuses.get(tuple(key), 0) + n
+        for view, method, *row in snapshot["views"]:
+            total = views.setdefault((view, method), [0] * len(row))
+            for i, value in enumerate(row):
+                total[i] += value
+
+    lines = [
+        "# HELP http_requests_total Requests handled.",
+        "# TYPE http_requests_total counter",
+    ]
+    for (view, method, status), n in sorted(statuses.items()):
+        labels = _labels(view=view, method=method, status=status)
+        lines.append(f"http_requests_total{labels} {n}")
+
+    lines += [
+        "# HELP http_request_duration_seconds Time to produce a response.",
+        "# TYPE http_request_duration_seconds histogram",
+    ]
+    for (view, method), row in sorted(views.items()):
+        cumulative = 0
+        for bound, n in zip((*LATENCY_BUCKETS, "+Inf"), row):
+            cumulative += n
+            labels = _labels(view=view, method=method, le=bound)
+            lines.append(f"http_request_duration_seconds_bucket{labels} "
+                         f"{cumulative}")
+        labels = _labels(view=view, method=method)
+        lines.append(f"http_request_duration_seconds_sum{labels} {row[-4]}")
+        lines.append(
+            f"http_request_duration_seconds_count{labels} {cumulative}")
+
+    for name, index, help_text in (
+            ("http_request_db_queries_total", -3, "Database queries run."),
+            ("http_request_db_seconds_total", -2,
+             "Time spent waiting on the database."),
+            ("http_response_size_bytes_total", -1, "Response body bytes.")):
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+        for (view, method), row in sorted(views.items()):
+            labels = _labels(view=view, method=method)
+            lines.append(f"{name}{labels} {row[index]}")
+    return "\n".join(lines) + "\n"
+
+
+def metrics_view(request):
+    token = settings.METRICS_TOKEN
+    if token:
+        allowed = request.headers.get("Authorization") == f"Bearer {token}"
+    else:
+        allowed = request.META.get("REMOTE_ADDR") in settings.METRICS_ALLOWED_IPS
+    if not allowed:
+        return HttpResponse(status=403)
+    return HttpResponse(
+        render(registry.collect()),
+        content_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,120 @@
+"""
+Sparse fieldsets and optional expansion for read endpoints.
+
+``?fields=id,name,price`` limits a response to those fields and
+``?expand=category`` replaces a related object's id with the object, using
+the serializer in ``Meta.expandable_fields``. Both take dotted paths into
+nested serializers (``?fields=id,items.quantity&expand=items.product``).
+They only apply to GET and HEAD requests; writes always see every field.
+
+``optimize_queryset`` then loads what the serializer will actually read:
+the requested columns only, and prefetches for the nested serializers that
+are still present.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+
+
+def parse_paths(value):
+    """``"a,b.c,b.d"`` as the tree ``{"a": {}, "b": {"c": {}, "d": {}}}``."""
+    tree = {}
+    for path in (value or "").split(","):
+        node = tree
+        for name in filter(None, (part.strip() for part in path.split("."))):
+            node = node.setdefault(name, {})
+    return tree
+
+
+class SparseFieldsMixin:
+    """
+    For ``ModelSerializer``s: honours ``fields`` and ``expand`` (trees as
+    ``parse_paths`` returns them) given to the serializer, or read from the
+    request's query parameters when it is the outermost one.
+    """
+
+    def __init__(self, *args, fields=None, expand=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get("request")
+        if (fields is None and expand is None and request is not None
+                and request.method in ("GET", "HEAD")):
+            fields = parse_paths(request.query_params.get("fields"))
+            expand = parse_paths(request.query_params.get("expand"))
+        self.sparse(fields, expand)
+
+    def sparse(self, fields=None, expand=None):
+        self._requested = fields or {}
+        self._expand = expand or {}
+
+    def get_fields(self):
+        fields = super().get_fields()
+        expandable = getattr(self.Meta, "expandable_fields", {})
+        nested = {name for name, field in fields.items()
+                  if isinstance(getattr(field, "child", field),
+                                serializers.BaseSerializer)}
+        self._check("expand", self._expand, {*expandable, *nested})
+        for name in self._expand:
+            if name in expandable:
+                fields[name] = expandable[name](read_only=True)
+        if self._requested:
+            self._check("fields", self._requested, fields)
+            fields = {name: field for name, field in fields.items()
+                      if name in self._requested}
+
+        # hand the nested parts of both trees down
+        for name, field in fields.items():
+            child = getattr(field, "child", field)
+            nested_fields = self._requested.get(name)
+            nested_expand = self._expand.get(name)
+            if isinstance(child, SparseFieldsMixin):
+                child.sparse(nested_fields, nested_expand)
+            elif nested_fields or nested_expand:
+                raise ValidationError(
+                    {"fields" if nested_fields else "expand":
+                     f"'{name}' has no nested fields."})
+        return fields
+
+    @staticmethod
+    def _check(param, requested, available):
+        unknown = sorted(set(requested) - set(available))
+        if unknown:
+            raise ValidationError(
+                {param: f"Unknown field(s): {', '.join(unknown)}."})
+
+
+def _prefetches(serializer, prefix=""):
+    lookups = []
+    for field in serializer.fields.values():
+        child = getattr(field, "child", field)
+        if isinstance(child, serializers.ModelSerializer):
+            lookup = prefix + field.source.replace(".", "__")
+            lookups.append(lookup)
+            lookups += _prefetches(child, lookup + "__")
+    return lookups
+
+
+def _columns(serializer):
+    """The model fields ``serializer`` reads, or None if that is not known."""
+    model = serializer.Meta.model
+    columns = []
+    for field in serializer.fields.values():
+        try:
+            model_field = model._meta.get_field(field.source)
+        except FieldDoesNotExist:
+            return None  # computed, or a dotted source: load everything
+        if model_field.concrete:
+            columns.append(field.source)
+    return columns
+
+
+def optimize_queryset(queryset, serializer, keep=()):
+    """
+    ``queryset`` narrowed to the columns ``serializer`` will output, plus
+    those in ``keep`` (e.g. what a paginator orders by), and prefetching
+    the nested serializers it still has.
+    """
+    serializer = getattr(serializer, "child", serializer)
+    columns = _columns(serializer)
+    if columns is not None:
+        queryset = queryset.only("pk", *columns, *keep)
+    return queryset.prefetch_related(*_prefetches(serializer))
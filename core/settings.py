@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+from decimal import Decimal
 from pathlib import Path
 from decouple import config, Csv
 import os
@@ -48,16 +49,36 @@ INSTALLED_APPS = [
     'accounts',
     'products',
     'orders',
+    'jobs',
+    'benchmarks',
 ]
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ),
+    # token buckets of core.throttling.TokenBucketThrottle, per view scope
+    'DEFAULT_THROTTLE_RATES': {
+        'register.ip': config('THROTTLE_REGISTER_IP', default='10/hour'),
+        'login.ip': config('THROTTLE_LOGIN_IP', default='30/min'),
+        'login.user': config('THROTTLE_LOGIN_USER', default='10/min'),
+        'checkout.user': config('THROTTLE_CHECKOUT_USER', default='30/min'),
+    },
 }
 
+# "local": per-process buckets; "redis": shared by every process through the
+# Redis server at THROTTLE_REDIS_URL
+THROTTLE_BACKEND = config("THROTTLE_BACKEND", default="local")
+THROTTLE_REDIS_URL = config(
+    "THROTTLE_REDIS_URL", default="redis://127.0.0.1:6379/2")
+
 
 MIDDLEWARE = [
+    # first, so it times the whole stack (see core/metrics.py)
+    'core.metrics.MetricsMiddleware',
+    # routes the request's reads to a replica or the primary
+    # (see core/db_router.py)
+    'core.db_router.ReplicaPinMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -108,8 +129,93 @@ DATABASES = {
     }
 }
 
+if DATABASES["default"]["ENGINE"] == "django.db.backends.sqlite3":
+    # Seconds a connection waits for another's write lock; checkout takes
+    # that lock at BEGIN (core/transactions.py), so it waits here.
+    DATABASES["default"]["OPTIONS"] = {
+        "timeout": config("DB_TIMEOUT", default=20, cast=int),
+    }
+    # Test against a file rather than the shared-cache in-memory database,
+    # whose table-level locking misbehaves under the threaded checkout tests.
+    DATABASES["default"]["TEST"] = {
+        "NAME": os.path.join(BASE_DIR, "test_db.sqlite3"),
+    }
+
+# Read replicas (see core/db_router.py). DB_REPLICAS lists their aliases,
+# e.g. "replica1,replica2". Each is configured like the primary, with
+# DB_<ALIAS>_NAME, _HOST, _PORT, _USER or _PASSWORD overriding its values;
+# locally, point DB_REPLICA1_NAME at a copy of db.sqlite3.
+DATABASE_REPLICAS = config("DB_REPLICAS", default="", cast=Csv())
+for alias in DATABASE_REPLICAS:
+    DATABASES[alias] = {
+        **DATABASES["default"],
+        **{key: config(f"DB_{alias.upper()}_{key}",
+                       default=DATABASES["default"][key])
+           for key in ("NAME", "HOST", "PORT", "USER", "PASSWORD")},
+        # tests have no replication; read the primary's test database
+        "TEST": {"MIRROR": "default"},
+    }
+DATABASE_ROUTERS = ["core.db_router.ReplicaRouter"]
+# how long a user's reads stay on the primary after they change something
+DATABASE_PIN_SECONDS = config("DB_PIN_SECONDS", default=15, cast=float)
+
 AUTH_USER_MODEL = "accounts.User"
 
+
+# Caches
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+#
+# "catalog" holds the public catalog responses (see products/cache.py). It is
+# invalidated through generation counters stored in the same cache, so it
+# must be a backend every worker process shares: "shared" (the database
+# cache table, created by `manage.py migrate`) or "redis". "locmem" and
+# "file" only invalidate the process or host that made the change; use them
+# with a single process.
+
+CACHE_BACKENDS = {
+    "locmem": "django.core.cache.backends.locmem.LocMemCache",
+    "file": "django.core.cache.backends.filebased.FileBasedCache",
+    "shared": "django.core.cache.backends.db.DatabaseCache",
+    "redis": "django.core.cache.backends.redis.RedisCache",
+}
+
+DEFAULT_CACHE_LOCATIONS = {
+    "locmem": "{name}",
+    "file": os.path.join(BASE_DIR, ".cache", "{name}"),
+    "shared": "{name}_cache",
+    "redis": "redis://127.0.0.1:6379/1",
+}
+
+
+def cache_config(name, backend, location=None, timeout=300):
+    return {
+        "BACKEND": CACHE_BACKENDS[backend],
+        "LOCATION": location or DEFAULT_CACHE_LOCATIONS[backend].format(name=name),
+        "TIMEOUT": timeout,
+        "KEY_PREFIX": name,
+    }
+
+
+CACHES = {
+    "default": cache_config("default", "locmem"),
+    "catalog": cache_config(
+        "catalog",
+        config("CATALOG_CACHE_BACKEND", default="shared"),
+        config("CATALOG_CACHE_LOCATION", default=None),
+        # entries are invalidated by generation, the timeout only reclaims
+        # space held by superseded generations
+        config("CATALOG_CACHE_TIMEOUT", default=600, cast=int),
+    ),
+    # users pinned to the primary database after a write; every worker
+    # process must see the pins, hence a shared backend (only consulted
+    # with DB_REPLICAS set)
+    "db_pins": cache_config(
+        "db_pins",
+        config("DB_PIN_CACHE_BACKEND", default="shared"),
+        config("DB_PIN_CACHE_LOCATION", default=None),
+    ),
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -154,3 +260,39 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
+# Platform cut of each order line when neither the vendor nor the product's
+# category sets its own rate
+DEFAULT_COMMISSION_RATE = config(
+    "DEFAULT_COMMISSION_RATE", default="0.10", cast=Decimal)
+
+# Run background jobs in-process after commit instead of queueing them for
+# run_workers (see jobs/queue.py); for development without a worker
+JOBS_EAGER = config("JOBS_EAGER", default=False, cast=bool)
+
+SIMPLE_JWT = {
+    # embed role and vendor claims (see accounts/tokens.py)
+    "TOKEN_OBTAIN_SERIALIZER": "accounts.tokens.ClaimsTokenObtainPairSerializer",
+    "TOKEN_REFRESH_SERIALIZER": "accounts.tokens.ClaimsTokenRefreshSerializer",
+}
+
+# in-process cache of users resolved by CachedJWTAuthentication (see
+# accounts/user_cache.py); the TTL bounds staleness across processes
+AUTH_USER_CACHE_SIZE = config("AUTH_USER_CACHE_SIZE", default=1024, cast=int)
+AUTH_USER_CACHE_TTL = config("AUTH_USER_CACHE_TTL", default=30, cast=float)
+
+# request metrics served at /metrics (see core/metrics.py). With several
+# worker processes, point METRICS_DIR at a directory shared by all of them
+# and empty it on deploy. If METRICS_TOKEN is set, scrapers must send it as
+# a bearer token; otherwise only METRICS_ALLOWED_IPS (by REMOTE_ADDR) may
+# scrape.
+METRICS_DIR = config("METRICS_DIR", default="")
+METRICS_FLUSH_INTERVAL = config("METRICS_FLUSH_INTERVAL", default=5, cast=float)
+METRICS_TOKEN = config("METRICS_TOKEN", default="")
+METRICS_ALLOWED_IPS = config(
+    "METRICS_ALLOWED_IPS", default="127.0.0.1,::1", cast=Csv())
+
+# build product list pages from values() rows instead of ProductSerializer
+# (see products/fastpath.py); the output is the same, turn off to compare
+PRODUCT_LIST_FAST_PATH = config(
+    "PRODUCT_LIST_FAST_PATH", default=True, cast=bool)
@@ -0,0 +1,112 @@
+import json
+import os
+import shutil
+import tempfile
+from unittest import skipUnless
+from django.core.cache import caches
+from django.db import connection, transaction
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from accounts.models import User, VendorProfile
+from products.models import Product
+from .metrics import registry
+from .transactions import write_atomic
+
+
+class MetricsTests(APITestCase):
+    def setUp(self):
+        registry.clear()
+        caches["catalog"].clear()
+        user = User.objects.create_user(
+            username="vendor", password="pass12345", role=User.Roles.VENDOR)
+        vendor = VendorProfile.objects.create(user=user, verified=True)
+        Product.objects.create(
+            vendor=vendor, name="Shirt", price="10.00", is_active=True)
+
+    def scrape(self, **headers):
+        response = self.client.get(reverse("metrics"), headers=headers)
+        self.assertEqual(response.status_code, 200)
+        samples = {}
+        for line in response.content.decode().splitlines():
+            if not line.startswith("#"):
+                name, value = line.rsplit(" ", 1)
+                samples[name] = float(value)
+        return samples
+
+    def test_requests_are_recorded_per_view(self):
+        self.client.get(reverse("product-list"))
+        self.client.get("/api/products/no-such-page/")
+        samples = self.scrape()
+
+        labels = 'view="product-list",method="GET"'
+        self.assertEqual(
+            samples[f'http_requests_total{{{labels},status="200"}}'], 1)
+        self.assertEqual(samples[
+            f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}}'],
+            1)
+        self.assertGreater(
+            samples[f"http_request_db_queries_total{{{labels}}}"], 0)
+        self.assertGreater(
+            samples[f"http_response_size_bytes_total{{{labels}}}"], 0)
+        self.assertEqual(samples['http_requests_total{view="<unmatched>",'
+                                 'method="GET",status="404"}'], 1)
+
+    def test_other_processes_are_added_up(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        with open(os.path.join(directory, "other.json"), "w") as f:
+            json.dump({"statuses": [["product-list", "GET", "200", 5]],
+                       "views": []}, f)
+
+        with self.settings(METRICS_DIR=directory):
+            self.client.get(reverse("product-list"))
+            samples = self.scrape()
+            registry.flush()
+        self.assertEqual(samples['http_requests_total{view="product-list",'
+                                 'method="GET",status="200"}'], 6)
+        self.assertEqual(len(os.listdir(directory)), 2)
+
+    def test_unknown_methods_share_one_label(self):
+        for method in ("FOO", "BAR"):
+            self.client.generic(method, reverse("product-list"))
+        samples = self.scrape()
+        self.assertEqual(samples['http_requests_total{view="product-list",'
+                                 'method="other",status="405"}'], 2)
+
+    def test_only_allowed_ips_without_a_token(self):
+        response = self.client.get(reverse("metrics"),
+                                   REMOTE_ADDR="203.0.113.5")
+        self.assertEqual(response.status_code, 403)
+        with self.settings(METRICS_ALLOWED_IPS=["203.0.113.5"]):
+            response = self.client.get(reverse("metrics"),
+                                       REMOTE_ADDR="203.0.113.5")
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(METRICS_TOKEN="s3cret")
+    def test_token_is_required_if_configured(self):
+        self.assertEqual(self.client.get(reverse("metrics")).status_code, 403)
+        self.scrape(Authorization="Bearer s3cret")
+
+
+class WriteAtomicTests(TransactionTestCase):
+    def begins(self):
+        with CaptureQueriesContext(connection) as queries:
+            with write_atomic():
+                User.objects.exists()
+                with write_atomic():
+                    User.objects.exists()
+            with write_atomic():
+                pass
+        return [query["sql"] for query in queries
+                if query["sql"].startswith("BEGIN")]
+
+    @skipUnless(connection.vendor == "sqlite", "SQLite only")
+    def test_sqlite_takes_the_write_lock_at_begin(self):
+        self.assertEqual(self.begins(), ["BEGIN IMMEDIATE"] * 2)
+        # other transactions keep the configured mode
+        with CaptureQueriesContext(connection) as queries:
+            with transaction.atomic():
+                User.objects.exists()
+        self.assertEqual(queries[0]["sql"], "BEGIN")
@@ -0,0 +1,173 @@
+"""
+Token-bucket throttling for expensive endpoints.
+
+A view opts in with ``throttle_classes = [TokenBucketThrottle]`` and a
+``throttle_scope``; its buckets are configured in ``DEFAULT_THROTTLE_RATES``
+as ``"<scope>.ip"`` and ``"<scope>.user"``, e.g. ``"login.ip": "30/min"``.
+A rate of N per period is a bucket of N tokens refilled evenly over the
+period, so bursts up to N pass and sustained traffic is held to the rate.
+
+Buckets are stored as a single "theoretical arrival time" each (GCRA, the
+token bucket expressed as one timestamp), and every bucket a request touches
+is checked and charged in one call to the store:
+
+* ``local`` (default): an in-process dict, no round-trip at all; limits are
+  per worker process.
+* ``redis``: Redis at ``THROTTLE_REDIS_URL``, shared between processes; one
+  atomic script call per request.
+"""
+import functools
+import hashlib
+import threading
+from collections import OrderedDict
+
+import redis
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+
+def _charge(tats, buckets, now):
+    """
+    New arrival times for ``buckets`` given their stored ``tats``, and the
+    seconds to wait (0 if the request may proceed).
+    """
+    new_tats, wait = [], 0.0
+    for tat, (_, capacity, interval) in zip(tats, buckets):
+        new_tat = max(tat or now, now) + interval
+        allow_at = new_tat - capacity * interval
+        wait = max(wait, allow_at - now)
+        new_tats.append(new_tat)
+    return new_tats, wait
+
+
+class LocalBucketStore:
+    """Buckets in this process's memory, bounded to ``maxsize`` keys."""
+
+    def __init__(self, maxsize=100_000):
+        self.maxsize = maxsize
+        self._tats = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consume(self, buckets, now):
+        keys = [key for key, _, _ in buckets]
+        with self._lock:
+            new_tats, wait = _charge(
+                [self._tats.get(key) for key in keys], buckets, now)
+            if wait > 0:
+                return wait
+            for key, tat in zip(keys, new_tats):
+                self._tats[key] = tat
+                self._tats.move_to_end(key)
+            while len(self._tats) > self.maxsize:
+                # least recently charged first; long since refilled
+                self._tats.popitem(last=False)
+        return 0.0
+
+    def clear(self):
+        with self._lock:
+            self._tats.clear()
+
+
+# KEYS: buckets; ARGV: now, then capacity and interval per bucket
+REDIS_CONSUME = """
+local now = tonumber(ARGV[1])
+local wait = 0
+local tats = {}
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[2 * i])
+    local interval = tonumber(ARGV[2 * i + 1])
+    local tat = math.max(tonumber(redis.call('GET', key) or now), now)
+    tats[i] = tat + interval
+    wait = math.max(wait, tats[i] - capacity * interval - now)
+end
+if wait > 0 then
+    return tostring(wait)
+end
+for i, key in ipairs(KEYS) do
+    redis.call('SET', key, tostring(tats[i]), 'PX',
+               math.max(math.ceil((tats[i] - now) * 1000), 1))
+end
+return '0'
+"""
+
+
+class RedisBucketStore:
+    """Buckets in Redis, checked and charged by one server-side script."""
+
+    def __init__(self, url):
+        self.client = redis.Redis.from_url(url)
+        self.script = self.client.register_script(REDIS_CONSUME)
+
+    def consume(self, buckets, now):
+        args = [now]
+        for _, capacity, interval in buckets:
+            args += [capacity, interval]
+        keys = [key for key, _, _ in buckets]
+        return float(self.script(keys=keys, args=args))
+
+    def clear(self):
+        keys = list(self.client.scan_iter(match="throttle:*"))
+        if keys:
+            self.client.delete(*keys)
+
+
+@functools.cache
+def bucket_store():
+    backend = settings.THROTTLE_BACKEND
+    if backend == "redis":
+        return RedisBucketStore(settings.THROTTLE_REDIS_URL)
+    if backend != "local":
+        raise ImproperlyConfigured(
+            f'THROTTLE_BACKEND must be "local" or "redis", not {backend!r}.')
+    return LocalBucketStore()
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """
+    Per-IP and per-user token buckets for the view's ``throttle_scope``.
+
+    The user is the authenticated user or, on views that set
+    ``throttle_identity_field`` (login), the identity the client claims in
+    the request body, so one account cannot be hammered from many IPs.
+    """
+
+    def __init__(self):
+        # the rates depend on the view, see get_buckets()
+        self.wait_seconds = 0.0
+
+    def get_user_ident(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return f"id:{request.user.pk}"
+        field = getattr(view, "throttle_identity_field", None)
+        value = field and request.data.get(field)
+        if isinstance(value, str) and value:
+            digest = hashlib.md5(value.lower().encode()).hexdigest()
+            return f"name:{digest}"
+        return None
+
+    def get_buckets(self, request, view):
+        scope = getattr(view, "throttle_scope", None)
+        if not scope:
+            return []
+        buckets = []
+        for kind, ident in (("ip", self.get_ident(request)),
+                            ("user", self.get_user_ident(request, view))):
+            # read per request rather than at import, like the view's scope
+            rate = api_settings.DEFAULT_THROTTLE_RATES.get(f"{scope}.{kind}")
+            if rate and ident:
+                num_requests, duration = self.parse_rate(rate)
+                buckets.append((f"throttle:{scope}:{kind}:{ident}",
+                                num_requests, duration / num_requests))
+        return buckets
+
+    def allow_request(self, request, view):
+        buckets = self.get_buckets(request, view)
+        if not buckets:
+            return True
+        self.wait_seconds = bucket_store().consume(buckets, self.timer())
+        return self.wait_seconds <= 0
+
+    def wait(self):
+        return self.wait_seconds
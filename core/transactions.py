@@ -0,0 +1,35 @@
+"""
+Transactions that write from the start.
+
+SQLite begins transactions DEFERRED: the first read takes a shared lock and
+the first write has to upgrade it, which fails at once, without waiting on
+the busy timeout, while another connection holds the write lock. Under
+concurrent checkouts that is an error for the client instead of a short
+wait. ``write_atomic`` begins IMMEDIATE on SQLite, taking the write lock up
+front so such transactions queue for it; elsewhere, and when nested, it is
+plain ``transaction.atomic``.
+"""
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+
+@contextmanager
+def write_atomic(using=DEFAULT_DB_ALIAS):
+    """``transaction.atomic(using)``, taking SQLite's write lock at BEGIN."""
+    connection = connections[using]
+    if connection.vendor != "sqlite" or connection.in_atomic_block:
+        with transaction.atomic(using=using):
+            yield
+        return
+    # connecting resets the mode from settings, so connect first
+    connection.ensure_connection()
+    mode = connection.transaction_mode
+    connection.transaction_mode = "IMMEDIATE"
+    try:
+        with transaction.atomic(using=using):
+            # only the BEGIN needed it
+            connection.transaction_mode = mode
+            yield
+    finally:
+        connection.transaction_mode = mode
@@ -2,12 +2,17 @@ from django.contrib import admin
 from django.conf import settings
 from django.conf.urls.static import static
 from django.urls import path, include
+from .metrics import metrics_view
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/accounts/", include("accounts.urls")),
     path("api/products/", include("products.urls")),
     path("api/orders/", include("orders.urls")),
+    # async versions of the catalog and cart reads (see core/async_api.py)
+    path("api/async/products/", include("products.async_urls")),
+    path("api/async/orders/", include("orders.async_urls")),
+    path("metrics", metrics_view, name="metrics"),
 
 
 ]
@@ -0,0 +1,142 @@
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connections
+from django.utils import timezone
+
+from jobs.queue import (HEARTBEAT_INTERVAL, claim_job, heartbeat, job_stats,
+                        requeue_stale_jobs, run_job)
+
+logger = logging.getLogger(__name__)
+
+
+def work(worker_id, stop, poll_interval, burst):
+    """One worker thread: claim and run jobs until ``stop`` is set."""
+    try:
+        while not stop.is_set():
+            try:
+                job = claim_job(worker_id)
+                if job is not None:
+                    run_job(job)
+                    continue
+                if burst:
+                    return
+                requeue_stale_jobs()
+            except DatabaseError:
+                # e.g. a lock timeout: the job (if any) is retried once its
+                # heartbeat lapses; this worker keeps polling
+                logger.exception("Worker %s hit a database error", worker_id)
+            stop.wait(poll_interval)
+    finally:
+        # each thread holds its own database connection
+        connections.close_all()
+
+
+def beat(worker_ids, done):
+    """Keep the jobs of ``worker_ids`` alive until ``done`` is set."""
+    try:
+        while not done.wait(HEARTBEAT_INTERVAL):
+            try:
+                heartbeat(worker_ids)
+            except DatabaseError:
+                logger.exception("Heartbeat failed")
+    finally:
+        connections.close_all()
+
+
+def run_threads(prefix, threads, stop, poll_interval, burst):
+    worker_ids = [f"{prefix}-{n}" for n in range(threads)]
+    pool = [threading.Thread(
+        target=work, name=worker_id,
+        args=(worker_id, stop, poll_interval, burst))
+        for worker_id in worker_ids]
+    # not ``stop``: jobs still running after it is set need their heartbeat
+    done = threading.Event()
+    beater = threading.Thread(
+        target=beat, name=f"{prefix}-heartbeat", args=(worker_ids, done))
+    beater.start()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    done.set()
+    beater.join()
+
+
+def run_process(prefix, threads, poll_interval, burst):
+    # a no-op under fork; spawned processes need the app registry
+    django.setup()
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+    run_threads(prefix, threads, stop, poll_interval, burst)
+
+
+class Command(BaseCommand):
+    help = "Run background job workers"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--threads", type=int, default=4,
+            help="Worker threads per process")
+        parser.add_argument(
+            "--processes", type=int, default=1,
+            help="Worker processes, each running --threads threads")
+        parser.add_argument(
+            "--poll-interval", type=float, default=1.0,
+            help="Seconds an idle worker waits before polling again")
+        parser.add_argument(
+            "--burst", action="store_true",
+            help="Exit once no job is due instead of waiting for more")
+
+    def handle(self, *args, **options):
+        started = timezone.now()
+        prefix = f"{socket.gethostname()}-{os.getpid()}"
+        threads = max(options["threads"], 1)
+        processes = max(options["processes"], 1)
+        self.stdout.write(f"Starting {processes} x {threads} workers...")
+
+        stop = threading.Event()
+        if processes == 1:
+            children = []
+        else:
+            # children must not inherit the parent's database sockets
+            connections.close_all()
+            children = [multiprocessing.Process(
+                target=run_process,
+                args=(f"{prefix}-p{n}", threads, options["poll_interval"],
+                      options["burst"]))
+                for n in range(processes)]
+
+        def shutdown(*_):
+            # running jobs are finished, then the workers exit
+            stop.set()
+            for child in children:
+                child.terminate()
+        handlers = {signum: signal.signal(signum, shutdown)
+                    for signum in (signal.SIGTERM, signal.SIGINT)}
+        try:
+            if children:
+                for child in children:
+                    child.start()
+                for child in children:
+                    child.join()
+            else:
+                run_threads(prefix, threads, stop,
+                            options["poll_interval"], options["burst"])
+        finally:
+            for signum, handler in handlers.items():
+                signal.signal(signum, handler)
+
+        for row in job_stats(since=started):
+            self.stdout.write(
+                f"{row['task']}: {row['done']} done, {row['failed']} failed, "
+                f"{row['retries']} retries, avg {row['avg_ms']:.1f}ms, "
+                f"max {row['max_ms']:.1f}ms")
+        self.stdout.write(self.style.SUCCESS("Workers stopped."))
@@ -0,0 +1,202 @@
+"""
+A small job queue stored in the project database.
+
+Tasks are plain functions registered with ``@task`` in an app's ``tasks.py``
+(discovered by ``JobsConfig.ready``)::
+
+    @task
+    def render_product_image(image_id):
+        ...
+
+    render_product_image.enqueue(image.pk)
+
+``enqueue`` inserts a ``Job`` row in the caller's transaction, so a job
+exists exactly when the data it refers to was committed. Workers
+(``run_workers``) claim due jobs one at a time: with ``SELECT ... FOR UPDATE
+SKIP LOCKED`` where the database supports it, so concurrent workers never
+wait on each other, and with a conditional UPDATE on SQLite, whose writes
+are serialized anyway. Failures are retried with exponential backoff and
+every attempt records its duration. While a job runs its worker touches
+``heartbeat_at``; a running job whose heartbeat stopped lost its worker and
+is requeued, which counts as a failed attempt. With ``settings.JOBS_EAGER`` tasks run
+in-process after commit instead, for development without a worker.
+"""
+import logging
+import random
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Avg, Count, F, Max, Q, Sum
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+TASKS = {}
+
+BACKOFF_BASE = 2  # seconds before the first retry, doubled on each one
+BACKOFF_MAX = 600
+HEARTBEAT_INTERVAL = 30  # seconds between a worker's heartbeats
+# a running job not heartbeaten for this long is assumed to have lost its
+# worker; however long the job itself takes
+LOCK_TIMEOUT = timedelta(seconds=HEARTBEAT_INTERVAL * 4)
+
+
+def task(func=None, *, max_attempts=5):
+    """Register ``func`` as a task and give it an ``enqueue`` method."""
+    if func is None:
+        return lambda func: task(func, max_attempts=max_attempts)
+
+    name = f"{func.__module__}.{func.__qualname__}"
+    TASKS[name] = func
+    func.task_name = name
+    func.enqueue = lambda *args, **kwargs: enqueue(
+        name, args, kwargs, max_attempts=max_attempts)
+    return func
+
+
+def enqueue(name, args=(), kwargs=None, run_at=None, max_attempts=5):
+    """Queue a call to task ``name``; returns the Job, or None if eager."""
+    if name not in TASKS:
+        raise LookupError(f"Unknown task {name!r}.")
+    kwargs = kwargs or {}
+    if getattr(settings, "JOBS_EAGER", False):
+        transaction.on_commit(lambda: TASKS[name](*args, **kwargs))
+        return None
+    return Job.objects.create(
+        task=name, args=list(args), kwargs=kwargs,
+        run_at=run_at or timezone.now(), max_attempts=max_attempts)
+
+
+def backoff(attempts):
+    """Seconds to wait before retrying after ``attempts`` failed attempts."""
+    delay = min(BACKOFF_BASE * 2 ** (attempts - 1), BACKOFF_MAX)
+    # jittered so jobs that failed together do not retry together
+    return delay * random.uniform(0.5, 1)
+
+
+def _mark_running(job, worker_id, now):
+    # conditional, in case another worker got there first without row locks
+    # to stop it
+    return Job.objects.filter(pk=job.pk, status=Job.Status.QUEUED).update(
+        status=Job.Status.RUNNING, locked_by=worker_id, started_at=now,
+        heartbeat_at=now, attempts=F("attempts") + 1)
+
+
+def claim_job(worker_id):
+    """Mark the next due job as running for ``worker_id`` and return it."""
+    now = timezone.now()
+    due = (Job.objects.filter(status=Job.Status.QUEUED, run_at__lte=now)
+           .order_by("run_at", "pk"))
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            job = due.select_for_update(skip_locked=True).first()
+            claimed = job is not None and _mark_running(job, worker_id, now)
+    else:
+        # no row locks (SQLite): read outside a transaction, so there is no
+        # read lock to upgrade, which SQLite refuses at once if another
+        # connection is writing, and let the conditional UPDATE wait its
+        # turn on the busy timeout
+        job = due.first()
+        claimed = job is not None and _mark_running(job, worker_id, now)
+    if not claimed:
+        return None
+    job.status, job.locked_by, job.started_at = (
+        Job.Status.RUNNING, worker_id, now)
+    job.attempts += 1
+    return job
+
+
+def run_job(job):
+    """Run a claimed job and record the outcome; returns whether it succeeded."""
+    # only while it is still ours: if our heartbeat lapsed the job may have
+    # been requeued and claimed by another worker, whose outcome stands
+    mine = Job.objects.filter(
+        pk=job.pk, status=Job.Status.RUNNING, locked_by=job.locked_by)
+    started = time.perf_counter()
+    try:
+        func = TASKS.get(job.task)
+        if func is None:
+            raise LookupError(f"Unknown task {job.task!r}.")
+        func(*job.args, **job.kwargs)
+    except Exception:
+        duration = (time.perf_counter() - started) * 1000
+        error = traceback.format_exc()
+        if job.attempts < job.max_attempts:
+            delay = backoff(job.attempts)
+            mine.update(
+                status=Job.Status.QUEUED, locked_by="", last_error=error,
+                duration_ms=duration,
+                run_at=timezone.now() + timedelta(seconds=delay))
+            logger.warning("Job %s %s failed (attempt %s/%s), retrying in "
+                           "%.1fs", job.pk, job.task, job.attempts,
+                           job.max_attempts, delay)
+        else:
+            mine.update(
+                status=Job.Status.FAILED, locked_by="", last_error=error,
+                duration_ms=duration, finished_at=timezone.now())
+            logger.error("Job %s %s failed for good after %s attempts:\n%s",
+                         job.pk, job.task, job.attempts, error)
+        return False
+
+    duration = (time.perf_counter() - started) * 1000
+    mine.update(
+        status=Job.Status.DONE, locked_by="", last_error="",
+        duration_ms=duration, finished_at=timezone.now())
+    logger.info("Job %s %s done in %.1fms", job.pk, job.task, duration)
+    return True
+
+
+def heartbeat(worker_ids):
+    """Mark the jobs running on ``worker_ids`` as still alive."""
+    return Job.objects.filter(
+        status=Job.Status.RUNNING, locked_by__in=worker_ids,
+    ).update(heartbeat_at=timezone.now())
+
+
+def requeue_stale_jobs():
+    """
+    Give jobs whose worker died mid-run back to the queue, or fail them if
+    that was their last attempt. Returns how many were requeued or failed.
+    """
+    now = timezone.now()
+    stale = Job.objects.filter(
+        status=Job.Status.RUNNING, heartbeat_at__lt=now - LOCK_TIMEOUT)
+    error = "Worker lost while running the job."
+    # the lost run was counted as an attempt when it was claimed
+    failed = stale.filter(attempts__gte=F("max_attempts")).update(
+        status=Job.Status.FAILED, locked_by="", last_error=error,
+        finished_at=now)
+    requeued = stale.update(
+        status=Job.Status.QUEUED, locked_by="", last_error=error, run_at=now)
+    if failed or requeued:
+        logger.warning("Requeued %s and failed %s jobs of lost workers",
+                       requeued, failed)
+    return failed + requeued
+
+
+def run_pending(worker_id="inline"):
+    """Run due jobs in this thread until none is left; returns how many ran."""
+    ran = 0
+    while (job := claim_job(worker_id)) is not None:
+        run_job(job)
+        ran += 1
+    return ran
+
+
+def job_stats(since=None):
+    """Per-task counts and timings of the jobs finished since ``since``."""
+    jobs = Job.objects.filter(status__in=[Job.Status.DONE, Job.Status.FAILED])
+    if since is not None:
+        jobs = jobs.filter(finished_at__gte=since)
+    return list(jobs.values("task").annotate(
+        done=Count("pk", filter=Q(status=Job.Status.DONE)),
+        failed=Count("pk", filter=Q(status=Job.Status.FAILED)),
+        retries=Sum(F("attempts") - 1),
+        avg_ms=Avg("duration_ms"),
+        max_ms=Max("duration_ms"),
+    ).order_by("task"))
@@ -0,0 +1,145 @@
+import threading
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from .models import Job
+from .queue import (claim_job, enqueue, heartbeat, run_job, run_pending,
+                    requeue_stale_jobs, task)
+
+calls = []
+
+
+@task
+def record(value):
+    calls.append(value)
+
+
+@task(max_attempts=2)
+def explode():
+    raise RuntimeError("boom")
+
+
+class JobQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_enqueued_job_runs_once(self):
+        job = record.enqueue("a")
+        self.assertEqual(job.task, "jobs.tests.record")
+        self.assertEqual(run_pending(), 1)
+        self.assertEqual(calls, ["a"])
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.Status.DONE, 1))
+        self.assertIsNotNone(job.duration_ms)
+        self.assertEqual(run_pending(), 0)
+
+    def test_jobs_run_in_due_order(self):
+        record.enqueue("later")
+        enqueue(record.task_name, ["sooner"],
+                run_at=timezone.now() - timedelta(minutes=1))
+        enqueue(record.task_name, ["tomorrow"],
+                run_at=timezone.now() + timedelta(days=1))
+        run_pending()
+        self.assertEqual(calls, ["sooner", "later"])
+
+    def test_failures_are_retried_with_backoff_then_given_up(self):
+        job = explode.enqueue()
+        with self.assertLogs("jobs.queue", "WARNING"):
+            run_pending()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts),
+                         (Job.Status.QUEUED, 1))
+        self.assertGreater(job.run_at, timezone.now())
+        self.assertIn("RuntimeError: boom", job.last_error)
+
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        with self.assertLogs("jobs.queue", "ERROR"):
+            run_pending()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts),
+                         (Job.Status.FAILED, 2))
+
+    def test_unknown_task_is_rejected(self):
+        with self.assertRaises(LookupError):
+            enqueue("jobs.tests.missing")
+
+    def test_claimed_job_is_not_claimed_again(self):
+        record.enqueue("a")
+        self.assertIsNotNone(claim_job("w1"))
+        self.assertIsNone(claim_job("w2"))
+
+    def test_job_of_a_dead_worker_is_requeued(self):
+        job = record.enqueue("a")
+        claim_job("w1")
+        Job.objects.filter(pk=job.pk).update(
+            heartbeat_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(requeue_stale_jobs(), 1)
+        self.assertEqual(run_pending(), 1)
+
+    def test_slow_job_with_a_heartbeat_is_left_running(self):
+        job = record.enqueue("a")
+        claim_job("w1")
+        Job.objects.filter(pk=job.pk).update(
+            started_at=timezone.now() - timedelta(hours=1),
+            heartbeat_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(heartbeat(["w1"]), 1)
+        self.assertEqual(requeue_stale_jobs(), 0)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.Status.RUNNING)
+
+    def test_lost_job_does_not_overwrite_its_new_run(self):
+        job = record.enqueue("a")
+        stale = claim_job("w1")
+        Job.objects.filter(pk=job.pk).update(
+            heartbeat_at=timezone.now() - timedelta(hours=1))
+        requeue_stale_jobs()
+        claim_job("w2")
+        run_job(stale)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.locked_by),
+                         (Job.Status.RUNNING, "w2"))
+
+    def test_lost_runs_count_as_attempts(self):
+        job = explode.enqueue()
+        for _ in range(2):
+            claim_job("w1")
+            Job.objects.filter(pk=job.pk).update(
+                heartbeat_at=timezone.now() - timedelta(hours=1))
+            self.assertEqual(requeue_stale_jobs(), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.Status.FAILED, 2))
+        self.assertIsNone(claim_job("w1"))
+
+    @override_settings(JOBS_EAGER=True)
+    def test_eager_mode_runs_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertIsNone(record.enqueue("now"))
+            self.assertEqual(calls, [])
+        self.assertEqual(calls, ["now"])
+        self.assertFalse(Job.objects.exists())
+
+
+class RunWorkersTests(TransactionTestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_burst_drains_the_queue_across_threads(self):
+        for value in range(20):
+            record.enqueue(value)
+        out = StringIO()
+        crashed = []
+        # every thread must finish on its own, not die of an exception or
+        # get by on errors logged and skipped
+        with mock.patch.object(threading, "excepthook", crashed.append), \
+                self.assertNoLogs("jobs", level="ERROR"):
+            call_command("run_workers", "--threads", "4", "--burst",
+                         stdout=out)
+        self.assertEqual(crashed, [])
+        self.assertEqual(sorted(calls), list(range(20)))
+        self.assertEqual(
+            Job.objects.filter(status=Job.Status.DONE).count(), 20)
+        self.assertIn("jobs.tests.record: 20 done", out.getvalue())
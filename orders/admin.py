@@ -1,4 +1,4 @@
 from django.contrib import admin
-from .models import Cart, CartItem, Order, OrderItem
+from .models import Cart, CartItem, Order, OrderItem, Payout
 
-admin.site.register([Cart, CartItem, Order, OrderItem])
+admin.site.register([Cart, CartItem, Order, OrderItem, Payout])
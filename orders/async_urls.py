@@ -0,0 +1,6 @@
+from django.urls import path
+from .async_views import cart
+
+urlpatterns = [
+    path("cart/", cart, name="async-cart"),
+]
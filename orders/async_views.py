@@ -0,0 +1,18 @@
+"""Async version of the cart read; see products/async_views.py."""
+from accounts.authentication import CachedJWTAuthentication
+from core.async_api import async_api_view
+from core.serializers import optimize_queryset
+from .models import Cart
+from .serializers import CartSerializer
+
+
+@async_api_view(authentication=CachedJWTAuthentication, login_required=True)
+async def cart(request):
+    serializer = CartSerializer(context={"request": request})
+    carts = optimize_queryset(Cart.objects.all(), serializer)
+    cart, created = await carts.aget_or_create(user=request.user)
+    if created:
+        # a new cart has no prefetched items to serialize from
+        cart = await carts.aget(pk=cart.pk)
+    serializer.instance = cart
+    return serializer.data
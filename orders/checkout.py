@@ -0,0 +1,146 @@
+"""
+Checkout as a single atomic unit.
+
+The cart is loaded once with its products and variants, stock is reserved
+with one conditional UPDATE, and order lines are written with one bulk
+insert, so the number of queries does not grow with the number of lines.
+"""
+from collections import defaultdict
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.conf import settings
+from django.db.models import (Case, F, PositiveIntegerField, Value, When,
+                              prefetch_related_objects)
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+
+from core.transactions import write_atomic
+from products.cache import (PRODUCTS, bump_generation, bump_generations,
+                            product_namespace)
+from products.models import Product, ProductVariant
+from .models import Cart, CartItem, Order, OrderItem
+from .tasks import roll_up_orders
+
+
+class EmptyCart(Exception):
+    pass
+
+
+class InsufficientStock(Exception):
+    def __init__(self, variant_ids):
+        super().__init__(f"Insufficient stock for variants {variant_ids}.")
+        self.variant_ids = variant_ids
+
+
+def reserve_stock(items):
+    """
+    Decrement stock for every variant in ``items`` or raise InsufficientStock.
+    Returns the ids of the variants this sold out.
+
+    Rows are locked in primary-key order first, so concurrent checkouts over
+    overlapping variants queue up instead of deadlocking. The UPDATE repeats
+    the stock check itself, which keeps it correct on databases without row
+    locks (SQLite). Must run inside a transaction.
+    """
+    wanted = defaultdict(int)
+    for item in items:
+        if item.variant_id:
+            wanted[item.variant_id] += item.quantity
+    if not wanted:
+        return set()
+
+    ids = sorted(wanted)
+    locked = dict(ProductVariant.objects.select_for_update()
+                  .filter(pk__in=ids).order_by("pk")
+                  .values_list("pk", "stock"))
+    short = [pk for pk in ids if locked.get(pk, 0) < wanted[pk]]
+    if short:
+        raise InsufficientStock(short)
+
+    needed = Case(*[When(pk=pk, then=Value(qty)) for pk, qty in wanted.items()],
+                  output_field=PositiveIntegerField())
+    updated = ProductVariant.objects.filter(
+        pk__in=ids, stock__gte=needed).update(stock=F("stock") - needed)
+    if updated != len(ids):
+        raise InsufficientStock(ids)
+    return {pk for pk in ids if locked[pk] == wanted[pk]}
+
+
+def commission_rate(product):
+    """
+    The platform's cut of a sale of ``product``: the vendor's own rate, else
+    the product category's, else ``settings.DEFAULT_COMMISSION_RATE``.
+    """
+    category = product.category if product.category_id else None
+    for rate in (product.vendor.commission_rate,
+                 category and category.commission_rate):
+        if rate is not None:
+            return rate
+    return settings.DEFAULT_COMMISSION_RATE
+
+
+def _touch_products(product_ids, sold_out):
+    # stock is part of the cached, ETag-versioned product representation.
+    # Only these products' details are invalidated; listings only when a
+    # variant sold out, which changes what they contain (their stock
+    # figures may otherwise lag by up to the cache timeout).
+    Product.objects.filter(pk__in=product_ids).update(
+        updated_at=timezone.now())
+    bump_generations(product_namespace(pk) for pk in product_ids)
+    if sold_out:
+        bump_generation(PRODUCTS)
+
+
+@write_atomic()
+def checkout_cart(user):
+    """
+    Turn ``user``'s cart into one paid order per vendor and empty the cart.
+
+    Orders and their lines are each written with a single bulk insert, so a
+    cart spanning many vendors costs the same number of round-trips as one.
+    """
+    cart = get_object_or_404(Cart, user=user)
+    items = list(cart.items.select_related(
+        "product__vendor", "product__category", "variant"))
+    if not items:
+        raise EmptyCart()
+
+    sold_out = reserve_stock(items)
+
+    by_vendor = defaultdict(list)
+    for item in items:
+        by_vendor[item.product.vendor_id].append(item)
+
+    orders = []
+    for vendor_id, vendor_items in by_vendor.items():
+        total = sum((item.product.price * item.quantity
+                     for item in vendor_items), Decimal(0))
+        commission = sum((item.product.price * item.quantity
+                          * commission_rate(item.product)
+                          for item in vendor_items), Decimal(0))
+        orders.append(Order(
+            user=user,
+            vendor_id=vendor_id,
+            total_price=total,
+            commission=commission.quantize(Decimal("0.01"), ROUND_HALF_UP),
+            status="paid",  # simulate instant payment success
+        ))
+    Order.objects.bulk_create(orders)
+
+    OrderItem.objects.bulk_create([
+        OrderItem(order=order, product=item.product, variant=item.variant,
+                  quantity=item.quantity, price=item.product.price)
+        for order in orders
+        for item in by_vendor[order.vendor_id]
+    ])
+    # analytics can lag a little; keep the rollups off the checkout path
+    roll_up_orders.enqueue([order.pk for order in orders])
+
+    # only the lines checked out; anything added meanwhile stays in the cart
+    CartItem.objects.filter(pk__in=[item.pk for item in items]).delete()
+    if any(item.variant_id for item in items):
+        _touch_products({item.product_id for item in items}, sold_out)
+    # load lines for the response while still inside the transaction, so
+    # nothing can fail once the checkout has committed
+    prefetch_related_objects(orders, "items")
+    return orders
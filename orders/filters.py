@@ -0,0 +1,36 @@
+from rest_framework import serializers
+from rest_framework.filters import BaseFilterBackend
+
+from .models import Order
+
+
+class OrderFilterSerializer(serializers.Serializer):
+    """Validates the order list filter query parameters."""
+    status = serializers.ChoiceField(
+        choices=Order.STATUS_CHOICES, required=False)
+    created_after = serializers.DateTimeField(required=False)
+    created_before = serializers.DateTimeField(required=False)
+
+    def validate(self, attrs):
+        after, before = attrs.get("created_after"), attrs.get("created_before")
+        if after and before and after > before:
+            raise serializers.ValidationError(
+                {"created_before": "Must be later than created_after."})
+        return attrs
+
+
+class OrderFilterBackend(BaseFilterBackend):
+    """``status`` and a half-open ``created_after``/``created_before`` range."""
+
+    def filter_queryset(self, request, queryset, view):
+        serializer = OrderFilterSerializer(data=request.query_params.dict())
+        serializer.is_valid(raise_exception=True)
+        filters = serializer.validated_data
+
+        if "status" in filters:
+            queryset = queryset.filter(status=filters["status"])
+        if "created_after" in filters:
+            queryset = queryset.filter(created_at__gte=filters["created_after"])
+        if "created_before" in filters:
+            queryset = queryset.filter(created_at__lt=filters["created_before"])
+        return queryset
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from orders.rollups import rebuild_rollups, reset_rollups
+
+
+class Command(BaseCommand):
+    help = ("Fold paid orders that are not yet counted into the daily sales "
+            "rollups; safe to interrupt and re-run")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=1000)
+        parser.add_argument(
+            "--reset", action="store_true",
+            help="Empty the rollups and recount every paid order")
+
+    def handle(self, *args, **options):
+        if options["reset"]:
+            reset_rollups()
+        counted = rebuild_rollups(
+            chunk_size=options["chunk_size"],
+            progress=lambda n: self.stdout.write(f"{n} orders counted..."))
+        self.stdout.write(self.style.SUCCESS(
+            f"Sales rollups updated with {counted} orders."))
@@ -0,0 +1,48 @@
+from datetime import datetime, time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from orders.settlement import settle_payouts
+
+
+class Command(BaseCommand):
+    help = ("Settle unsettled paid orders into one pending payout per "
+            "vendor; safe to interrupt and re-run")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--until",
+            help="Settle orders created before this date or datetime "
+                 "(default: now)")
+        parser.add_argument("--chunk-size", type=int, default=5000)
+
+    def parse_until(self, value):
+        if value is None:
+            return None
+        until = parse_datetime(value)
+        if until is None:
+            day = parse_date(value)
+            until = day and datetime.combine(day, time.min)
+        if until is None:
+            raise CommandError(f"Invalid --until value: {value!r}")
+        if timezone.is_naive(until):
+            until = timezone.make_aware(until)
+        return until
+
+    def handle(self, *args, **options):
+        def progress(payout, assigned):
+            self.stdout.write(
+                f"payout {payout.pk}: {assigned} orders assigned")
+
+        payouts = settle_payouts(
+            until=self.parse_until(options["until"]),
+            chunk_size=options["chunk_size"],
+            progress=progress if options["verbosity"] > 1 else None)
+        for payout in payouts:
+            self.stdout.write(
+                f"{payout.vendor}: {payout.order_count} orders, "
+                f"gross {payout.gross}, commission {payout.commission}, "
+                f"net {payout.net}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Settled {len(payouts)} payouts."))
@@ -0,0 +1,55 @@
+import logging
+
+from django.core.management.base import BaseCommand
+from orders.stress import cleanup, run_checkout_stress, seed_contended_variant
+
+
+class Command(BaseCommand):
+    help = "Race concurrent checkouts for one low-stock variant and report"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--buyers", type=int, default=200)
+        parser.add_argument("--stock", type=int, default=20)
+        parser.add_argument("--quantity", type=int, default=1,
+                            help="Units of the variant in each cart")
+        parser.add_argument("--workers", type=int, default=16)
+        parser.add_argument("--max-retries", type=int, default=10)
+        parser.add_argument("--keep", action="store_true",
+                            help="Keep the seeded users, carts and orders")
+
+    def handle(self, *args, **options):
+        # every sold-out checkout would otherwise log a 409 warning
+        logging.getLogger("django.request").setLevel(logging.ERROR)
+        variant, users = seed_contended_variant(
+            options["buyers"], options["stock"], options["quantity"])
+        try:
+            report = run_checkout_stress(
+                variant, users, workers=options["workers"],
+                max_retries=options["max_retries"])
+        finally:
+            if not options["keep"]:
+                cleanup(variant, users)
+
+        self.stdout.write(
+            f"{report['requests']} checkouts on {report['vendor']} with "
+            f"{report['workers']} workers in {report['wall_seconds']:.2f}s "
+            f"({report['throughput']:.1f}/s)")
+        self.stdout.write(
+            f"latency p50 {report['p50_ms']:.1f} ms, "
+            f"p99 {report['p99_ms']:.1f} ms")
+        self.stdout.write(
+            f"succeeded {report['succeeded']}, sold out {report['sold_out']}, "
+            f"failed {report['failed']}")
+        self.stdout.write(
+            f"retries {report['retries']} (deadlocks {report['deadlocks']}, "
+            f"lock timeouts {report['lock_timeouts']})")
+        self.stdout.write(
+            f"stock {report['initial_stock']} -> {report['final_stock']}, "
+            f"units sold {report['units_sold']}")
+
+        if report["oversold"] or not report["consistent"]:
+            self.stdout.write(self.style.ERROR(
+                f"OVERSOLD by {report['oversold']} units "
+                f"(consistent={report['consistent']})"))
+        else:
+            self.stdout.write(self.style.SUCCESS("No oversell."))
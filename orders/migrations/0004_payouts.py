@@ -0,0 +1,46 @@
+# Generated by Django 5.2 on 2026-10-17 19:06
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_vendorprofile_commission_rate'),
+        ('orders', '0003_sales_rollups'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Payout',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period_end', models.DateTimeField()),
+                ('status', models.CharField(choices=[('open', 'Open'), ('pending', 'Pending'), ('paid', 'Paid')], default='open', max_length=20)),
+                ('order_count', models.PositiveIntegerField(default=0)),
+                ('gross', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('commission', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('net', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('paid_at', models.DateTimeField(blank=True, null=True)),
+                ('vendor', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='payouts', to='accounts.vendorprofile')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='payout',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='orders', to='orders.payout'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(condition=models.Q(('payout__isnull', True)), fields=['vendor', 'id'], name='order_unsettled_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='payout',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'open')), fields=('vendor',), name='one_open_payout_per_vendor'),
+        ),
+    ]
@@ -46,6 +46,41 @@ class Order(models.Model):
     commission = models.DecimalField(
         max_digits=10, decimal_places=2, default=Decimal("0.00"))  # platform cut
     created_at = models.DateTimeField(auto_now_add=True)
+    # set once the order has been counted in the daily sales rollups
+    rolled_up = models.BooleanField(default=False, editable=False)
+    # the vendor payout that settled this order, if any
+    payout = models.ForeignKey(
+        "Payout", on_delete=models.PROTECT, null=True, blank=True,
+        editable=False, related_name="orders")
+
+    class Meta:
+        indexes = [
+            # one per OrderListView audience: vendors, customers, admins
+            models.Index(fields=["vendor", "created_at"],
+                         name="order_vendor_created_idx"),
+            models.Index(fields=["user", "created_at"],
+                         name="order_user_created_idx"),
+            models.Index(fields=["status", "created_at"],
+                         name="order_status_created_idx"),
+            # only the orders still waiting for settlement
+            models.Index(fields=["vendor", "id"],
+                         condition=models.Q(payout__isnull=True),
+                         name="order_unsettled_idx"),
+        ]
+
+    # maintained by rollups.py and settlement.py with queryset updates, from
+    # jobs and commands that never see loaded instances
+    BACKGROUND_FIELDS = ("rolled_up", "payout")
+
+    def save(self, *args, **kwargs):
+        # an instance loaded before a background update must not write the
+        # stale values back, or the order would be counted twice
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.BACKGROUND_FIELDS]
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"Order {self.id} by {self.user.username} - {self.status}"
@@ -63,3 +98,90 @@ class OrderItem(models.Model):
 
     def __str__(self):
         return f"{self.product.name} x {self.quantity}"
+
+
+class VendorDailySales(models.Model):
+    """Paid-order totals per vendor and day, maintained by rollups.py."""
+    vendor = models.ForeignKey(
+        VendorProfile, on_delete=models.CASCADE, related_name="daily_sales")
+    day = models.DateField()
+    orders = models.PositiveIntegerField(default=0)
+    units = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(
+        max_digits=14, decimal_places=2, default=Decimal("0.00"))
+    commission = models.DecimalField(
+        max_digits=14, decimal_places=2, default=Decimal("0.00"))
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["vendor", "day"], name="unique_vendor_day_sales"),
+        ]
+
+    def __str__(self):
+        return f"{self.vendor_id} on {self.day}: {self.revenue}"
+
+
+class ProductDailySales(models.Model):
+    """Paid-order totals per product and day, maintained by rollups.py."""
+    product = models.ForeignKey(
+        Product, on_delete=models.CASCADE, related_name="daily_sales")
+    vendor = models.ForeignKey(
+        VendorProfile, on_delete=models.CASCADE,
+        related_name="product_daily_sales")
+    day = models.DateField()
+    units = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(
+        max_digits=14, decimal_places=2, default=Decimal("0.00"))
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["product", "day"], name="unique_product_day_sales"),
+        ]
+        indexes = [
+            models.Index(fields=["vendor", "day"],
+                         name="product_sales_vendor_day_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} on {self.day}: {self.units}"
+
+
+class Payout(models.Model):
+    """
+    What the platform owes a vendor for the orders settled into it: their
+    gross takings minus commission. Filled in chunks by settlement.py while
+    ``open``; each vendor has at most one open payout at a time.
+    """
+    STATUS_CHOICES = [
+        ("open", "Open"),  # settlement still assigning orders
+        ("pending", "Pending"),  # settled, waiting to be paid out
+        ("paid", "Paid"),
+    ]
+
+    vendor = models.ForeignKey(
+        VendorProfile, on_delete=models.PROTECT, related_name="payouts")
+    # orders created before this moment are included
+    period_end = models.DateTimeField()
+    status = models.CharField(
+        max_length=20, choices=STATUS_CHOICES, default="open")
+    order_count = models.PositiveIntegerField(default=0)
+    gross = models.DecimalField(
+        max_digits=14, decimal_places=2, default=Decimal("0.00"))
+    commission = models.DecimalField(
+        max_digits=14, decimal_places=2, default=Decimal("0.00"))
+    net = models.DecimalField(
+        max_digits=14, decimal_places=2, default=Decimal("0.00"))
+    created_at = models.DateTimeField(auto_now_add=True)
+    paid_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["vendor"], condition=models.Q(status="open"),
+                name="one_open_payout_per_vendor"),
+        ]
+
+    def __str__(self):
+        return f"Payout {self.pk} to {self.vendor_id}: {self.net}"
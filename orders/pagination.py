@@ -0,0 +1,14 @@
+from rest_framework.pagination import CursorPagination
+
+
+class OrderCursorPagination(CursorPagination):
+    """
+    Keyset pagination for order dashboards, newest first.
+
+    Each page is a range scan on the (vendor|user|status, created_at)
+    indexes, so deep pages cost the same as the first one.
+    """
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    ordering = ("-created_at", "-id")
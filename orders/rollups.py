@@ -0,0 +1,148 @@
+"""
+Incrementally maintained daily sales rollups.
+
+Each paid order is folded into ``VendorDailySales`` and ``ProductDailySales``
+exactly once (``Order.rolled_up`` records that it was), and taken back out
+if it is cancelled afterwards. A batch of orders is aggregated in the
+database and merged into the rollups with multi-row ``INSERT ... ON CONFLICT
+DO UPDATE`` statements, which PostgreSQL and SQLite both support, as large as
+the database's parameter limit allows. Cancellations, which are rare, are
+subtracted one rollup row at a time. Analytics read only these tables.
+"""
+from django.db import connection, transaction
+from django.db.models import Count, DecimalField, F, Q, Sum
+from django.db.models.functions import TruncDate
+
+from .models import Order, OrderItem, ProductDailySales, VendorDailySales
+
+# statuses an order can only reach after it has been paid for
+PAID_STATUSES = ("paid", "shipped", "delivered")
+CANCELLED = "cancelled"
+
+# orders the rollups are out of date for: paid but not counted yet, or
+# counted and cancelled since
+NEEDS_ROLLUP = (Q(rolled_up=False, status__in=PAID_STATUSES)
+                | Q(rolled_up=True, status=CANCELLED))
+
+# bind parameters PostgreSQL accepts in one statement
+MAX_QUERY_PARAMS = 65535
+
+
+def _merge(model, rows, key_columns, total_columns):
+    """
+    Upsert ``rows`` (dicts) into ``model``: new keys are inserted, existing
+    ones have ``total_columns`` added to what is already stored.
+    """
+    if not rows:
+        return
+    table = connection.ops.quote_name(model._meta.db_table)
+    columns = list(rows[0])
+    # bulk_batch_size leaves PostgreSQL unbounded; its protocol is not
+    batch_size = max(min(connection.ops.bulk_batch_size(columns, rows),
+                         MAX_QUERY_PARAMS // len(columns)), 1)
+    updates = ", ".join(
+        f"{column} = {table}.{column} + excluded.{column}"
+        for column in total_columns)
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start:start + batch_size]
+            placeholders = ", ".join(
+                "(" + ", ".join(["%s"] * len(columns)) + ")" for _ in batch)
+            cursor.execute(
+                f"INSERT INTO {table} ({', '.join(columns)}) "
+                f"VALUES {placeholders} "
+                f"ON CONFLICT ({', '.join(key_columns)}) "
+                f"DO UPDATE SET {updates}",
+                [row[column] for row in batch for column in columns])
+
+
+def _subtract(model, rows, key_columns, total_columns):
+    """Take ``rows`` back out of the (existing) rollup rows they were added
+    to. An upsert would not do: the inserted values must be positive."""
+    for row in rows:
+        model.objects.filter(
+            **{column: row[column] for column in key_columns}
+        ).update(**{column: F(column) - row[column]
+                    for column in total_columns})
+
+
+def _fold(order_ids, merge):
+    """Aggregate ``order_ids`` by day and ``merge`` them into the rollups."""
+    vendor_days = {
+        (row["vendor_id"], row["day"]): {**row, "units": 0}
+        for row in (Order.objects.filter(pk__in=order_ids)
+                    .annotate(day=TruncDate("created_at"))
+                    .values("vendor_id", "day")
+                    .annotate(orders=Count("id"),
+                              revenue=Sum("total_price"),
+                              commission=Sum("commission"))
+                    .order_by())
+    }
+    product_days = list(
+        OrderItem.objects.filter(order_id__in=order_ids)
+        .annotate(vendor_id=F("order__vendor_id"),
+                  day=TruncDate("order__created_at"))
+        .values("product_id", "vendor_id", "day")
+        .annotate(units=Sum("quantity"),
+                  revenue=Sum(F("price") * F("quantity"),
+                              output_field=DecimalField(
+                                  max_digits=14, decimal_places=2)))
+        .order_by())
+    for row in product_days:
+        vendor_days[(row["vendor_id"], row["day"])]["units"] += row["units"]
+
+    merge(VendorDailySales, list(vendor_days.values()),
+          ["vendor_id", "day"], ["orders", "units", "revenue", "commission"])
+    merge(ProductDailySales, product_days,
+          ["product_id", "day"], ["units", "revenue"])
+
+
+@transaction.atomic
+def apply_rollups(order_ids):
+    """
+    Fold the paid, not yet rolled-up orders among ``order_ids`` into the
+    rollups, and take the rolled-up ones that were cancelled since back
+    out. Safe to call repeatedly with the same ids; returns how many orders
+    were counted or taken out.
+    """
+    claimed = list(Order.objects.select_for_update()
+                   .filter(NEEDS_ROLLUP, pk__in=order_ids)
+                   .values_list("pk", "rolled_up"))
+    added = [pk for pk, rolled_up in claimed if not rolled_up]
+    removed = [pk for pk, rolled_up in claimed if rolled_up]
+    if added:
+        _fold(added, _merge)
+        Order.objects.filter(pk__in=added).update(rolled_up=True)
+    if removed:
+        _fold(removed, _subtract)
+        Order.objects.filter(pk__in=removed).update(rolled_up=False)
+    return len(claimed)
+
+
+@transaction.atomic
+def reset_rollups():
+    """Empty the rollups and mark every order as not yet counted."""
+    VendorDailySales.objects.all().delete()
+    ProductDailySales.objects.all().delete()
+    Order.objects.filter(rolled_up=True).update(rolled_up=False)
+
+
+def rebuild_rollups(chunk_size=1000, progress=None):
+    """
+    Fold every outstanding paid (or cancelled) order into the rollups,
+    ``chunk_size`` at a time. Each chunk commits on its own, so an interrupted run resumes where
+    it stopped. Returns the number of orders counted.
+    """
+    total = 0
+    last_id = 0
+    while True:
+        ids = list(Order.objects
+                   .filter(NEEDS_ROLLUP, pk__gt=last_id)
+                   .order_by("pk")
+                   .values_list("pk", flat=True)[:chunk_size])
+        if not ids:
+            return total
+        total += apply_rollups(ids)
+        last_id = ids[-1]
+        if progress:
+            progress(total)
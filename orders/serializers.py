@@ -1,14 +1,22 @@
+from datetime import timedelta
+
+from django.utils import timezone
 from rest_framework import serializers
-from .models import Cart, CartItem, Order, OrderItem
+from accounts.serializers import VendorProfileSerializer
+from core.serializers import SparseFieldsMixin
+from products.serializers import ProductSerializer, ProductVariantSerializer
+from .models import Cart, CartItem, Order, OrderItem, VendorDailySales
 
 
-class CartItemSerializer(serializers.ModelSerializer):
+class CartItemSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = CartItem
         fields = ["id", "product", "variant", "quantity"]
+        expandable_fields = {"product": ProductSerializer,
+                             "variant": ProductVariantSerializer}
 
 
-class CartSerializer(serializers.ModelSerializer):
+class CartSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     items = CartItemSerializer(many=True, read_only=True)
 
     class Meta:
@@ -17,13 +25,15 @@ class CartSerializer(serializers.ModelSerializer):
         read_only_fields = ["user"]
 
 
-class OrderItemSerializer(serializers.ModelSerializer):
+class OrderItemSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = OrderItem
         fields = ["id", "product", "variant", "quantity", "price"]
+        expandable_fields = {"product": ProductSerializer,
+                             "variant": ProductVariantSerializer}
 
 
-class OrderSerializer(serializers.ModelSerializer):
+class OrderSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     items = OrderItemSerializer(many=True, read_only=True)
 
     class Meta:
@@ -31,3 +41,29 @@ class OrderSerializer(serializers.ModelSerializer):
         fields = ["id", "user", "vendor", "total_price",
                   "commission", "status", "items", "created_at"]
         read_only_fields = ["user", "commission", "status", "created_at"]
+        expandable_fields = {"vendor": VendorProfileSerializer}
+
+
+class SalesAnalyticsQuerySerializer(serializers.Serializer):
+    """An inclusive ``start``/``end`` day range, the last 30 days by default."""
+    MAX_DAYS = 366
+
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+
+    def validate(self, attrs):
+        end = attrs.get("end") or timezone.localdate()
+        start = attrs.get("start") or end - timedelta(days=29)
+        if start > end:
+            raise serializers.ValidationError(
+                {"end": "Must be on or after start."})
+        if (end - start).days >= self.MAX_DAYS:
+            raise serializers.ValidationError(
+                {"start": f"Range may span at most {self.MAX_DAYS} days."})
+        return {"start": start, "end": end}
+
+
+class VendorDailySalesSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = VendorDailySales
+        fields = ["day", "orders", "units", "revenue", "commission"]
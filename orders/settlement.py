@@ -0,0 +1,87 @@
+"""
+Batch settlement of vendor payouts.
+
+Every paid order that is not yet settled and was created before the cut-off
+is assigned to one ``Payout`` per vendor, ``chunk_size`` orders per UPDATE
+statement; the payout's totals are then computed with a single aggregate,
+after detaching any order cancelled since it was assigned.
+Nothing proportional to the number of orders is held in memory. Each chunk
+commits on its own and an interrupted payout stays ``open``, so re-running
+the settlement picks up exactly where it stopped.
+"""
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from .models import Order, Payout
+from .rollups import PAID_STATUSES
+
+
+def unsettled_orders(vendor_id, until):
+    return Order.objects.filter(
+        vendor_id=vendor_id, payout__isnull=True,
+        status__in=PAID_STATUSES, created_at__lt=until)
+
+
+def _assign_orders(payout, chunk_size, progress=None):
+    eligible = unsettled_orders(payout.vendor_id, payout.period_end)
+    while True:
+        chunk = eligible.order_by("pk").values("pk")[:chunk_size]
+        assigned = Order.objects.filter(pk__in=chunk).update(payout=payout)
+        if progress and assigned:
+            progress(payout, assigned)
+        if assigned < chunk_size:
+            return
+
+
+@transaction.atomic
+def _close(payout):
+    # orders cancelled since they were assigned are not paid out; they go
+    # back to being unsettled, with nothing left to settle
+    Order.objects.filter(payout=payout).exclude(
+        status__in=PAID_STATUSES).update(payout=None)
+    totals = Order.objects.filter(payout=payout).aggregate(
+        order_count=Count("id"), gross=Sum("total_price"),
+        commission=Sum("commission"))
+    if not totals["order_count"]:
+        # everything it was opened for got cancelled in the meantime
+        payout.delete()
+        return None
+    Payout.objects.filter(pk=payout.pk).update(
+        **totals, net=totals["gross"] - totals["commission"],
+        status="pending")
+    payout.refresh_from_db()
+    return payout
+
+
+def settle_payouts(until=None, chunk_size=5000, progress=None):
+    """
+    Settle every vendor's unsettled paid orders created before ``until``
+    (default: now) into pending payouts; returns the payouts closed.
+
+    Open payouts left by an interrupted run are finished first, with their
+    original cut-off.
+    """
+    until = until or timezone.now()
+    closed = []
+
+    for payout in Payout.objects.filter(status="open").order_by("pk"):
+        _assign_orders(payout, chunk_size, progress)
+        closed.append(_close(payout))
+
+    last_vendor = 0
+    while True:
+        vendor_id = (Order.objects
+                     .filter(vendor_id__gt=last_vendor, payout__isnull=True,
+                             status__in=PAID_STATUSES, created_at__lt=until)
+                     .order_by("vendor_id")
+                     .values_list("vendor_id", flat=True)
+                     .first())
+        if vendor_id is None:
+            break
+        payout = Payout.objects.create(vendor_id=vendor_id, period_end=until)
+        _assign_orders(payout, chunk_size, progress)
+        closed.append(_close(payout))
+        last_vendor = vendor_id
+
+    return [payout for payout in closed if payout is not None]
@@ -0,0 +1,19 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .models import Order
+from .rollups import CANCELLED, PAID_STATUSES
+from .tasks import roll_up_orders
+
+
+@receiver(post_save, sender=Order)
+def roll_up_paid_order(sender, instance, created, **kwargs):
+    # checkout queues its own orders; this catches orders that become paid
+    # later (e.g. in the admin), or are cancelled after being counted. The
+    # job runs after commit, so lines saved after the order in the same
+    # transaction are counted too. ``rolled_up`` is set in the background
+    # and may be stale here, so every cancellation is queued and the job
+    # checks the stored value.
+    if ((instance.status in PAID_STATUSES and not instance.rolled_up)
+            or (instance.status == CANCELLED and not created)):
+        roll_up_orders.enqueue([instance.pk])
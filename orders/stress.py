@@ -0,0 +1,143 @@
+"""
+Concurrency stress harness for checkout.
+
+Seeds one hot variant with little stock and many buyers who each hold it in
+their cart, then drives CheckoutView from a pool of threads against the
+configured database (each thread holds its own connection, like a worker
+process would), through checkout exactly as it runs in production. Lock
+timeouts and deadlocks surface as OperationalError and are retried with
+jittered backoff; every outcome is counted so oversell or lost orders show
+up in the report.
+"""
+import queue
+import random
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.db import OperationalError, connections
+from django.db.models import Sum
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from accounts.models import User, VendorProfile
+from benchmarks.runner import percentile
+from products.models import Product, ProductVariant
+from .models import Cart, CartItem, OrderItem
+
+
+def seed_contended_variant(buyers, stock, quantity=1):
+    """Create a variant with ``stock`` units and ``buyers`` carts holding it."""
+    tag = uuid.uuid4().hex[:8]
+    password = make_password(None)
+    vendor_user = User.objects.create(
+        username=f"stress-{tag}-vendor", password=password,
+        role=User.Roles.VENDOR)
+    vendor = VendorProfile.objects.create(user=vendor_user, verified=True)
+    product = Product.objects.create(
+        vendor=vendor, name=f"Stress {tag}", price="10.00", is_active=True)
+    variant = ProductVariant.objects.create(
+        product=product, size="M", stock=stock)
+
+    users = User.objects.bulk_create([
+        User(username=f"stress-{tag}-{i}", password=password)
+        for i in range(buyers)
+    ])
+    carts = Cart.objects.bulk_create([Cart(user=user) for user in users])
+    CartItem.objects.bulk_create([
+        CartItem(cart=cart, product=product, variant=variant,
+                 quantity=quantity)
+        for cart in carts
+    ])
+    return variant, users
+
+
+def cleanup(variant, users):
+    # buyers first: Order.vendor is PROTECT
+    User.objects.filter(pk__in=[user.pk for user in users]).delete()
+    variant.product.vendor.user.delete()
+
+
+def run_checkout_stress(variant, users, workers=8, max_retries=10):
+    """Race every user's checkout for ``variant``; returns a report dict."""
+    initial_stock = variant.stock
+    pending = queue.Queue()
+    for user in users:
+        pending.put(user)
+
+    lock = threading.Lock()
+    results = {"succeeded": 0, "sold_out": 0, "failed": 0,
+               "retries": 0, "deadlocks": 0, "lock_timeouts": 0}
+    latencies = []
+
+    def checkout(client):
+        retries = 0
+        while True:
+            try:
+                return client.post(reverse("checkout")).status_code, retries
+            except OperationalError as exc:
+                message = str(exc).lower()
+                with lock:
+                    if "deadlock" in message:
+                        results["deadlocks"] += 1
+                    else:
+                        results["lock_timeouts"] += 1
+                if retries >= max_retries:
+                    return None, retries
+                retries += 1
+                time.sleep(random.uniform(0, 0.005 * 2 ** retries))
+
+    def worker():
+        client = APIClient()
+        try:
+            while True:
+                try:
+                    user = pending.get_nowait()
+                except queue.Empty:
+                    return
+                client.force_authenticate(user)
+                started = time.perf_counter()
+                status, retries = checkout(client)
+                elapsed = time.perf_counter() - started
+                outcome = {201: "succeeded", 409: "sold_out"}.get(
+                    status, "failed")
+                with lock:
+                    results[outcome] += 1
+                    results["retries"] += retries
+                    latencies.append(elapsed)
+        finally:
+            connections.close_all()
+
+    threads = [threading.Thread(target=worker) for _ in range(workers)]
+    # the test client's host, which is only allowed under the test runner
+    with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]):
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall = time.perf_counter() - started
+
+    variant.refresh_from_db()
+    sold = OrderItem.objects.filter(variant=variant).aggregate(
+        units=Sum("quantity"))["units"] or 0
+    latencies.sort()
+    return {
+        **results,
+        "requests": len(latencies),
+        "workers": workers,
+        "vendor": connections[variant._state.db].vendor,
+        "initial_stock": initial_stock,
+        "final_stock": variant.stock,
+        "units_sold": sold,
+        "oversold": max(sold - initial_stock, 0),
+        "consistent": sold + variant.stock == initial_stock,
+        "wall_seconds": wall,
+        "throughput": len(latencies) / wall if wall else 0.0,
+        # the benchmarks' percentiles, so the two reports compare
+        "p50_ms": percentile(latencies, 50) * 1000 if latencies else 0.0,
+        "p99_ms": percentile(latencies, 99) * 1000 if latencies else 0.0,
+    }
@@ -0,0 +1,7 @@
+from jobs.queue import task
+from .rollups import apply_rollups
+
+
+@task
+def roll_up_orders(order_ids):
+    apply_rollups(order_ids)
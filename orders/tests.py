@@ -1,3 +1,601 @@
-from django.test import TestCase
+from datetime import timedelta
+from decimal import Decimal
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection, connections
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase, APITransactionTestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+from accounts.models import User, VendorProfile
+from core.throttling import bucket_store
+from jobs.queue import run_pending
+from products.models import Category, Product, ProductVariant
+from .models import (Cart, CartItem, Order, OrderItem, Payout,
+                     ProductDailySales, VendorDailySales)
+from .rollups import rebuild_rollups, reset_rollups
+from .settlement import settle_payouts
+from .stress import run_checkout_stress, seed_contended_variant
 
-# Create your tests here.
+
+class CheckoutTestMixin:
+    """Shared fixtures for the cart and checkout tests."""
+
+    def make_vendor(self, username="vendor"):
+        user = User.objects.create_user(
+            username=username, password="pass12345", role=User.Roles.VENDOR)
+        return VendorProfile.objects.create(user=user, verified=True)
+
+    def make_variant(self, vendor, price="10.00", stock=5, name="Shirt"):
+        product = Product.objects.create(
+            vendor=vendor, name=name, price=price, is_active=True)
+        return ProductVariant.objects.create(
+            product=product, size="M", stock=stock)
+
+    def setUp(self):
+        # test users reuse primary keys, and with them checkout buckets
+        bucket_store().clear()
+
+    def add_to_cart(self, user, variant, quantity=1):
+        cart, _ = Cart.objects.get_or_create(user=user)
+        return CartItem.objects.create(
+            cart=cart, product=variant.product, variant=variant,
+            quantity=quantity)
+
+
+class CheckoutTests(CheckoutTestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.customer = User.objects.create_user(
+            username="buyer", password="pass12345")
+        self.vendor = self.make_vendor()
+        self.client.force_authenticate(self.customer)
+
+    def test_checkout_keeps_listings_cached_until_something_sells_out(self):
+        caches["catalog"].clear()
+        shirt = self.make_variant(self.vendor, stock=3)
+        list_url = reverse("product-list")
+        detail_url = reverse("product-detail", args=[shirt.product_id])
+
+        def stock(url):
+            data = self.client.get(url).data
+            product = data["results"][0] if "results" in data else data
+            return product["variants"][0]["stock"]
+
+        self.assertEqual((stock(list_url), stock(detail_url)), (3, 3))
+        self.add_to_cart(self.customer, shirt)
+        self.client.post(reverse("checkout"))
+        # the detail is refreshed; the listing is still served from cache
+        self.assertEqual((stock(list_url), stock(detail_url)), (3, 2))
+
+        self.add_to_cart(self.customer, shirt, quantity=2)
+        self.client.post(reverse("checkout"))
+        self.assertEqual((stock(list_url), stock(detail_url)), (0, 0))
+
+    def test_checkout_creates_order_and_decrements_stock(self):
+        shirt = self.make_variant(self.vendor, price="10.00", stock=5)
+        hat = self.make_variant(self.vendor, price="4.50", stock=1, name="Hat")
+        self.add_to_cart(self.customer, shirt, quantity=2)
+        self.add_to_cart(self.customer, hat)
+
+        response = self.client.post(reverse("checkout"))
+        self.assertEqual(response.status_code, 201)
+        order, = response.data
+        self.assertEqual(Decimal(order["total_price"]), Decimal("24.50"))
+        self.assertEqual(len(order["items"]), 2)
+
+        shirt.refresh_from_db()
+        hat.refresh_from_db()
+        self.assertEqual((shirt.stock, hat.stock), (3, 0))
+        self.assertFalse(CartItem.objects.exists())
+
+    def test_insufficient_stock_rolls_everything_back(self):
+        shirt = self.make_variant(self.vendor, stock=5)
+        hat = self.make_variant(self.vendor, stock=1, name="Hat")
+        self.add_to_cart(self.customer, shirt, quantity=2)
+        self.add_to_cart(self.customer, hat, quantity=2)
+
+        response = self.client.post(reverse("checkout"))
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data["variants"], [hat.pk])
+
+        shirt.refresh_from_db()
+        self.assertEqual(shirt.stock, 5)
+        self.assertFalse(Order.objects.exists())
+        self.assertEqual(CartItem.objects.count(), 2)
+
+    def test_empty_cart(self):
+        Cart.objects.create(user=self.customer)
+        response = self.client.post(reverse("checkout"))
+        self.assertEqual(response.status_code, 400)
+
+    def test_mixed_cart_is_split_into_one_order_per_vendor(self):
+        other = self.make_vendor("other")
+        self.add_to_cart(self.customer,
+                         self.make_variant(self.vendor, price="10.00"), 3)
+        self.add_to_cart(self.customer,
+                         self.make_variant(other, price="5.00"))
+        self.add_to_cart(self.customer,
+                         self.make_variant(other, price="7.00"), 2)
+
+        response = self.client.post(reverse("checkout"))
+        self.assertEqual(response.status_code, 201)
+        totals = {order["vendor"]: (Decimal(order["total_price"]),
+                                    Decimal(order["commission"]),
+                                    len(order["items"]))
+                  for order in response.data}
+        self.assertEqual(totals, {
+            self.vendor.pk: (Decimal("30.00"), Decimal("3.00"), 1),
+            other.pk: (Decimal("19.00"), Decimal("1.90"), 2),
+        })
+
+    def test_query_count_does_not_grow_with_cart_lines_or_vendors(self):
+        counts = []
+        for lines in (1, 30):
+            vendors = [self.make_vendor(f"v{lines}-{n}")
+                       for n in range(min(lines, 10))]
+            for i in range(lines):
+                variant = self.make_variant(
+                    vendors[i % len(vendors)], name=f"Item {i}")
+                self.add_to_cart(self.customer, variant)
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post(reverse("checkout"))
+            self.assertEqual(response.status_code, 201)
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+
+    @override_settings(DEFAULT_COMMISSION_RATE=Decimal("0.20"))
+    def test_commission_rate_precedence(self):
+        shoes = Category.objects.create(
+            name="Shoes", slug="shoes", commission_rate=Decimal("0.05"))
+        default = self.make_variant(self.vendor, price="10.00")
+        by_category = self.make_variant(self.vendor, price="10.00", name="Boot")
+        Product.objects.filter(pk=by_category.product_id).update(category=shoes)
+        custom = self.make_vendor("custom")
+        custom.commission_rate = Decimal("0.0150")
+        custom.save()
+        by_vendor = self.make_variant(custom, price="10.00", name="Sock")
+        Product.objects.filter(pk=by_vendor.product_id).update(category=shoes)
+        for variant in (default, by_category, by_vendor):
+            self.add_to_cart(self.customer, variant)
+
+        response = self.client.post(reverse("checkout"))
+        commissions = {order["vendor"]: Decimal(order["commission"])
+                       for order in response.data}
+        self.assertEqual(commissions, {self.vendor.pk: Decimal("2.50"),
+                                       custom.pk: Decimal("0.15")})
+
+
+class OrderListTests(CheckoutTestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.admin = User.objects.create_user(
+            username="admin", password="pass12345", role=User.Roles.ADMIN)
+        self.customer = User.objects.create_user(
+            username="buyer", password="pass12345")
+        self.vendor = self.make_vendor()
+        self.other = self.make_vendor("other")
+
+    def make_orders(self, count, vendor=None, status="paid"):
+        variant = self.make_variant(vendor or self.vendor)
+        orders = []
+        for _ in range(count):
+            order = Order.objects.create(
+                user=self.customer, vendor=vendor or self.vendor,
+                status=status, total_price="10.00")
+            OrderItem.objects.create(order=order, product=variant.product,
+                                     variant=variant, price="10.00")
+            orders.append(order)
+        return orders
+
+    def list_ids(self, user, **params):
+        self.client.force_authenticate(user)
+        response = self.client.get(reverse("order-list"), params)
+        self.assertEqual(response.status_code, 200)
+        return [order["id"] for order in response.data["results"]]
+
+    def test_each_role_sees_its_own_orders(self):
+        mine = self.make_orders(2)
+        theirs = self.make_orders(1, vendor=self.other)
+        self.assertEqual(len(self.list_ids(self.admin)), 3)
+        self.assertEqual(self.list_ids(self.vendor.user),
+                         [o.pk for o in reversed(mine)])
+        self.assertEqual(self.list_ids(self.other.user), [theirs[0].pk])
+
+    def test_filters(self):
+        paid = self.make_orders(2)
+        shipped = self.make_orders(1, status="shipped")
+        self.assertEqual(self.list_ids(self.admin, status="shipped"),
+                         [shipped[0].pk])
+
+        Order.objects.filter(pk=paid[0].pk).update(
+            created_at=timezone.now() - timedelta(days=10))
+        week_ago = (timezone.now() - timedelta(days=7)).isoformat()
+        self.assertEqual(self.list_ids(self.admin, created_before=week_ago),
+                         [paid[0].pk])
+        self.assertNotIn(paid[0].pk,
+                         self.list_ids(self.admin, created_after=week_ago))
+
+    def test_invalid_filter_is_rejected(self):
+        self.client.force_authenticate(self.admin)
+        response = self.client.get(reverse("order-list"), {"status": "lost"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_pages_cost_a_fixed_number_of_queries(self):
+        self.client.force_authenticate(self.admin)
+        for count in (1, 20):
+            Order.objects.all().delete()
+            self.make_orders(count)
+            # page of orders + their items
+            with self.assertNumQueries(2):
+                response = self.client.get(reverse("order-list"))
+            self.assertEqual(len(response.data["results"]), count)
+
+    def test_sparse_fields_and_expansion(self):
+        self.client.force_authenticate(self.admin)
+        self.make_orders(2)
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("order-list"),
+                                       {"fields": "id,status"})
+        self.assertEqual(set(response.data["results"][0]), {"id", "status"})
+        # orders + items + vendors + products + their images and variants
+        with self.assertNumQueries(6):
+            response = self.client.get(reverse("order-list"), {
+                "fields": "id,vendor,items.product",
+                "expand": "vendor,items.product"})
+        order = response.data["results"][0]
+        self.assertEqual(order["vendor"]["id"], self.vendor.pk)
+        self.assertEqual(order["items"][0]["product"]["name"], "Shirt")
+
+
+class SalesRollupTests(CheckoutTestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.customer = User.objects.create_user(
+            username="buyer", password="pass12345")
+        self.vendor = self.make_vendor()
+        self.shirt = self.make_variant(self.vendor, price="10.00", stock=50)
+        self.hat = self.make_variant(self.vendor, price="4.00", stock=50,
+                                     name="Hat")
+
+    def checkout(self, *lines):
+        for variant, quantity in lines:
+            self.add_to_cart(self.customer, variant, quantity)
+        self.client.force_authenticate(self.customer)
+        response = self.client.post(reverse("checkout"))
+        self.assertEqual(response.status_code, 201)
+        run_pending()
+
+    def analytics(self, **params):
+        self.client.force_authenticate(self.vendor.user)
+        return self.client.get(reverse("sales-analytics"), params)
+
+    def test_checkout_updates_rollups_incrementally(self):
+        self.checkout((self.shirt, 2), (self.hat, 1))
+        self.checkout((self.shirt, 1))
+
+        day = VendorDailySales.objects.get(vendor=self.vendor)
+        self.assertEqual((day.orders, day.units, day.revenue, day.commission),
+                         (2, 4, Decimal("34.00"), Decimal("3.40")))
+        units = dict(ProductDailySales.objects.values_list(
+            "product_id", "units"))
+        self.assertEqual(units, {self.shirt.product_id: 3,
+                                 self.hat.product_id: 1})
+        self.assertFalse(Order.objects.filter(rolled_up=False).exists())
+
+    def test_order_paid_later_is_counted_once(self):
+        order = Order.objects.create(user=self.customer, vendor=self.vendor,
+                                     total_price="10.00")
+        OrderItem.objects.create(order=order, product=self.shirt.product,
+                                 variant=self.shirt, price="10.00")
+        self.assertFalse(VendorDailySales.objects.exists())
+
+        for status in ("paid", "shipped"):
+            # the instance never learns it was rolled up in the background
+            order.status = status
+            order.save()
+            run_pending()
+        self.assertEqual(VendorDailySales.objects.get().orders, 1)
+
+    def test_cancelled_order_is_taken_out_of_rollups(self):
+        self.checkout((self.shirt, 2), (self.hat, 1))
+        self.checkout((self.shirt, 1))
+        order = Order.objects.earliest("pk")
+        order.status = "cancelled"
+        order.save()
+        run_pending()
+
+        day = VendorDailySales.objects.get(vendor=self.vendor)
+        self.assertEqual((day.orders, day.units, day.revenue, day.commission),
+                         (1, 1, Decimal("10.00"), Decimal("1.00")))
+        units = dict(ProductDailySales.objects.values_list(
+            "product_id", "units"))
+        self.assertEqual(units, {self.shirt.product_id: 1,
+                                 self.hat.product_id: 0})
+        order.refresh_from_db()
+        self.assertFalse(order.rolled_up)
+
+        # saved again, it is not taken out twice
+        order.save()
+        run_pending()
+        self.assertEqual(VendorDailySales.objects.get().orders, 1)
+
+    def test_rebuild_matches_incremental_rollups(self):
+        self.checkout((self.shirt, 2), (self.hat, 3))
+        expected = list(VendorDailySales.objects.values(
+            "day", "orders", "units", "revenue", "commission"))
+
+        call_command("rebuild_sales_rollups", "--reset", "--chunk-size", "1",
+                     stdout=StringIO())
+        self.assertEqual(list(VendorDailySales.objects.values(
+            "day", "orders", "units", "revenue", "commission")), expected)
+
+    def test_merges_are_batched_by_the_parameter_limit(self):
+        self.checkout((self.shirt, 2), (self.hat, 3))
+        expected = list(ProductDailySales.objects.values(
+            "product_id", "day", "units", "revenue"))
+        reset_rollups()
+        # one product-day row (5 parameters) per statement
+        with mock.patch("orders.rollups.MAX_QUERY_PARAMS", 5), \
+                CaptureQueriesContext(connection) as queries:
+            rebuild_rollups()
+        self.assertEqual(sum('INSERT INTO "orders_productdailysales"'
+                             in query["sql"] for query in queries), 2)
+        self.assertEqual(list(ProductDailySales.objects.values(
+            "product_id", "day", "units", "revenue")), expected)
+
+    def test_analytics_reads_only_rollups(self):
+        self.checkout((self.shirt, 2), (self.hat, 1))
+        other = self.make_vendor("other")
+        self.add_to_cart(self.customer, self.make_variant(other))
+        self.checkout()
+
+        # totals, days and products; no query touches orders
+        with self.assertNumQueries(3):
+            response = self.analytics()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["totals"]["orders"], 1)
+        self.assertEqual(response.data["totals"]["revenue"], Decimal("24.00"))
+        self.assertEqual(len(response.data["by_day"]), 1)
+        self.assertEqual(
+            [(row["product"], row["units"]) for row in response.data["by_product"]],
+            [(self.shirt.product_id, 2), (self.hat.product_id, 1)])
+
+    def test_analytics_range(self):
+        self.checkout((self.shirt, 1))
+        tomorrow = timezone.localdate() + timedelta(days=1)
+        response = self.analytics(start=tomorrow.isoformat())
+        self.assertEqual(response.status_code, 400)
+        response = self.analytics(start=tomorrow.isoformat(),
+                                  end=tomorrow.isoformat())
+        self.assertEqual(response.data["totals"]["orders"], 0)
+
+    def test_analytics_is_vendor_only(self):
+        self.client.force_authenticate(self.customer)
+        response = self.client.get(reverse("sales-analytics"))
+        self.assertEqual(response.status_code, 403)
+
+
+class SettlementTests(CheckoutTestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.customer = User.objects.create_user(
+            username="buyer", password="pass12345")
+        self.vendor = self.make_vendor()
+        self.other = self.make_vendor("other")
+
+    def make_order(self, vendor, total="10.00", status="paid"):
+        return Order.objects.create(
+            user=self.customer, vendor=vendor, status=status,
+            total_price=total, commission=Decimal(total) / 10)
+
+    def test_settles_each_vendor_once(self):
+        for total in ("10.00", "20.00", "30.00"):
+            self.make_order(self.vendor, total)
+        self.make_order(self.other, "5.00")
+        pending = self.make_order(self.vendor, status="pending")
+
+        payouts = settle_payouts(chunk_size=2)
+        summary = {p.vendor_id: (p.order_count, p.gross, p.commission, p.net,
+                                 p.status) for p in payouts}
+        self.assertEqual(summary, {
+            self.vendor.pk: (3, Decimal("60.00"), Decimal("6.00"),
+                             Decimal("54.00"), "pending"),
+            self.other.pk: (1, Decimal("5.00"), Decimal("0.50"),
+                            Decimal("4.50"), "pending"),
+        })
+        pending.refresh_from_db()
+        self.assertIsNone(pending.payout)
+        self.assertEqual(settle_payouts(), [])
+
+    def test_cut_off_excludes_later_orders(self):
+        early = self.make_order(self.vendor)
+        Order.objects.filter(pk=early.pk).update(
+            created_at=timezone.now() - timedelta(days=3))
+        self.make_order(self.vendor)
+
+        payout, = settle_payouts(
+            until=timezone.now() - timedelta(days=1))
+        self.assertEqual(list(payout.orders.values_list("pk", flat=True)),
+                         [early.pk])
+
+    def test_interrupted_payout_is_resumed(self):
+        first, second = self.make_order(self.vendor), self.make_order(self.vendor)
+        # a crash after the first chunk left an open, half-filled payout
+        stale = Payout.objects.create(vendor=self.vendor,
+                                      period_end=timezone.now())
+        Order.objects.filter(pk=first.pk).update(payout=stale)
+
+        payout, = settle_payouts(chunk_size=1)
+        self.assertEqual(payout.pk, stale.pk)
+        self.assertEqual((payout.order_count, payout.status), (2, "pending"))
+        second.refresh_from_db()
+        self.assertEqual(second.payout_id, stale.pk)
+
+    def test_orders_cancelled_in_an_open_payout_are_not_paid(self):
+        kept, cancelled = self.make_order(self.vendor), self.make_order(
+            self.vendor, "20.00")
+        stale = Payout.objects.create(vendor=self.vendor,
+                                      period_end=timezone.now())
+        Order.objects.filter(pk__in=[kept.pk, cancelled.pk]).update(
+            payout=stale)
+        cancelled.status = "cancelled"
+        cancelled.save()
+
+        payout, = settle_payouts()
+        self.assertEqual((payout.order_count, payout.gross, payout.net),
+                         (1, Decimal("10.00"), Decimal("9.00")))
+        cancelled.refresh_from_db()
+        self.assertIsNone(cancelled.payout)
+
+    def test_command(self):
+        self.make_order(self.vendor)
+        out = StringIO()
+        call_command("settle_payouts", "--until", "2999-01-01", stdout=out)
+        self.assertIn("Settled 1 payouts.", out.getvalue())
+
+
+class CheckoutStressTests(TransactionTestCase):
+    """Concurrent checkouts against a real (committed) database."""
+
+    def test_contended_variant_is_never_oversold(self):
+        variant, users = seed_contended_variant(buyers=24, stock=5)
+        report = run_checkout_stress(variant, users, workers=6)
+
+        self.assertEqual(report["requests"], 24)
+        self.assertEqual(report["failed"], 0)
+        self.assertEqual(report["succeeded"], 5)
+        self.assertEqual(report["sold_out"], 19)
+        self.assertEqual(report["oversold"], 0)
+        self.assertTrue(report["consistent"])
+        self.assertEqual(Order.objects.count(), 5)
+
+    def test_command_reports_outcome(self):
+        out = StringIO()
+        call_command("stress_checkout", buyers=8, stock=3, quantity=2,
+                     workers=4, stdout=out)
+        self.assertIn("No oversell.", out.getvalue())
+        self.assertIn("units sold 2", out.getvalue())
+        self.assertFalse(User.objects.exists())
+
+
+class AsyncCartTests(CheckoutTestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.customer = User.objects.create_user(
+            username="buyer", password="pass12345")
+        vendor = self.make_vendor("seller")
+        self.add_to_cart(self.customer, self.make_variant(vendor))
+        token = RefreshToken.for_user(self.customer).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def test_matches_the_sync_view(self):
+        sync = self.client.get(reverse("cart")).json()
+        self.assertEqual(self.client.get(reverse("async-cart")).json(), sync)
+        self.assertEqual(len(sync["items"]), 1)
+
+    def test_expansion_matches_the_sync_view(self):
+        params = {"fields": "items", "expand": "items.variant"}
+        sync = self.client.get(reverse("cart"), params).json()
+        self.assertEqual(
+            self.client.get(reverse("async-cart"), params).json(), sync)
+        self.assertEqual(set(sync["items"][0]["variant"]),
+                         {"id", "size", "color", "stock"})
+
+    def test_new_cart_is_created(self):
+        self.customer.cart.all().delete()
+        response = self.client.get(reverse("async-cart"))
+        self.assertEqual(response.json()["items"], [])
+
+    def test_authentication_is_required(self):
+        self.client.credentials()
+        response = self.client.get(reverse("async-cart"))
+        self.assertEqual(response.status_code, 401)
+        self.assertIn("WWW-Authenticate", response)
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer nonsense")
+        self.assertEqual(
+            self.client.get(reverse("async-cart")).json()["code"],
+            "token_not_valid")
+
+
+@override_settings(DATABASE_REPLICAS=["replica"], DATABASE_PIN_SECONDS=60)
+class ReplicaRoutingTests(CheckoutTestMixin, APITransactionTestCase):
+    """
+    Reads against a second SQLite file standing in for a replica. Nothing
+    replicates to it, so a read that reaches it finds no rows.
+    """
+    @classmethod
+    def setUpClass(cls):
+        # declared here: the alias only exists from now on
+        cls.databases = {"default", "replica"}
+        directory = tempfile.mkdtemp()
+        cls.addClassCleanup(shutil.rmtree, directory)
+        connections.settings["replica"] = {
+            **connections.settings["default"],
+            "NAME": os.path.join(directory, "replica.sqlite3")}
+        cls.addClassCleanup(cls.remove_replica)
+        call_command("migrate", database="replica", verbosity=0)
+        super().setUpClass()
+
+    @classmethod
+    def remove_replica(cls):
+        connections["replica"].close()
+        del connections["replica"]
+        del connections.settings["replica"]
+
+    def setUp(self):
+        super().setUp()
+        caches["db_pins"].clear()
+        caches["catalog"].clear()
+        self.customer = User.objects.create_user(
+            username="buyer", password="pass12345")
+        self.variant = self.make_variant(self.make_vendor())
+        Order.objects.create(user=self.customer,
+                             vendor=self.variant.product.vendor,
+                             total_price="10.00")
+        self.client.force_authenticate(self.customer)
+
+    def order_count(self):
+        return len(self.client.get(reverse("order-list")).data["results"])
+
+    def add_to_cart(self):
+        response = self.client.post(reverse("cart"), {
+            "product": self.variant.product.pk, "variant": self.variant.pk})
+        self.assertEqual(response.status_code, 201)
+
+    def test_reads_go_to_the_replica(self):
+        self.assertEqual(self.order_count(), 0)
+        # outside requests, reads use the primary
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_writers_read_their_writes(self):
+        self.add_to_cart()
+        self.assertEqual(self.order_count(), 1)
+        # other users are not pinned
+        self.client.force_authenticate(self.make_vendor("other").user)
+        self.assertEqual(self.order_count(), 0)
+
+    def test_catalog_cache_is_filled_from_the_primary(self):
+        self.add_to_cart()
+        self.client.force_authenticate(None)
+        url = reverse("product-list")
+        # a miss is built from the primary, not the empty replica...
+        self.assertEqual(len(self.client.get(url).data["results"]), 1)
+        # ...and cached: without signals, this change goes unnoticed
+        Product.objects.update(is_active=False)
+        self.assertEqual(len(self.client.get(url).data["results"]), 1)
+        # pinned writers get the same, up-to-date copy
+        self.client.force_authenticate(self.customer)
+        self.assertEqual(len(self.client.get(url).data["results"]), 1)
+
+    @override_settings(DATABASE_PIN_SECONDS=0)
+    def test_pins_expire(self):
+        self.add_to_cart()
+        self.assertEqual(self.order_count(), 0)
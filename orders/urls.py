@@ -1,5 +1,6 @@
 from django.urls import path
-from .views import CartView, CartItemDeleteView, CheckoutView, OrderListView
+from .views import (CartView, CartItemDeleteView, CheckoutView, OrderListView,
+                    SalesAnalyticsView)
 
 urlpatterns = [
     path("cart/", CartView.as_view(), name="cart"),
@@ -7,4 +8,6 @@ urlpatterns = [
          CartItemDeleteView.as_view(), name="cart-item-delete"),
     path("checkout/", CheckoutView.as_view(), name="checkout"),
     path("orders/", OrderListView.as_view(), name="order-list"),
+    path("orders/analytics/", SalesAnalyticsView.as_view(),
+         name="sales-analytics"),
 ]
@@ -1,18 +1,30 @@
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from django.db.models import Sum
 from django.shortcuts import get_object_or_404
-from decimal import Decimal
-from .models import Cart, CartItem, Order, OrderItem
-from .serializers import CartSerializer, CartItemSerializer, OrderSerializer
+from accounts.authentication import (CachedJWTAuthentication,
+                                     ClaimsJWTAuthentication)
+from accounts.permissions import IsVendor
+from core.serializers import optimize_queryset
+from core.throttling import TokenBucketThrottle
+from .checkout import EmptyCart, InsufficientStock, checkout_cart
+from .filters import OrderFilterBackend
+from .models import Cart, CartItem, Order, ProductDailySales, VendorDailySales
+from .pagination import OrderCursorPagination
+from .serializers import (CartSerializer, CartItemSerializer, OrderSerializer,
+                          SalesAnalyticsQuerySerializer,
+                          VendorDailySalesSerializer)
 
 
 class CartView(APIView):
     permission_classes = [permissions.IsAuthenticated]
+    authentication_classes = [CachedJWTAuthentication]
 
     def get(self, request):
-        cart, created = Cart.objects.get_or_create(user=request.user)
-        serializer = CartSerializer(cart)
+        serializer = CartSerializer(context={"request": request})
+        serializer.instance, created = optimize_queryset(
+            Cart.objects.all(), serializer).get_or_create(user=request.user)
         return Response(serializer.data)
 
     def post(self, request):
@@ -26,6 +38,7 @@ class CartView(APIView):
 
 class CartItemDeleteView(APIView):
     permission_classes = [permissions.IsAuthenticated]
+    authentication_classes = [CachedJWTAuthentication]
 
     def delete(self, request, pk):
         cart_item = get_object_or_404(CartItem, pk=pk, cart__user=request.user)
@@ -35,58 +48,83 @@ class CartItemDeleteView(APIView):
 
 class CheckoutView(APIView):
     permission_classes = [permissions.IsAuthenticated]
+    authentication_classes = [CachedJWTAuthentication]
+    throttle_classes = [TokenBucketThrottle]
+    throttle_scope = "checkout"
 
     def post(self, request):
-        cart = get_object_or_404(Cart, user=request.user)
-        if not cart.items.exists():
+        try:
+            orders = checkout_cart(request.user)
+        except EmptyCart:
             return Response({"error": "Cart is empty."}, status=status.HTTP_400_BAD_REQUEST)
-
-        # assume one vendor per order (split-cart logic can be added later)
-        first_item = cart.items.first()
-        vendor = first_item.product.vendor
-
-        total = Decimal(0)
-        order = Order.objects.create(
-            user=request.user,
-            vendor=vendor,
-            total_price=0,
-            commission=0,
-            status="pending"
-        )
-
-        for item in cart.items.all():
-            price = item.product.price * item.quantity
-            OrderItem.objects.create(
-                order=order,
-                product=item.product,
-                variant=item.variant,
-                quantity=item.quantity,
-                price=item.product.price
+        except InsufficientStock as exc:
+            return Response(
+                {"error": "Insufficient stock.", "variants": exc.variant_ids},
+                status=status.HTTP_409_CONFLICT,
             )
-            total += price
-
-        # Apply commission (10%)
-        commission = total * Decimal("0.10")
-        order.total_price = total
-        order.commission = commission
-        order.status = "paid"  # simulate instant payment success
-        order.save()
-
-        # Clear cart
-        cart.items.all().delete()
 
-        serializer = OrderSerializer(order)
+        serializer = OrderSerializer(orders, many=True)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 
 class OrderListView(generics.ListAPIView):
     serializer_class = OrderSerializer
     permission_classes = [permissions.IsAuthenticated]
+    authentication_classes = [ClaimsJWTAuthentication]
+    pagination_class = OrderCursorPagination
+    filter_backends = [OrderFilterBackend]
 
     def get_queryset(self):
         user = self.request.user
+        queryset = optimize_queryset(
+            Order.objects.all(), self.get_serializer(), keep=["created_at"])
         if user.role == "admin":
-            return Order.objects.all()
+            return queryset
         elif user.role == "vendor":
-            return Order.objects.filter(vendor=user.vendor_profile)
-        return Order.objects.filter(user=user)
+            return queryset.filter(vendor_id=user.vendor_id)
+        return queryset.filter(user_id=user.id)
+
+
+class SalesAnalyticsView(APIView):
+    """
+    The vendor's paid sales between ``start`` and ``end`` (inclusive), read
+    from the daily rollups only, so the cost depends on the number of days
+    and products rather than on the number of orders.
+    """
+    permission_classes = [IsVendor]
+    authentication_classes = [ClaimsJWTAuthentication]
+
+    def get(self, request):
+        query = SalesAnalyticsQuerySerializer(data=request.query_params.dict())
+        query.is_valid(raise_exception=True)
+        start, end = query.validated_data["start"], query.validated_data["end"]
+
+        vendor_id = request.user.vendor_id
+        days = VendorDailySales.objects.filter(
+            vendor_id=vendor_id, day__range=(start, end)).order_by("day")
+        totals = days.aggregate(
+            orders=Sum("orders"), units=Sum("units"),
+            revenue=Sum("revenue"), commission=Sum("commission"))
+        by_product = (ProductDailySales.objects
+                      .filter(vendor_id=vendor_id,
+                              day__range=(start, end))
+                      .values("product_id", "product__name")
+                      .annotate(units=Sum("units"), revenue=Sum("revenue"))
+                      .order_by("-revenue", "product_id"))
+
+        return Response({
+            "start": start,
+            "end": end,
+            "totals": {
+                "orders": totals["orders"] or 0,
+                "units": totals["units"] or 0,
+                "revenue": totals["revenue"] or 0,
+                "commission": totals["commission"] or 0,
+            },
+            "by_day": VendorDailySalesSerializer(days, many=True).data,
+            "by_product": [
+                {"product": row["product_id"], "name": row["product__name"],
+                 "units": row["units"], "revenue": row["revenue"]}
+                for row in by_product
+            ],
+        })
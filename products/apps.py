@@ -1,6 +1,13 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class ProductsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'products'
+
+    def ready(self):
+        from . import signals
+
+        post_migrate.connect(signals.reinstall_search_triggers, sender=self)
+        post_migrate.connect(signals.create_cache_tables, sender=self)
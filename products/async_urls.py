@@ -0,0 +1,10 @@
+from django.urls import path
+from .async_views import (category_list, category_tree, product_detail,
+                          product_list)
+
+urlpatterns = [
+    path("", product_list, name="async-product-list"),
+    path("<int:pk>/", product_detail, name="async-product-detail"),
+    path("categories/", category_list, name="async-category-list"),
+    path("categories/tree/", category_tree, name="async-category-tree"),
+]
@@ -0,0 +1,101 @@
+"""
+Async versions of the public catalog reads, served next to the DRF views
+under /api/async/ so the two can be compared (see core/async_api.py and the
+compare_async command). Responses, caching and validators are the same as
+the sync views'.
+"""
+from asgiref.sync import sync_to_async
+from django.http import Http404
+
+from core.async_api import async_api_view, conditional_response, render
+from core.serializers import optimize_queryset
+from .cache import (CATEGORIES, PRODUCTS, acached_response_data,
+                    product_namespace)
+from .conditional import (aload_category_state, aload_product_state,
+                          category_list_etag, category_list_last_modified,
+                          product_etag, product_last_modified)
+from .facets import afacet_counts
+from .fastpath import aproduct_rows, product_values, use_fast_path
+from .filters import ProductFilterBackend, get_product_filters
+from .models import Category, Product
+from .pagination import ProductCursorPagination
+from .serializers import CategorySerializer, ProductSerializer
+from .tree import abuild_category_tree
+
+
+def _products(serializer, keep=()):
+    return optimize_queryset(
+        Product.objects.filter(is_active=True), serializer, keep)
+
+
+@async_api_view
+async def product_list(request):
+    async def build():
+        serializer = ProductSerializer(many=True, context={"request": request})
+        queryset = ProductFilterBackend().filter_queryset(
+            request, _products(serializer, keep=["created_at"]), None)
+        paginator = ProductCursorPagination()
+        # DRF's own paging steps, with the page fetched in a worker thread
+        paginate = sync_to_async(paginator.paginate_queryset)
+        if use_fast_path(request):
+            page = await paginate(
+                product_values(queryset.prefetch_related(None)), request)
+            results = await aproduct_rows(page, request)
+        else:
+            serializer.instance = await paginate(queryset, request)
+            results = serializer.data
+        data = paginator.get_paginated_response(results).data
+        data["facets"] = await afacet_counts(
+            queryset if get_product_filters(request) else None)
+        return data
+
+    return await acached_response_data(request, (PRODUCTS, CATEGORIES), build)
+
+
+@async_api_view
+async def product_detail(request, pk):
+    await aload_product_state(request, pk)
+
+    async def build():
+        serializer = ProductSerializer(context={"request": request})
+        serializer.instance = await _products(serializer).filter(
+            pk=pk).afirst()
+        if serializer.instance is None:
+            return None
+        return serializer.data
+
+    async def respond():
+        data = await acached_response_data(
+            request, (PRODUCTS, product_namespace(pk), CATEGORIES), build)
+        if data is None:
+            raise Http404("No Product matches the given query.")
+        return render(data)
+
+    return await conditional_response(
+        request, respond, etag=product_etag(request, pk),
+        last_modified=product_last_modified(request, pk))
+
+
+@async_api_view
+async def category_list(request):
+    await aload_category_state(request)
+
+    async def build():
+        categories = [category async for category in
+                      Category.objects.filter(is_active=True)]
+        return CategorySerializer(
+            categories, many=True, context={"request": request}).data
+
+    async def respond():
+        return render(
+            await acached_response_data(request, (CATEGORIES,), build))
+
+    return await conditional_response(
+        request, respond, etag=category_list_etag(request),
+        last_modified=category_list_last_modified(request))
+
+
+@async_api_view
+async def category_tree(request):
+    return await acached_response_data(
+        request, (CATEGORIES,), abuild_category_tree)
@@ -0,0 +1,152 @@
+"""
+Response cache for the public catalog endpoints.
+
+Cached GET responses are keyed by host, path, sorted query parameters and the
+current generation of every namespace the view depends on. Changing a
+product, image, variant or category bumps the matching generation (see
+signals.py), which makes every older entry unreachable at once: there is no
+TTL staleness, and superseded entries simply age out of the backend.
+
+A product's detail also depends on its own ``product_namespace``, so a
+change only it shows (a checkout's stock decrement) can invalidate it
+without throwing away every listing.
+"""
+import hashlib
+import time
+
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.http import urlencode
+from rest_framework.response import Response
+
+from core.db_router import primary_reads
+
+PRODUCTS = "products"
+CATEGORIES = "categories"
+
+
+def product_namespace(pk):
+    """The namespace of product ``pk``'s detail, next to ``PRODUCTS``."""
+    return f"{PRODUCTS}:{pk}"
+
+
+def catalog_cache():
+    return caches["catalog"]
+
+
+def _generation_key(namespace):
+    return f"generation:{namespace}"
+
+
+def _fresh_generation():
+    # never reuse a generation, even if the counter itself was evicted
+    return time.time_ns()
+
+
+def get_generations(namespaces):
+    cache = catalog_cache()
+    keys = [_generation_key(ns) for ns in namespaces]
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            cache.add(key, _fresh_generation(), timeout=None)
+            found[key] = cache.get(key)
+    return [found[key] for key in keys]
+
+
+async def aget_generations(namespaces):
+    cache = catalog_cache()
+    keys = [_generation_key(ns) for ns in namespaces]
+    found = await cache.aget_many(keys)
+    for key in keys:
+        if key not in found:
+            await cache.aadd(key, _fresh_generation(), timeout=None)
+            found[key] = await cache.aget(key)
+    return [found[key] for key in keys]
+
+
+def _bump(namespace):
+    cache = catalog_cache()
+    key = _generation_key(namespace)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _fresh_generation(), timeout=None)
+
+
+def bump_generation(namespace):
+    """
+    Invalidate every cached response that depends on ``namespace``.
+
+    Bumps now, so the current request sees its own change, and again on
+    commit, so a reader that cached pre-commit data in between cannot keep
+    serving it.
+    """
+    _bump(namespace)
+    transaction.on_commit(lambda: _bump(namespace))
+
+
+def bump_generations(namespaces):
+    """
+    ``bump_generation`` for many namespaces in one round-trip: their
+    counters are dropped, and replaced by fresh generations when next read.
+    """
+    keys = [_generation_key(namespace) for namespace in namespaces]
+    if not keys:
+        return
+    catalog_cache().delete_many(keys)
+    transaction.on_commit(lambda: catalog_cache().delete_many(keys))
+
+
+def _response_cache_key(request, generations):
+    query = urlencode(sorted(request.GET.lists()), doseq=True)
+    digest = hashlib.md5(
+        f"{request.get_host()}{request.path}?{query}".encode()).hexdigest()
+    versions = ".".join(str(g) for g in generations)
+    return f"response:{versions}:{digest}"
+
+
+def response_cache_key(request, namespaces):
+    return _response_cache_key(request, get_generations(namespaces))
+
+
+async def acached_response_data(request, namespaces, build):
+    """
+    The async views' counterpart of ``CachedResponseMixin``: the cached data
+    for ``request``, or what ``build()`` returns, cached unless it is None.
+    """
+    key = _response_cache_key(request, await aget_generations(namespaces))
+    data = await catalog_cache().aget(key)
+    if data is None:
+        # from the primary: a lagging replica's data would outlive the pins
+        # of those who wrote
+        with primary_reads():
+            data = await build()
+        if data is not None:
+            await catalog_cache().aset(key, data)
+    return data
+
+
+class CachedResponseMixin:
+    """
+    Serve successful GET responses from the catalog cache.
+
+    Only for views whose output does not depend on the requesting user.
+    Misses are built from the primary, never a read replica.
+    ``cache_namespaces`` lists the generations the response depends on.
+    """
+    cache_namespaces = (PRODUCTS, CATEGORIES)
+
+    def get_cache_namespaces(self):
+        return self.cache_namespaces
+
+    def get(self, request, *args, **kwargs):
+        key = response_cache_key(request, self.get_cache_namespaces())
+        data = catalog_cache().get(key)
+        if data is not None:
+            return Response(data)
+        with primary_reads():
+            response = super().get(request, *args, **kwargs)
+        if response.status_code == 200:
+            catalog_cache().set(key, response.data)
+        return response
@@ -0,0 +1,80 @@
+"""
+ETag / Last-Modified validators for ``django.views.decorators.http.condition``.
+
+Each validator costs one indexed query, made once per request, so a
+revalidation that ends in 304 never reaches the response cache or the
+serializers. ETags also cover the host and query string, because image URLs
+are absolute and the query can change the representation; with
+``?expand=category`` the category's own changes count as the product's.
+"""
+import hashlib
+
+from django.db.models import Count, Max
+
+from core.serializers import parse_paths
+from .models import Category, Product
+
+
+def _etag(request, *parts):
+    query = request.GET.urlencode()
+    raw = ":".join(str(part) for part in (*parts, request.get_host(), query))
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def _product_state_query(pk):
+    return (Product.objects.filter(pk=pk, is_active=True)
+            .values_list("updated_at", "category__updated_at"))
+
+
+def _product_updated_at(request, pk):
+    if not hasattr(request, "_product_state"):
+        request._product_state = _product_state_query(pk).first()
+    if request._product_state is None:
+        return None
+    updated_at, category_updated_at = request._product_state
+    # ?expand=category puts the category row itself in the body
+    expand = parse_paths(request.GET.get("expand"))
+    if "category" in expand and category_updated_at is not None:
+        return max(updated_at, category_updated_at)
+    return updated_at
+
+
+def product_etag(request, pk):
+    updated_at = _product_updated_at(request, pk)
+    if updated_at is None:
+        return None
+    return _etag(request, "product", pk, updated_at.isoformat())
+
+
+def product_last_modified(request, pk):
+    return _product_updated_at(request, pk)
+
+
+def _category_state(request):
+    if not hasattr(request, "_category_state"):
+        # the count catches deletions, which leave no newer updated_at behind
+        request._category_state = Category.objects.aggregate(
+            last=Max("updated_at"), total=Count("id"))
+    return request._category_state
+
+
+# Async views load the state up front, after which the functions above
+# answer from the request without a query.
+
+async def aload_product_state(request, pk):
+    request._product_state = await _product_state_query(pk).afirst()
+
+
+async def aload_category_state(request):
+    request._category_state = await Category.objects.aaggregate(
+        last=Max("updated_at"), total=Count("id"))
+
+
+def category_list_etag(request):
+    state = _category_state(request)
+    last = state["last"].isoformat() if state["last"] else ""
+    return _etag(request, "categories", state["total"], last)
+
+
+def category_list_last_modified(request):
+    return _category_state(request)["last"]
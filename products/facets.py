@@ -0,0 +1,175 @@
+"""
+Incrementally maintained facet index for the catalog.
+
+``ProductFacetValue`` holds one row per (active product, facet value) and
+``FacetCount`` holds the number of active products per facet value. Both are
+refreshed per product from signals whenever a product or one of its variants
+changes, so the unfiltered catalog reads its facet counts from a handful of
+rows and filtered requests only group the narrow index rows of the products
+that matched.
+"""
+from functools import reduce
+from operator import or_
+
+from django.db import transaction
+from django.db.models import Count, F, Q
+
+from core.transactions import write_atomic
+from .models import FacetCount, Product, ProductFacetValue, ProductVariant
+
+Facets = ProductFacetValue.Facets
+
+
+def _facet_values(category_id, variants):
+    values = set()
+    if category_id:
+        values.add((Facets.CATEGORY, str(category_id)))
+    for size, color in variants:
+        if size:
+            values.add((Facets.SIZE, size))
+        if color:
+            values.add((Facets.COLOR, color))
+    return values
+
+
+def product_facet_values(product):
+    """The set of (facet, value) pairs ``product`` should be indexed under."""
+    if product is None or not product.is_active:
+        return set()
+    variants = ProductVariant.objects.filter(
+        product=product).values_list("size", "color")
+    return _facet_values(product.category_id, variants)
+
+
+def _adjust_counts(pairs, delta):
+    if not pairs:
+        return
+    FacetCount.objects.bulk_create(
+        [FacetCount(facet=facet, value=value) for facet, value in pairs],
+        ignore_conflicts=True)
+    for facet, value in pairs:
+        FacetCount.objects.filter(facet=facet, value=value).update(
+            count=F("count") + delta)
+
+
+def _pairs_q(pairs):
+    return reduce(or_, (Q(facet=facet, value=value) for facet, value in pairs))
+
+
+@write_atomic()
+def _sync_product_facets(product_id, wanted):
+    # one sync per product at a time: two concurrent ones would both insert
+    # (or delete) the same rows and count them twice. The row lock does it
+    # where there are row locks; SQLite's write lock, taken at BEGIN, else.
+    list(Product.objects.select_for_update().filter(pk=product_id)
+         .values_list("pk"))
+    current = set(ProductFacetValue.objects.filter(
+        product_id=product_id).values_list("facet", "value"))
+
+    removed = current - wanted
+    added = wanted - current
+    if removed:
+        ProductFacetValue.objects.filter(
+            product_id=product_id).filter(_pairs_q(removed)).delete()
+        _adjust_counts(removed, -1)
+    if added:
+        ProductFacetValue.objects.bulk_create([
+            ProductFacetValue(product_id=product_id, facet=facet, value=value)
+            for facet, value in added
+        ])
+        _adjust_counts(added, +1)
+
+
+def refresh_product_facets(product_id, product=None):
+    """
+    Bring the index rows and counts for one product up to date.
+
+    Pass the already-loaded ``product`` to avoid fetching it again.
+    """
+    if product is None:
+        product = Product.objects.filter(pk=product_id).first()
+    _sync_product_facets(product_id, product_facet_values(product))
+
+
+def clear_product_facets(product_id):
+    """Remove a product from the index, e.g. right before it is deleted."""
+    _sync_product_facets(product_id, set())
+
+
+@transaction.atomic
+def remove_category_facet(category_id):
+    """Drop a deleted category, whose products are SET_NULL without signals."""
+    value = str(category_id)
+    ProductFacetValue.objects.filter(
+        facet=Facets.CATEGORY, value=value).delete()
+    FacetCount.objects.filter(facet=Facets.CATEGORY, value=value).delete()
+
+
+@transaction.atomic
+def rebuild_facet_index(chunk_size=1000):
+    """Recompute the whole index from scratch; returns the rows written."""
+    ProductFacetValue.objects.all().delete()
+    FacetCount.objects.all().delete()
+
+    written = 0
+    last_id = 0
+    while True:
+        products = list(
+            Product.objects.filter(is_active=True, id__gt=last_id)
+            .order_by("id")
+            .only("id", "category_id", "is_active")
+            .prefetch_related("variants")[:chunk_size])
+        if not products:
+            break
+        rows = []
+        for product in products:
+            values = _facet_values(
+                product.category_id,
+                ((v.size, v.color) for v in product.variants.all()))
+            rows += [ProductFacetValue(product_id=product.id, facet=facet,
+                                       value=value)
+                     for facet, value in values]
+        ProductFacetValue.objects.bulk_create(rows, batch_size=chunk_size)
+        written += len(rows)
+        last_id = products[-1].id
+
+    counts = (ProductFacetValue.objects
+              .values("facet", "value")
+              .annotate(count=Count("id")))
+    FacetCount.objects.bulk_create(
+        [FacetCount(**row) for row in counts.iterator()],
+        batch_size=chunk_size)
+    return written
+
+
+def _group(rows):
+    facets = {facet: [] for facet in Facets.values}
+    for row in sorted(rows, key=lambda r: (-r["count"], r["value"])):
+        if row["count"]:
+            facets[row["facet"]].append(
+                {"value": row["value"], "count": row["count"]})
+    return facets
+
+
+def _facet_count_rows(queryset):
+    if queryset is None:
+        return FacetCount.objects.values("facet", "value", "count")
+    return (ProductFacetValue.objects
+            .filter(product__in=queryset.order_by().values("id"))
+            .values("facet", "value")
+            .annotate(count=Count("id"))
+            .order_by())
+
+
+def facet_counts(queryset=None):
+    """
+    Facet counts for the products in ``queryset``.
+
+    ``None`` means the whole active catalog and is answered from the
+    materialized ``FacetCount`` table.
+    """
+    return _group(_facet_count_rows(queryset))
+
+
+async def afacet_counts(queryset=None):
+    return _group([row async for row in _facet_count_rows(queryset)])
@@ -0,0 +1,109 @@
+"""
+Serializer-free product lists.
+
+``ProductSerializer`` builds a model instance for every product, image and
+variant and runs each value through DRF's field machinery, which is most of
+the cost of a large page. ``product_rows`` returns the same data from
+``values()`` rows and one batched lookup each for the images and variants.
+Only scalars are formatted by the serializer's own fields, so prices and
+timestamps come out exactly as before.
+
+The list views use it unless the request asks for ``?fields=`` or
+``?expand=``, which only the serializer understands, or
+``PRODUCT_LIST_FAST_PATH`` is off. ``ProductSerializer`` stays the
+reference: the tests check the two agree.
+"""
+from django.conf import settings
+
+from core.images import derivative_urls
+from .models import ProductImage, ProductVariant
+from .serializers import ProductSerializer
+
+PRODUCT_COLUMNS = ("id", "name", "description", "price", "category",
+                   "is_active", "created_at")
+IMAGE_COLUMNS = ("id", "image", "derivatives")
+VARIANT_COLUMNS = ("id", "size", "color", "stock")
+
+
+def use_fast_path(request):
+    return settings.PRODUCT_LIST_FAST_PATH and not (
+        request.query_params.get("fields")
+        or request.query_params.get("expand"))
+
+
+def product_values(queryset):
+    """``queryset`` as the rows ``product_rows`` expects."""
+    return queryset.values(*PRODUCT_COLUMNS)
+
+
+def _children(model, columns, rows):
+    return (model.objects.filter(product_id__in=[row["id"] for row in rows])
+            .order_by("pk").values_list("product_id", *columns))
+
+
+def _group(children):
+    grouped = {}
+    for product_id, *values in children:
+        grouped.setdefault(product_id, []).append(values)
+    return grouped
+
+
+def _image_url(storage, name, request):
+    if not name:
+        return None
+    url = storage.url(name)
+    return request.build_absolute_uri(url) if request else url
+
+
+def _build(rows, images, variants, request):
+    fields = ProductSerializer().fields
+    price, created_at = fields["price"], fields["created_at"]
+    storage = ProductImage._meta.get_field("image").storage
+    images, variants = _group(images), _group(variants)
+    return [{
+        "id": row["id"],
+        "name": row["name"],
+        "description": row["description"],
+        "price": price.to_representation(row["price"]),
+        "category": row["category"],
+        "is_active": row["is_active"],
+        "images": [
+            {"id": pk, "image": _image_url(storage, image, request),
+             "derivatives": derivative_urls(derivatives, request)}
+            for pk, image, derivatives in images.get(row["id"], ())],
+        "variants": [
+            {"id": pk, "size": size, "color": color, "stock": stock}
+            for pk, size, color, stock in variants.get(row["id"], ())],
+        "created_at": created_at.to_representation(row["created_at"]),
+    } for row in rows]
+
+
+def product_rows(rows, request=None):
+    """What ``ProductSerializer(many=True)`` outputs, for ``product_values``."""
+    if not rows:
+        return []
+    return _build(rows, _children(ProductImage, IMAGE_COLUMNS, rows),
+                  _children(ProductVariant, VARIANT_COLUMNS, rows), request)
+
+
+async def aproduct_rows(rows, request=None):
+    if not rows:
+        return []
+    images = [row async for row in
+              _children(ProductImage, IMAGE_COLUMNS, rows)]
+    variants = [row async for row in
+                _children(ProductVariant, VARIANT_COLUMNS, rows)]
+    return _build(rows, images, variants, request)
+
+
+class ProductRowsMixin:
+    """For list views of ``ProductSerializer``: lists via ``product_rows``."""
+
+    def list(self, request, *args, **kwargs):
+        if not use_fast_path(request):
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        # the rows are fetched separately; prefetches cannot run on values()
+        page = self.paginate_queryset(
+            product_values(queryset.prefetch_related(None)))
+        return self.get_paginated_response(product_rows(page, request))
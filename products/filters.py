@@ -0,0 +1,79 @@
+from django.db.models import Exists, OuterRef, Subquery
+from rest_framework import serializers
+from rest_framework.filters import BaseFilterBackend
+
+from .models import Category, ProductVariant
+
+
+class ProductFilterSerializer(serializers.Serializer):
+    """Validates the catalog filter query parameters."""
+    category = serializers.IntegerField(required=False, min_value=1)
+    size = serializers.CharField(required=False)
+    color = serializers.CharField(required=False)
+    min_price = serializers.DecimalField(
+        max_digits=10, decimal_places=2, required=False, min_value=0)
+    max_price = serializers.DecimalField(
+        max_digits=10, decimal_places=2, required=False, min_value=0)
+    in_stock = serializers.BooleanField(required=False)
+
+    def validate_size(self, value):
+        return [v.strip() for v in value.split(",") if v.strip()]
+
+    def validate_color(self, value):
+        return [v.strip() for v in value.split(",") if v.strip()]
+
+    def validate(self, attrs):
+        low, high = attrs.get("min_price"), attrs.get("max_price")
+        if low is not None and high is not None and low > high:
+            raise serializers.ValidationError(
+                {"max_price": "Must be greater than or equal to min_price."})
+        return attrs
+
+
+def get_product_filters(request):
+    """The validated filters present on ``request``, cached per request."""
+    if not hasattr(request, "_product_filters"):
+        serializer = ProductFilterSerializer(
+            data=request.query_params.dict())
+        serializer.is_valid(raise_exception=True)
+        request._product_filters = serializer.validated_data
+    return request._product_filters
+
+
+class ProductFilterBackend(BaseFilterBackend):
+    """
+    Catalog filters: ``category`` (including subcategories), ``size`` and
+    ``color`` (comma separated), ``min_price``/``max_price`` and
+    ``in_stock``. Size, colour and stock conditions must hold for the same
+    variant, so ``size=M&color=red&in_stock=true`` means a red M in stock.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        filters = get_product_filters(request)
+
+        if "category" in filters:
+            # the whole subtree shares the category's materialized path
+            path = Category.objects.filter(
+                pk=filters["category"]).values("path")
+            queryset = queryset.filter(
+                category__path__startswith=Subquery(path))
+        if "min_price" in filters:
+            queryset = queryset.filter(price__gte=filters["min_price"])
+        if "max_price" in filters:
+            queryset = queryset.filter(price__lte=filters["max_price"])
+
+        variants = ProductVariant.objects.filter(product=OuterRef("pk"))
+        if filters.get("size"):
+            variants = variants.filter(size__in=filters["size"])
+        if filters.get("color"):
+            variants = variants.filter(color__in=filters["color"])
+
+        in_stock = filters.get("in_stock")
+        if in_stock is True:
+            queryset = queryset.filter(Exists(variants.filter(stock__gt=0)))
+        elif in_stock is False:
+            queryset = queryset.filter(
+                Exists(variants), ~Exists(variants.filter(stock__gt=0)))
+        elif filters.get("size") or filters.get("color"):
+            queryset = queryset.filter(Exists(variants))
+        return queryset
@@ -0,0 +1,21 @@
+from django.utils import timezone
+
+from core.images import refresh_derivatives
+from .cache import PRODUCTS, bump_generation
+from .models import Product, ProductImage
+
+
+def touch_products(product_ids):
+    """Re-version products whose serialized images changed."""
+    Product.objects.filter(pk__in=product_ids).update(
+        updated_at=timezone.now())
+    bump_generation(PRODUCTS)
+
+
+def refresh_product_image(image_id):
+    """Render the derivatives of one ProductImage if they are stale."""
+    if not refresh_derivatives(ProductImage, image_id):
+        return False
+    touch_products(ProductImage.objects.filter(
+        pk=image_id).values("product_id"))
+    return True
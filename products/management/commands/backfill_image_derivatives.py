@@ -0,0 +1,116 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from accounts.models import VendorProfile
+from core.images import delete_derivatives, render_derivatives
+from products.images import touch_products
+from products.models import ProductImage
+
+# (model, file field, manifest field)
+TARGETS = [
+    (ProductImage, "image", "derivatives"),
+    (VendorProfile, "logo", "logo_derivatives"),
+]
+
+
+def _init_worker():
+    # a no-op under fork; spawned workers need the app registry
+    django.setup()
+
+
+def _render(name):
+    return render_derivatives(name)
+
+
+class Command(BaseCommand):
+    help = ("Render missing or stale derivatives of product images and "
+            "vendor logos across a process pool")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers", type=int, default=os.cpu_count(),
+            help="Worker processes; 1 renders in this process")
+        parser.add_argument("--chunk-size", type=int, default=200)
+        parser.add_argument(
+            "--force", action="store_true",
+            help="Re-render derivatives that are already up to date")
+
+    def handle(self, *args, **options):
+        workers = max(options["workers"] or 1, 1)
+        pool = None
+        if workers > 1:
+            # forked workers must not share the parent's database sockets
+            connections.close_all()
+            pool = ProcessPoolExecutor(workers, initializer=_init_worker)
+        try:
+            for model, field, manifest in TARGETS:
+                rendered, failed = self.backfill(
+                    model, field, manifest, pool, options)
+                self.stdout.write(
+                    f"{model._meta.verbose_name_plural}: {rendered} rendered"
+                    + (f", {failed} failed" if failed else ""))
+        finally:
+            if pool:
+                pool.shutdown()
+        self.stdout.write(self.style.SUCCESS("Image derivatives backfilled."))
+
+    def backfill(self, model, field, manifest, pool, options):
+        rendered = failed = 0
+        last_id = 0
+        while True:
+            rows = list(model.objects
+                        .filter(pk__gt=last_id).exclude(**{field: ""})
+                        .exclude(**{f"{field}__isnull": True})
+                        .order_by("pk")
+                        .values_list("pk", field, manifest)
+                        [:options["chunk_size"]])
+            if not rows:
+                return rendered, failed
+            last_id = rows[-1][0]
+            stale = [(pk, name, current) for pk, name, current in rows
+                     if options["force"] or current.get("source") != name]
+            if not stale:
+                continue
+
+            names = [name for _, name, _ in stale]
+            done = [(pk, current, result) for (pk, _, current), result
+                    in zip(stale, self.render(pool, names))
+                    if result is not None]
+            failed += len(stale) - len(done)
+            if not done:
+                continue
+            # the rows point at the new files before the old ones go, so a
+            # failure in between leaves strays rather than broken manifests
+            model.objects.bulk_update(
+                [model(pk=pk, **{manifest: result})
+                 for pk, _, result in done],
+                [manifest])
+            for _, current, result in done:
+                delete_derivatives(current, keep=result)
+            if model is ProductImage:
+                touch_products(ProductImage.objects.filter(
+                    pk__in=[pk for pk, _, _ in done]).values("product_id"))
+            rendered += len(done)
+            if options["verbosity"] > 1:
+                self.stdout.write(f"  {rendered} rendered...")
+
+    def render(self, pool, names):
+        """The manifest of each of ``names``, or None where rendering failed
+        (reported, and retried by the next run)."""
+        if pool:
+            calls = [pool.submit(_render, name).result for name in names]
+        else:
+            calls = [partial(_render, name) for name in names]
+        results = []
+        for name, call in zip(names, calls):
+            try:
+                results.append(call())
+            except Exception as exc:
+                self.stderr.write(f"  {name}: {exc!r}")
+                results.append(None)
+        return results
@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+from products.seeding import PASSWORD, CatalogSeeder
+
+
+class Command(BaseCommand):
+    help = ("Generate a reproducible marketplace dataset (users, vendors, "
+            "categories, products, images, variants, carts and orders) for "
+            "load testing")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--vendors", type=int, default=100)
+        parser.add_argument(
+            "--products", type=int, default=100, help="Products per vendor")
+        parser.add_argument(
+            "--variants", type=int, default=3, help="Variants per product")
+        parser.add_argument(
+            "--images", type=int, default=1, help="Images per product")
+        parser.add_argument(
+            "--subcategories", type=int, default=5,
+            help="Child categories under each top-level category")
+        parser.add_argument("--customers", type=int, default=1000)
+        parser.add_argument(
+            "--carts", type=int, default=100,
+            help="Customers with a filled cart")
+        parser.add_argument("--orders", type=int, default=10_000)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        method = "COPY" if connection.vendor == "postgresql" else "bulk_create"
+        self.stdout.write(f"Seeding with {method}...")
+        seeder = CatalogSeeder(
+            vendors=options["vendors"], products=options["products"],
+            variants=options["variants"], images=options["images"],
+            subcategories=options["subcategories"],
+            customers=options["customers"], carts=options["carts"],
+            orders=options["orders"], seed=options["seed"],
+            batch_size=max(options["batch_size"], 1), progress=self.progress)
+        counts = seeder.run()
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {sum(counts.values())} rows. Seeded users log in with "
+            f"the password {PASSWORD!r}."))
+
+    def progress(self, model, done, total, seconds):
+        rate = done / seconds if seconds else 0
+        of = f"/{total}" if total is not None else ""
+        self.stdout.write(
+            f"{model._meta.verbose_name_plural}: {done}{of} rows "
+            f"({rate:,.0f} rows/s)")
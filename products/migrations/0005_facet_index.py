@@ -0,0 +1,39 @@
+# Generated by Django 5.2 on 2026-10-17 18:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0004_product_search_vector'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FacetCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('facet', models.CharField(choices=[('category', 'Category'), ('size', 'Size'), ('color', 'Color')], max_length=20)),
+                ('value', models.CharField(max_length=50)),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('facet', 'value'), name='unique_facet_count')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ProductFacetValue',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('facet', models.CharField(choices=[('category', 'Category'), ('size', 'Size'), ('color', 'Color')], max_length=20)),
+                ('value', models.CharField(max_length=50)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='facet_values', to='products.product')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['facet', 'value'], name='product_facet_value_idx')],
+                'constraints': [models.UniqueConstraint(fields=('product', 'facet', 'value'), name='unique_product_facet_value')],
+            },
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2 on 2026-10-17 18:51
+
+from django.db import migrations, models
+
+
+def backfill_paths(apps, schema_editor):
+    Category = apps.get_model("products", "Category")
+    level = list(Category.objects.filter(parent__isnull=True))
+    paths = {}
+    depth = 0
+    while level:
+        for category in level:
+            parent_path = paths.get(category.parent_id, "/")
+            category.path = f"{parent_path}{category.pk}/"
+            category.depth = depth
+            paths[category.pk] = category.path
+        Category.objects.bulk_update(level, ["path", "depth"])
+        level = list(Category.objects.filter(
+            parent_id__in=[c.pk for c in level]))
+        depth += 1
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0005_facet_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='path',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=255),
+        ),
+        migrations.RunPython(backfill_paths, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,8 @@
-from django.db import models
+from django.contrib.postgres.search import SearchVectorField
+from django.core.validators import MaxValueValidator, MinValueValidator
+from django.db import models, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Concat, Substr
 from accounts.models import VendorProfile
 
 
@@ -13,6 +17,15 @@ class Category(models.Model):
         related_name="subcategories"
     )
     is_active = models.BooleanField(default=True)
+    # overrides the platform commission rate for products in this category
+    commission_rate = models.DecimalField(
+        max_digits=5, decimal_places=4, blank=True, null=True,
+        validators=[MinValueValidator(0), MaxValueValidator(1)])
+    # materialized path of ancestor ids, e.g. "/1/4/9/" for 9 under 4 under 1
+    path = models.CharField(
+        max_length=255, db_index=True, editable=False, default="")
+    depth = models.PositiveSmallIntegerField(default=0, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         verbose_name_plural = "Categories"
@@ -21,6 +34,46 @@ class Category(models.Model):
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            self._sync_path()
+
+    def _sync_path(self):
+        """Recompute this node's path and re-root its subtree if it moved."""
+        parent_path = "/"
+        if self.parent_id:
+            parent_path = Category.objects.filter(
+                pk=self.parent_id).values_list("path", flat=True).get()
+        new_path = f"{parent_path}{self.pk}/"
+        # the stored path, not the in-memory one, which may be stale
+        old_path, old_depth = Category.objects.filter(
+            pk=self.pk).values_list("path", "depth").get()
+        new_depth = new_path.count("/") - 2
+        if new_path == old_path:
+            self.path, self.depth = new_path, new_depth
+            return
+
+        if old_path:
+            # one UPDATE rewrites the prefix of every node in the subtree
+            Category.objects.filter(path__startswith=old_path).update(
+                path=Concat(Value(new_path),
+                            Substr("path", len(old_path) + 1)),
+                depth=F("depth") + (new_depth - old_depth))
+        else:
+            Category.objects.filter(pk=self.pk).update(
+                path=new_path, depth=new_depth)
+        self.path, self.depth = new_path, new_depth
+
+    def is_ancestor_of(self, other):
+        return bool(self.path) and other.path.startswith(self.path)
+
+    def get_descendants(self, include_self=True):
+        queryset = Category.objects.filter(path__startswith=self.path)
+        if not include_self:
+            queryset = queryset.exclude(pk=self.pk)
+        return queryset
+
 
 class Product(models.Model):
     vendor = models.ForeignKey(
@@ -32,6 +85,19 @@ class Product(models.Model):
     price = models.DecimalField(max_digits=10, decimal_places=2)
     is_active = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    # also bumped when the product's images or variants change, so it
+    # versions the whole serialized product (see conditional.py)
+    updated_at = models.DateTimeField(auto_now=True)
+    # maintained by a database trigger on PostgreSQL, unused on SQLite
+    # (see search.py); never written from Python
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # backs the catalog's keyset pagination (see pagination.py)
+            models.Index(fields=["is_active", "created_at", "id"],
+                         name="product_active_created_idx"),
+        ]
 
     def __str__(self):
         return f"{self.name} - {self.vendor.user.username}"
@@ -41,6 +107,8 @@ class ProductImage(models.Model):
     product = models.ForeignKey(
         Product, on_delete=models.CASCADE, related_name="images")
     image = models.ImageField(upload_to="products/")
+    # resized copies of ``image``, rendered after upload (see core/images.py)
+    derivatives = models.JSONField(default=dict, blank=True, editable=False)
 
     def __str__(self):
         return f"Image for {self.product.name}"
@@ -55,3 +123,52 @@ class ProductVariant(models.Model):
 
     def __str__(self):
         return f"{self.product.name} ({self.size or ''} {self.color or ''})"
+
+
+class ProductFacetValue(models.Model):
+    """
+    Denormalized facet index: one row per (active product, facet value).
+
+    Kept in sync by signals (see facets.py) so filtered facet counts can be
+    grouped over this narrow table instead of joining products to variants.
+    """
+    class Facets(models.TextChoices):
+        CATEGORY = "category", "Category"
+        SIZE = "size", "Size"
+        COLOR = "color", "Color"
+
+    product = models.ForeignKey(
+        Product, on_delete=models.CASCADE, related_name="facet_values")
+    facet = models.CharField(max_length=20, choices=Facets.choices)
+    value = models.CharField(max_length=50)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["product", "facet", "value"],
+                name="unique_product_facet_value"),
+        ]
+        indexes = [
+            models.Index(fields=["facet", "value"],
+                         name="product_facet_value_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id}: {self.facet}={self.value}"
+
+
+class FacetCount(models.Model):
+    """Materialized number of active products per facet value."""
+    facet = models.CharField(
+        max_length=20, choices=ProductFacetValue.Facets.choices)
+    value = models.CharField(max_length=50)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["facet", "value"], name="unique_facet_count"),
+        ]
+
+    def __str__(self):
+        return f"{self.facet}={self.value}: {self.count}"
@@ -0,0 +1,26 @@
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class ProductCursorPagination(CursorPagination):
+    """
+    Keyset pagination for the public catalog, newest first.
+
+    DRF's cursor encodes only the first ordering field, the created_at of
+    the last row, plus an offset past the rows that share it; "-id" just
+    makes the order of such ties stable. Every page is therefore an index
+    range scan on (is_active, created_at, id) from that timestamp, however
+    deep the client pages (only a run of identical timestamps is skipped
+    with OFFSET), and products inserted while a client is paging never
+    shift the rows it has yet to see.
+    """
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    ordering = ("-created_at", "-id")
+
+
+class ProductSearchPagination(PageNumberPagination):
+    """Search results are ordered by rank, which has no stable keyset."""
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
@@ -0,0 +1,192 @@
+"""
+Full-text search over Product.name / Product.description.
+
+PostgreSQL keeps a weighted tsvector in ``Product.search_vector``, filled by
+a trigger and indexed with GIN. SQLite (local/dev and tests) keeps an FTS5
+external-content table in sync with triggers instead. Both rank name matches
+above description matches. Other backends have no index to search, so they
+fall back to ``icontains`` scans, ranked the same way.
+"""
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connections
+from django.db.models import Case, F, FloatField, Q, Value, When
+from django.db.models.expressions import RawSQL
+
+SEARCH_CONFIG = "english"
+FTS_TABLE = "products_product_fts"
+
+POSTGRES_INSTALL = [
+    f"""
+    CREATE OR REPLACE FUNCTION products_product_search_vector_update()
+    RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(NEW.name, '')), 'A') ||
+            setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(NEW.description, '')), 'B');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER products_product_search_vector_trigger
+    BEFORE INSERT OR UPDATE ON products_product
+    FOR EACH ROW EXECUTE FUNCTION products_product_search_vector_update()
+    """,
+    # touching every row fires the trigger and backfills existing products
+    "UPDATE products_product SET name = name",
+    """
+    CREATE INDEX IF NOT EXISTS products_product_search_vector_gin
+    ON products_product USING gin (search_vector)
+    """,
+]
+
+POSTGRES_UNINSTALL = [
+    "DROP INDEX IF EXISTS products_product_search_vector_gin",
+    "DROP TRIGGER IF EXISTS products_product_search_vector_trigger ON products_product",
+    "DROP FUNCTION IF EXISTS products_product_search_vector_update()",
+]
+
+SQLITE_INSTALL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        name, description,
+        content='products_product', content_rowid='id',
+        tokenize='porter unicode61'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON products_product
+    BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, name, description)
+        VALUES (new.id, new.name, new.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON products_product
+    BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au
+    AFTER UPDATE OF name, description ON products_product
+    BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+        INSERT INTO {FTS_TABLE}(rowid, name, description)
+        VALUES (new.id, new.name, new.description);
+    END
+    """,
+]
+
+SQLITE_TRIGGERS = (f"{FTS_TABLE}_ai", f"{FTS_TABLE}_ad", f"{FTS_TABLE}_au")
+
+SQLITE_UNINSTALL = [
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ai",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ad",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_au",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+
+def install(connection):
+    """Create the vendor-specific search index and its sync triggers."""
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            for sql in POSTGRES_INSTALL:
+                cursor.execute(sql)
+        elif connection.vendor == "sqlite":
+            for sql in SQLITE_INSTALL:
+                cursor.execute(sql)
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def uninstall(connection):
+    statements = {
+        "postgresql": POSTGRES_UNINSTALL,
+        "sqlite": SQLITE_UNINSTALL,
+    }.get(connection.vendor, [])
+    with connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+
+
+def ensure_sqlite_triggers(connection):
+    """
+    Re-create the FTS5 triggers if a migration dropped them.
+
+    SQLite migrations rebuild a table (copy, drop, rename) for most schema
+    changes, which silently drops its triggers. Run after every migrate so
+    the index keeps tracking products_product.
+    """
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT count(*) FROM sqlite_master WHERE type = 'table' AND name = %s",
+            [FTS_TABLE])
+        if not cursor.fetchone()[0]:
+            return  # search migration not applied yet
+        # by name: other triggers on products_product must not hide a gap
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name IN "
+            f"({', '.join(['%s'] * len(SQLITE_TRIGGERS))})",
+            SQLITE_TRIGGERS)
+        if {name for name, in cursor.fetchall()} != set(SQLITE_TRIGGERS):
+            install(connection)
+
+
+def _fts5_query(text):
+    # quote every term so user input can never be parsed as FTS5 syntax
+    terms = [term.replace('"', '""') for term in text.split()]
+    return " ".join(f'"{term}"' for term in terms if term)
+
+
+def search_products(queryset, text):
+    """
+    Filter ``queryset`` to products matching ``text``, best match first.
+
+    Adds a ``rank`` annotation (higher is better) on every backend.
+    """
+    vendor = connections[queryset.db].vendor
+
+    if vendor == "postgresql":
+        query = SearchQuery(text, config=SEARCH_CONFIG, search_type="websearch")
+        return (queryset
+                .filter(search_vector=query)
+                .annotate(rank=SearchRank(F("search_vector"), query))
+                .order_by("-rank", "-id"))
+
+    if vendor == "sqlite":
+        match = _fts5_query(text)
+        if not match:
+            return queryset.none()
+        table = queryset.model._meta.db_table
+        return (queryset
+                .filter(id__in=RawSQL(
+                    f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s",
+                    (match,)))
+                .annotate(rank=RawSQL(
+                    # bm25() is lower for better matches; weight name 10:1
+                    f"SELECT -bm25({FTS_TABLE}, 10.0, 1.0) FROM {FTS_TABLE} "
+                    f"WHERE {FTS_TABLE} MATCH %s AND rowid = {table}.id",
+                    (match,)))
+                .order_by("-rank", "-id"))
+
+    # no full-text index here: scan, every term in the name or description
+    terms = text.split()
+    if not terms:
+        return queryset.none()
+    matches = Q()
+    for term in terms:
+        matches &= Q(name__icontains=term) | Q(description__icontains=term)
+    # each term scores 10 in the name, 1 in the description only
+    rank = sum((Case(When(name__icontains=term, then=Value(10.0)),
+                     default=Value(1.0), output_field=FloatField())
+                for term in terms), Value(0.0))
+    return (queryset
+            .filter(matches)
+            .annotate(rank=rank)
+            .order_by("-rank", "-id"))
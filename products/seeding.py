@@ -0,0 +1,317 @@
+"""
+Synthetic marketplace data for load and capacity testing.
+
+``CatalogSeeder`` writes users, vendors, a category tree, products with
+images and variants, carts and orders at any scale. Rows are generated and
+inserted a batch at a time, so memory stays flat at millions of rows: every
+table's ids are assigned up front from its current maximum, which lets
+foreign keys be computed instead of looked up. Inserts go through ``COPY``
+on PostgreSQL and ``bulk_create`` elsewhere; neither sends signals, so the
+facet index is rebuilt at the end (the search index is kept by triggers).
+
+The same ``seed`` on an empty database always produces the same rows, apart
+from the ``auto_now`` timestamps. Don't seed while the site takes writes:
+ids are reserved without locking.
+"""
+import io
+import json
+import random
+import time
+from array import array
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.db import connection, models
+from django.db.models import Max
+
+from accounts.models import User, VendorProfile
+from orders.models import Cart, CartItem, Order, OrderItem
+from .facets import rebuild_facet_index
+from .models import (Category, Product, ProductFacetValue, ProductImage,
+                     ProductVariant)
+
+TOP_CATEGORIES = ["Men", "Women", "Kids", "Accessories"]
+SIZES = ["XS", "S", "M", "L", "XL"]
+COLORS = ["black", "white", "red", "blue", "green", "beige", "navy"]
+ADJECTIVES = ["Classic", "Slim", "Relaxed", "Vintage", "Everyday", "Linen",
+              "Organic", "Oversized", "Cropped", "Tailored"]
+NOUNS = ["Shirt", "Dress", "Jacket", "Jeans", "Sweater", "Skirt", "Coat",
+         "Hoodie", "Scarf", "Sneakers"]
+# weights roughly like a live shop: most orders are done with
+ORDER_STATUSES = (["pending"] * 10 + ["paid"] * 30 + ["shipped"] * 20
+                  + ["delivered"] * 35 + ["cancelled"] * 5)
+PASSWORD = "seeded-pass-123"
+CENTS = Decimal("0.01")
+
+
+def _copy_value(field, obj):
+    """``obj``'s ``field`` in COPY's text format."""
+    value = field.pre_save(obj, add=True)
+    if isinstance(field, models.JSONField):
+        value = None if value is None else json.dumps(value)
+    else:
+        value = field.get_db_prep_save(value, connection)
+    if value is None:
+        return r"\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    return (str(value).replace("\\", "\\\\").replace("\t", "\\t")
+            .replace("\n", "\\n").replace("\r", "\\r"))
+
+
+def copy_rows(model, objs):
+    """Insert ``objs``, ids included, with a single PostgreSQL ``COPY``."""
+    fields = [field for field in model._meta.concrete_fields
+              # left to the sequence unless the caller assigned ids
+              if not (field.primary_key and objs[0].pk is None)]
+    buffer = io.StringIO()
+    for obj in objs:
+        buffer.write("\t".join(_copy_value(field, obj) for field in fields))
+        buffer.write("\n")
+    quote = connection.ops.quote_name
+    sql = (f"COPY {quote(model._meta.db_table)} "
+           f"({', '.join(quote(field.column) for field in fields)}) "
+           f"FROM STDIN")
+    with connection.cursor() as cursor:
+        raw = cursor.cursor
+        buffer.seek(0)
+        if hasattr(raw, "copy_expert"):  # psycopg2
+            raw.copy_expert(sql, buffer)
+        else:  # psycopg 3
+            with raw.copy(sql) as copy:
+                copy.write(buffer.getvalue())
+
+
+class CatalogSeeder:
+    """
+    ``vendors`` vendors with ``products`` products each, the fraction
+    ``active`` of them approved, every product with ``images`` images and
+    ``variants`` variants of ``stock`` (a range) units; ``customers``
+    customers, the first ``carts`` of them with a cart, and ``orders``
+    orders of one to three items from a single vendor, as checkout creates
+    them.
+    """
+
+    def __init__(self, vendors=100, products=100, variants=3, images=1,
+                 customers=1000, carts=100, orders=10_000, subcategories=5,
+                 stock=(0, 50), active=0.95, seed=0, batch_size=5000,
+                 progress=None):
+        self.vendors = vendors
+        self.products = products
+        self.variants = variants
+        self.images = images
+        self.customers = customers
+        self.carts = min(carts, customers)
+        self.orders = orders if vendors and products and customers else 0
+        self.subcategories = subcategories
+        self.stock = stock
+        self.active = active
+        self.rng = random.Random(seed)
+        self.batch_size = batch_size
+        self.progress = progress
+        self.first_id = {}
+        self.counts = {}
+        self._last_report = 0
+        self._reported = None
+
+    def _reserve(self, model):
+        first = (model.objects.aggregate(last=Max("pk"))["last"] or 0) + 1
+        self.first_id[model] = first
+        return first
+
+    def _insert(self, model, objs):
+        if connection.vendor == "postgresql":
+            copy_rows(model, objs)
+        else:
+            model.objects.bulk_create(objs)
+
+    def _report(self, model, done, total, started, last=False):
+        # at most once a second, and once when the model is done
+        now = time.monotonic()
+        if not self.progress or self._reported == (model, done):
+            return
+        if last or now - self._last_report >= 1:
+            self._last_report, self._reported = now, (model, done)
+            self.progress(model, done, total, now - started)
+
+    def _write(self, model, total, rows):
+        """Insert the objects from the ``rows`` generator in batches."""
+        started = time.monotonic()
+        batch, done = [], 0
+        for obj in rows:
+            batch.append(obj)
+            if len(batch) == self.batch_size:
+                self._insert(model, batch)
+                done += len(batch)
+                batch = []
+                self._report(model, done, total, started)
+        if batch:
+            self._insert(model, batch)
+            done += len(batch)
+        self.counts[model] = done
+        self._report(model, done, total, started, last=True)
+
+    def run(self):
+        """Seed everything; returns the rows written per model."""
+        leaves = self.seed_categories()
+        self.seed_users()
+        self.seed_catalog(leaves)
+        self.seed_carts()
+        self.seed_orders()
+        self.counts[ProductFacetValue] = rebuild_facet_index()
+        if connection.vendor == "postgresql":
+            # ids were written explicitly; move the sequences past them
+            with connection.cursor() as cursor:
+                for sql in connection.ops.sequence_reset_sql(
+                        no_style(), list(self.first_id)):
+                    cursor.execute(sql)
+        return self.counts
+
+    def seed_categories(self):
+        """The top-level categories and their children; returns the leaves."""
+        leaves = []
+        for name in TOP_CATEGORIES:
+            top, _ = Category.objects.get_or_create(
+                slug=name.lower(), defaults={"name": name})
+            if not self.subcategories:
+                leaves.append(top)
+            for n in range(1, self.subcategories + 1):
+                child, _ = Category.objects.get_or_create(
+                    slug=f"{top.slug}-{n}",
+                    defaults={"name": f"{top.name} {n}", "parent": top})
+                leaves.append(child)
+        return [category.pk for category in leaves]
+
+    def seed_users(self):
+        # hashing is deliberately slow; every seeded user shares one hash
+        password = make_password(PASSWORD)
+        first = self._reserve(User)
+        self.vendor_user_id = first
+        self.customer_id = first + self.vendors
+
+        def users():
+            for n in range(self.vendors + self.customers):
+                pk = first + n
+                kind = "vendor" if n < self.vendors else "customer"
+                yield User(
+                    pk=pk, username=f"{kind}-{pk}", password=password,
+                    email=f"{kind}-{pk}@example.com",
+                    role=(User.Roles.VENDOR if kind == "vendor"
+                          else User.Roles.CUSTOMER))
+        self._write(User, self.vendors + self.customers, users())
+
+        first_profile = self._reserve(VendorProfile)
+        self._write(VendorProfile, self.vendors, (
+            VendorProfile(pk=first_profile + n, user_id=self.vendor_user_id + n,
+                          business_name=f"Store {first_profile + n}",
+                          verified=self.rng.random() < 0.9)
+            for n in range(self.vendors)))
+
+    def seed_catalog(self, leaves):
+        rng = self.rng
+        total = self.vendors * self.products
+        first_product = self._reserve(Product)
+        first_profile = self.first_id[VendorProfile]
+        # unit prices in cents, needed again for carts and orders
+        self.prices = array("l", (rng.randint(500, 25_000)
+                                  for _ in range(total)))
+
+        self._write(Product, total, (
+            Product(pk=first_product + n,
+                    vendor_id=first_profile + n // self.products,
+                    category_id=rng.choice(leaves),
+                    name=f"{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} {n}",
+                    description=f"{rng.choice(ADJECTIVES)} cut, "
+                                f"{rng.choice(COLORS)} {rng.choice(NOUNS)}.",
+                    price=Decimal(self.prices[n]) / 100,
+                    is_active=rng.random() < self.active)
+            for n in range(total)))
+
+        first_image = self._reserve(ProductImage)
+        self._write(ProductImage, total * self.images, (
+            ProductImage(pk=first_image + n,
+                         product_id=first_product + n // self.images,
+                         image=f"products/seed-{first_image + n}.jpg")
+            for n in range(total * self.images)))
+
+        first_variant = self._reserve(ProductVariant)
+        self._write(ProductVariant, total * self.variants, (
+            ProductVariant(pk=first_variant + n,
+                           product_id=first_product + n // self.variants,
+                           size=SIZES[n % self.variants % len(SIZES)],
+                           color=rng.choice(COLORS),
+                           stock=rng.randint(*self.stock))
+            for n in range(total * self.variants)))
+
+    def _pick_items(self, vendor):
+        """One to three distinct (product index, variant id) of ``vendor``."""
+        picked = self.rng.sample(range(self.products),
+                                 min(self.rng.randint(1, 3), self.products))
+        items = []
+        for offset in picked:
+            index = vendor * self.products + offset
+            variant = None
+            if self.variants:
+                variant = (self.first_id[ProductVariant]
+                           + index * self.variants
+                           + self.rng.randrange(self.variants))
+            items.append((index, variant))
+        return items
+
+    def seed_carts(self):
+        if not (self.vendors and self.products):
+            return
+        first_cart = self._reserve(Cart)
+        self._write(Cart, self.carts, (
+            Cart(pk=first_cart + n, user_id=self.customer_id + n)
+            for n in range(self.carts)))
+
+        first_product = self.first_id[Product]
+
+        def items():
+            for n in range(self.carts):
+                for index, variant in self._pick_items(
+                        self.rng.randrange(self.vendors)):
+                    yield CartItem(cart_id=first_cart + n,
+                                   product_id=first_product + index,
+                                   variant_id=variant,
+                                   quantity=self.rng.randint(1, 2))
+        self._write(CartItem, None, items())
+
+    def seed_orders(self):
+        """Orders and their items, inserted together a batch at a time."""
+        rng = self.rng
+        first_order = self._reserve(Order)
+        first_product = self.first_id.get(Product)
+        first_profile = self.first_id[VendorProfile]
+        rate = settings.DEFAULT_COMMISSION_RATE
+        started = time.monotonic()
+        done = 0
+        while done < self.orders:
+            orders, items = [], []
+            for pk in range(first_order + done, first_order + min(
+                    done + self.batch_size, self.orders)):
+                vendor = rng.randrange(self.vendors)
+                total = Decimal(0)
+                for index, variant in self._pick_items(vendor):
+                    quantity = rng.randint(1, 3)
+                    price = Decimal(self.prices[index]) / 100
+                    total += price * quantity
+                    items.append(OrderItem(
+                        order_id=pk, product_id=first_product + index,
+                        variant_id=variant, quantity=quantity, price=price))
+                orders.append(Order(
+                    pk=pk,
+                    user_id=self.customer_id + rng.randrange(self.customers),
+                    vendor_id=first_profile + vendor, total_price=total,
+                    commission=(total * rate).quantize(CENTS),
+                    status=rng.choice(ORDER_STATUSES)))
+            self._insert(Order, orders)
+            self._insert(OrderItem, items)
+            done += len(orders)
+            self.counts[OrderItem] = self.counts.get(OrderItem, 0) + len(items)
+            self._report(Order, done, self.orders, started,
+                         last=done == self.orders)
+        self.counts[Order] = done
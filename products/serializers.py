@@ -1,26 +1,44 @@
 from rest_framework import serializers
+from core.images import derivative_urls
+from core.serializers import SparseFieldsMixin
 from .models import Category, Product, ProductImage, ProductVariant
 
 
 class CategorySerializer(serializers.ModelSerializer):
     class Meta:
         model = Category
-        fields = ["id", "name", "slug", "parent", "is_active"]
+        fields = ["id", "name", "slug", "parent", "is_active", "path", "depth"]
+        read_only_fields = ["path", "depth"]
 
+    def validate_parent(self, parent):
+        # a category cannot be moved under itself or one of its descendants
+        if parent and self.instance and self.instance.is_ancestor_of(parent):
+            raise serializers.ValidationError(
+                "A category cannot be moved under itself or its subcategories.")
+        return parent
+
+
+class ProductImageSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    # {"thumbnail": {"webp": url, "jpg": url}, "medium": ..., "large": ...};
+    # empty until rendered, clients fall back to ``image``
+    derivatives = serializers.SerializerMethodField()
 
-class ProductImageSerializer(serializers.ModelSerializer):
     class Meta:
         model = ProductImage
-        fields = ["id", "image"]
+        fields = ["id", "image", "derivatives"]
+
+    def get_derivatives(self, obj):
+        return derivative_urls(obj.derivatives, self.context.get("request"))
 
 
-class ProductVariantSerializer(serializers.ModelSerializer):
+class ProductVariantSerializer(SparseFieldsMixin,
+                               serializers.ModelSerializer):
     class Meta:
         model = ProductVariant
         fields = ["id", "size", "color", "stock"]
 
 
-class ProductSerializer(serializers.ModelSerializer):
+class ProductSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     images = ProductImageSerializer(many=True)
     variants = ProductVariantSerializer(many=True)
 
@@ -28,6 +46,7 @@ class ProductSerializer(serializers.ModelSerializer):
         model = Product
         fields = ["id", "name", "description", "price", "category",
                   "is_active", "images", "variants", "created_at"]
+        expandable_fields = {"category": CategorySerializer}
 
     def create(self, validated_data):
         images_data = validated_data.pop("images", [])
@@ -0,0 +1,98 @@
+from django.core.management import call_command
+from django.db import connections, transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from core.images import delete_derivatives, needs_derivatives
+from .cache import CATEGORIES, PRODUCTS, bump_generation
+from .facets import (clear_product_facets, refresh_product_facets,
+                     remove_category_facet)
+from .models import Category, Product, ProductImage, ProductVariant
+from .search import ensure_sqlite_triggers
+from .tasks import render_product_image
+
+
+@receiver(post_save, sender=Product)
+def refresh_facets_on_product_save(sender, instance, raw=False, **kwargs):
+    if not raw:
+        refresh_product_facets(instance.pk, product=instance)
+
+
+@receiver(pre_delete, sender=Product)
+def clear_facets_on_product_delete(sender, instance, **kwargs):
+    # counts must drop while the index rows still exist; the rows cascade
+    clear_product_facets(instance.pk)
+
+
+@receiver(post_save, sender=ProductVariant)
+def refresh_facets_on_variant_save(sender, instance, raw=False, **kwargs):
+    if not raw:
+        refresh_product_facets(instance.product_id)
+
+
+@receiver(post_delete, sender=ProductVariant)
+def refresh_facets_on_variant_delete(sender, instance, origin=None, **kwargs):
+    # variants removed by a product (or vendor) cascade are already handled
+    # by clear_facets_on_product_delete
+    if isinstance(origin, ProductVariant) or getattr(
+            origin, "model", None) is ProductVariant:
+        refresh_product_facets(instance.product_id)
+
+
+@receiver(post_delete, sender=Category)
+def clear_facets_on_category_delete(sender, instance, **kwargs):
+    remove_category_facet(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=ProductImage)
+@receiver([post_save, post_delete], sender=ProductVariant)
+def touch_product_on_child_change(sender, instance, raw=False, **kwargs):
+    # images and variants are part of the product's representation
+    if not raw:
+        Product.objects.filter(pk=instance.product_id).update(
+            updated_at=timezone.now())
+
+
+@receiver(pre_delete, sender=Category)
+def touch_products_on_category_delete(sender, instance, **kwargs):
+    # SET_NULL clears their category with an update that bypasses
+    # auto_now, so the validators would still match the old representation
+    Product.objects.filter(category=instance).update(
+        updated_at=timezone.now())
+
+
+@receiver(post_save, sender=ProductImage)
+def render_image_derivatives(sender, instance, raw=False, **kwargs):
+    # in the background, off the upload request
+    if not raw and needs_derivatives(instance.image, instance.derivatives):
+        render_product_image.enqueue(instance.pk)
+
+
+@receiver(post_delete, sender=ProductImage)
+def delete_image_derivatives(sender, instance, **kwargs):
+    derivatives = instance.derivatives
+    transaction.on_commit(lambda: delete_derivatives(derivatives))
+
+
+@receiver([post_save, post_delete], sender=Product)
+@receiver([post_save, post_delete], sender=ProductImage)
+@receiver([post_save, post_delete], sender=ProductVariant)
+def invalidate_cached_products(sender, **kwargs):
+    bump_generation(PRODUCTS)
+
+
+@receiver([post_save, post_delete], sender=Category)
+def invalidate_cached_categories(sender, **kwargs):
+    bump_generation(CATEGORIES)
+
+
+def reinstall_search_triggers(sender, using, **kwargs):
+    # connected to post_migrate in ProductsConfig.ready()
+    ensure_sqlite_triggers(connections[using])
+
+
+def create_cache_tables(sender, using, **kwargs):
+    # connected to post_migrate in ProductsConfig.ready(): the catalog cache
+    # defaults to a database table, which migrations do not create
+    call_command("createcachetable", database=using, verbosity=0)
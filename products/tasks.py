@@ -0,0 +1,7 @@
+from jobs.queue import task
+from .images import refresh_product_image
+
+
+@task
+def render_product_image(image_id):
+    refresh_product_image(image_id)
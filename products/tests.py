@@ -1,3 +1,783 @@
-from django.test import TestCase
+import json
+import shutil
+import tempfile
+import threading
+from io import BytesIO, StringIO
+from unittest import mock
+from urllib.parse import parse_qs, urlparse
+from django.conf import settings
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection, connections
+from django.test import TransactionTestCase, override_settings
+from PIL import Image
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from accounts.models import User, VendorProfile
+from core.images import render_derivatives
+from jobs.queue import run_pending
+from . import search
+from .facets import (facet_counts, rebuild_facet_index,
+                     refresh_product_facets)
+from orders.models import CartItem, Order, OrderItem
+from .models import (Category, FacetCount, Product, ProductFacetValue,
+                     ProductImage, ProductVariant)
+from .seeding import CatalogSeeder
 
-# Create your tests here.
+
+class CatalogTestMixin:
+    """Shared fixtures for the catalog API tests."""
+
+    def setUp(self):
+        # the query budgets below count the views' queries, not those of a
+        # database cache backend
+        self.enterContext(override_settings(CACHES={
+            **settings.CACHES,
+            "catalog": {**settings.CACHES["catalog"], "BACKEND":
+                        "django.core.cache.backends.locmem.LocMemCache"}}))
+        # rolled-back rows never fire the signals that invalidate the cache
+        caches["catalog"].clear()
+
+    def make_vendor(self, username="vendor"):
+        user = User.objects.create_user(
+            username=username, password="pass12345", role=User.Roles.VENDOR)
+        return VendorProfile.objects.create(user=user, verified=True)
+
+    def make_product(self, vendor, name="Shirt", price="10.00", **kwargs):
+        kwargs.setdefault("is_active", True)
+        return Product.objects.create(
+            vendor=vendor, name=name, price=price, **kwargs)
+
+
+class ProductPaginationTests(CatalogTestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.vendor = self.make_vendor()
+        self.category = Category.objects.create(name="Men", slug="men")
+        self.products = [
+            self.make_product(self.vendor, name=f"Item {i}",
+                              category=self.category)
+            for i in range(5)
+        ]
+
+    def test_pages_are_newest_first_and_cover_the_catalog(self):
+        url = reverse("product-list")
+        response = self.client.get(url, {"page_size": 2})
+        self.assertEqual(response.status_code, 200)
+        seen = [p["id"] for p in response.data["results"]]
+        while response.data["next"]:
+            response = self.client.get(response.data["next"])
+            seen += [p["id"] for p in response.data["results"]]
+
+        expected = [p.id for p in sorted(
+            self.products, key=lambda p: (p.created_at, p.id), reverse=True)]
+        self.assertEqual(seen, expected)
+
+    def test_cursor_is_stable_when_products_are_inserted(self):
+        url = reverse("product-list")
+        first = self.client.get(url, {"page_size": 2})
+        self.make_product(self.vendor, name="Newcomer")
+
+        second = self.client.get(first.data["next"])
+        ids = [p["id"] for p in first.data["results"] + second.data["results"]]
+        self.assertEqual(len(ids), len(set(ids)))
+        self.assertEqual(
+            [p["id"] for p in second.data["results"]],
+            [self.products[2].id, self.products[1].id])
+
+    def test_inactive_products_are_hidden(self):
+        self.make_product(self.vendor, name="Pending", is_active=False)
+        response = self.client.get(reverse("product-list"), {"page_size": 50})
+        self.assertEqual(len(response.data["results"]), 5)
+
+
+class ProductQueryCountTests(CatalogTestMixin, APITestCase):
+    """
+    Every read endpoint must cost a fixed number of queries regardless of
+    how many products, images or variants it returns. If one of these
+    counts changes, a new field is probably loading rows per product.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.vendor = self.make_vendor()
+        self.category = Category.objects.create(name="Men", slug="men")
+
+    def populate(self, count):
+        products = []
+        for i in range(count):
+            product = self.make_product(
+                self.vendor, name=f"Item {i}", category=self.category)
+            ProductImage.objects.create(product=product, image=f"products/{i}.jpg")
+            ProductVariant.objects.create(product=product, size="M", stock=3)
+            ProductVariant.objects.create(product=product, size="L", stock=0)
+            products.append(product)
+        return products
+
+    def test_product_list(self):
+        url = reverse("product-list")
+        for count in (1, 20):
+            Product.objects.all().delete()
+            self.populate(count)
+            # page of products + images + variants + facet counts
+            with self.assertNumQueries(4):
+                response = self.client.get(url, {"page_size": 20})
+            self.assertEqual(len(response.data["results"]), count)
+
+    def test_product_detail(self):
+        product = self.populate(1)[0]
+        # validator lookup + product + images + variants
+        with self.assertNumQueries(4):
+            response = self.client.get(
+                reverse("product-detail", args=[product.pk]))
+        self.assertEqual(len(response.data["images"]), 1)
+        self.assertEqual(len(response.data["variants"]), 2)
+
+    def test_sparse_fields_skip_columns_and_prefetches(self):
+        self.populate(3)
+        # page of products + facet counts
+        with self.assertNumQueries(2) as queries:
+            response = self.client.get(
+                reverse("product-list"), {"fields": "id,name,price"})
+        self.assertEqual(set(response.data["results"][0]),
+                         {"id", "name", "price"})
+        self.assertNotIn("description", queries[0]["sql"])
+
+    def test_expand(self):
+        product = self.populate(1)[0]
+        # + categories, and only the variants' prefetch for the rest
+        with self.assertNumQueries(4):
+            response = self.client.get(
+                reverse("product-detail", args=[product.pk]),
+                {"fields": "id,category,variants.size", "expand": "category"})
+        self.assertEqual(response.data["category"]["slug"], "men")
+        self.assertEqual(response.data["variants"],
+                         [{"size": "M"}, {"size": "L"}])
+        for params in ({"fields": "id,colour"}, {"expand": "vendor"}):
+            response = self.client.get(reverse("product-list"), params)
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(set(response.data), set(params))
+
+    def test_category_list(self):
+        for i in range(5):
+            Category.objects.create(name=f"Cat {i}", slug=f"cat-{i}")
+        # validator aggregate + categories
+        with self.assertNumQueries(2):
+            self.client.get(reverse("category-list"))
+
+
+class ProductSearchTests(CatalogTestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.vendor = self.make_vendor()
+        self.dress = self.make_product(
+            self.vendor, name="Summer dress", description="Light linen")
+        self.shirt = self.make_product(
+            self.vendor, name="Linen shirt", description="Button-down")
+        self.make_product(self.vendor, name="Wool coat", description="Warm")
+        self.make_product(self.vendor, name="Linen trousers", is_active=False)
+
+    def search(self, q):
+        response = self.client.get(reverse("product-search"), {"q": q})
+        self.assertEqual(response.status_code, 200)
+        return [p["id"] for p in response.data["results"]]
+
+    def test_name_matches_rank_above_description_matches(self):
+        self.assertEqual(self.search("linen"), [self.shirt.id, self.dress.id])
+
+    def test_stemming_and_multiple_terms(self):
+        self.assertEqual(self.search("dresses summer"), [self.dress.id])
+
+    def test_index_follows_updates_and_deletes(self):
+        self.shirt.name = "Oxford shirt"
+        self.shirt.save()
+        self.assertEqual(self.search("oxford"), [self.shirt.id])
+        self.shirt.delete()
+        self.assertEqual(self.search("oxford"), [])
+
+    def test_deleted_category_invalidates_results(self):
+        category = Category.objects.create(name="Men", slug="men")
+        Product.objects.filter(pk=self.shirt.pk).update(category=category)
+        url = reverse("product-search")
+        self.assertEqual(self.client.get(url, {"q": "shirt"}).data[
+            "results"][0]["category"], category.pk)
+        category.delete()
+        self.assertIsNone(self.client.get(url, {"q": "shirt"}).data[
+            "results"][0]["category"])
+
+    def test_query_syntax_is_not_interpreted(self):
+        self.assertEqual(self.search('linen" OR "coat'), [])
+
+    def test_missing_query_is_rejected(self):
+        response = self.client.get(reverse("product-search"))
+        self.assertEqual(response.status_code, 400)
+
+    def test_missing_trigger_is_reinstalled(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TRIGGER {search.FTS_TABLE}_au")
+            # an unrelated trigger keeps the table's trigger count at 3
+            cursor.execute(
+                "CREATE TRIGGER products_product_noop AFTER INSERT ON "
+                "products_product BEGIN SELECT 1; END")
+        search.ensure_sqlite_triggers(connection)
+        self.shirt.name = "Oxford shirt"
+        self.shirt.save()
+        self.assertEqual(self.search("oxford"), [self.shirt.id])
+
+    def test_other_backends_scan_with_icontains(self):
+        with mock.patch.object(connection, "vendor", "mysql"):
+            self.assertEqual(self.search("linen"), [self.shirt.id, self.dress.id])
+            self.assertEqual(self.search("SUMMER linen"), [self.dress.id])
+            self.assertEqual(self.search("trousers"), [])
+
+
+class ProductFacetTests(CatalogTestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.vendor = self.make_vendor()
+        self.women = Category.objects.create(name="Women", slug="women")
+        self.dresses = Category.objects.create(
+            name="Dresses", slug="dresses", parent=self.women)
+        self.men = Category.objects.create(name="Men", slug="men")
+
+        self.dress = self.make_product(
+            self.vendor, name="Dress", price="50.00", category=self.dresses)
+        ProductVariant.objects.create(
+            product=self.dress, size="S", color="red", stock=2)
+        ProductVariant.objects.create(
+            product=self.dress, size="M", color="blue", stock=0)
+
+        self.top = self.make_product(
+            self.vendor, name="Top", price="20.00", category=self.women)
+        ProductVariant.objects.create(
+            product=self.top, size="M", color="red", stock=0)
+
+        self.shirt = self.make_product(
+            self.vendor, name="Shirt", price="30.00", category=self.men)
+        ProductVariant.objects.create(
+            product=self.shirt, size="L", color="white", stock=5)
+
+    def ids(self, **params):
+        response = self.client.get(reverse("product-list"), params)
+        self.assertEqual(response.status_code, 200)
+        return {p["id"] for p in response.data["results"]}
+
+    def counts(self, facets, name):
+        return {row["value"]: row["count"] for row in facets[name]}
+
+    def test_filters(self):
+        self.assertEqual(self.ids(category=self.women.id),
+                         {self.dress.id, self.top.id})
+        self.assertEqual(self.ids(size="M"), {self.dress.id, self.top.id})
+        self.assertEqual(self.ids(size="M", color="red"), {self.top.id})
+        self.assertEqual(self.ids(min_price="25", max_price="40"),
+                         {self.shirt.id})
+        self.assertEqual(self.ids(in_stock="true"),
+                         {self.dress.id, self.shirt.id})
+        self.assertEqual(self.ids(size="M", in_stock="true"), set())
+        self.assertEqual(self.ids(in_stock="false"), {self.top.id})
+
+    def test_invalid_filters_are_rejected(self):
+        response = self.client.get(
+            reverse("product-list"), {"min_price": "9", "max_price": "1"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_facet_counts_follow_the_filter(self):
+        response = self.client.get(reverse("product-list"))
+        facets = response.data["facets"]
+        self.assertEqual(self.counts(facets, "size"), {"S": 1, "M": 2, "L": 1})
+        self.assertEqual(self.counts(facets, "color"),
+                         {"red": 2, "blue": 1, "white": 1})
+
+        response = self.client.get(
+            reverse("product-list"), {"category": self.women.id})
+        facets = response.data["facets"]
+        self.assertEqual(self.counts(facets, "size"), {"S": 1, "M": 2})
+        self.assertEqual(self.counts(facets, "category"), {
+            str(self.dresses.id): 1, str(self.women.id): 1})
+
+    def test_index_is_maintained_incrementally(self):
+        ProductVariant.objects.create(product=self.shirt, size="M", stock=1)
+        self.assertEqual(self.counts(facet_counts(), "size")["M"], 3)
+
+        self.top.is_active = False
+        self.top.save()
+        self.assertEqual(self.counts(facet_counts(), "size")["M"], 2)
+        self.assertNotIn("M", [
+            v for _, v in ProductFacetValue.objects.filter(
+                product=self.top).values_list("facet", "value")])
+
+        self.dress.delete()
+        self.assertEqual(self.counts(facet_counts(), "size"), {"M": 1, "L": 1})
+
+        self.men.delete()
+        self.assertEqual(self.counts(facet_counts(), "category"), {})
+
+    def test_rebuild_matches_incremental_counts(self):
+        self.shirt.variants.first().delete()
+        before = set(FacetCount.objects.filter(count__gt=0).values_list(
+            "facet", "value", "count"))
+        rebuild_facet_index(chunk_size=1)
+        after = set(FacetCount.objects.values_list("facet", "value", "count"))
+        self.assertEqual(before, after)
+
+
+class ConcurrentFacetSyncTests(CatalogTestMixin, TransactionTestCase):
+    def test_concurrent_refreshes_count_once(self):
+        product = self.make_product(self.make_vendor())
+        for size in ("S", "M", "L"):
+            ProductVariant.objects.create(product=product, size=size, stock=1)
+        ProductFacetValue.objects.all().delete()
+        FacetCount.objects.all().delete()
+
+        start, errors = threading.Barrier(4), []
+
+        def refresh():
+            try:
+                start.wait()
+                refresh_product_facets(product.pk)
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=refresh) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(ProductFacetValue.objects.count(), 3)
+        self.assertEqual(
+            sorted(FacetCount.objects.values_list("value", "count")),
+            [("L", 1), ("M", 1), ("S", 1)])
+
+
+class CategoryTreeTests(CatalogTestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.admin = User.objects.create_user(
+            username="admin", password="pass12345", role=User.Roles.ADMIN)
+        self.women = Category.objects.create(name="Women", slug="women")
+        self.shoes = Category.objects.create(
+            name="Shoes", slug="shoes", parent=self.women)
+        self.heels = Category.objects.create(
+            name="Heels", slug="heels", parent=self.shoes)
+        self.men = Category.objects.create(name="Men", slug="men")
+
+    def test_paths_are_materialized_on_create(self):
+        self.heels.refresh_from_db()
+        self.assertEqual(self.heels.path,
+                         f"/{self.women.pk}/{self.shoes.pk}/{self.heels.pk}/")
+        self.assertEqual(self.heels.depth, 2)
+        self.assertEqual(
+            set(self.women.get_descendants().values_list("pk", flat=True)),
+            {self.women.pk, self.shoes.pk, self.heels.pk})
+
+    def test_moving_a_category_reroots_its_subtree(self):
+        self.client.force_authenticate(self.admin)
+        response = self.client.patch(
+            reverse("category-detail", args=[self.shoes.pk]),
+            {"parent": self.men.pk})
+        self.assertEqual(response.status_code, 200)
+
+        self.heels.refresh_from_db()
+        self.assertEqual(self.heels.path,
+                         f"/{self.men.pk}/{self.shoes.pk}/{self.heels.pk}/")
+        self.assertEqual(self.heels.depth, 2)
+
+    def test_cannot_move_a_category_under_its_descendant(self):
+        self.client.force_authenticate(self.admin)
+        response = self.client.patch(
+            reverse("category-detail", args=[self.women.pk]),
+            {"parent": self.heels.pk})
+        self.assertEqual(response.status_code, 400)
+
+    def test_tree_is_cached_until_a_category_changes(self):
+        url = reverse("category-tree")
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        women = next(n for n in response.data if n["id"] == self.women.pk)
+        self.assertEqual(women["children"][0]["children"][0]["slug"], "heels")
+
+        self.shoes.is_active = False
+        self.shoes.save()
+        response = self.client.get(url)
+        women = next(n for n in response.data if n["id"] == self.women.pk)
+        self.assertEqual(women["children"], [])
+
+
+class CatalogResponseCacheTests(CatalogTestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.admin = User.objects.create_user(
+            username="admin", password="pass12345", role=User.Roles.ADMIN)
+        self.vendor = self.make_vendor()
+        self.product = self.make_product(self.vendor, is_active=False)
+
+    def test_repeated_reads_skip_the_database(self):
+        self.make_product(self.vendor, name="Visible")
+        url = reverse("product-list")
+        first = self.client.get(url, {"size": "M", "page_size": 5})
+        with self.assertNumQueries(0):
+            second = self.client.get(url, {"page_size": 5, "size": "M"})
+        self.assertEqual(first.data, second.data)
+
+    def test_approval_is_visible_immediately(self):
+        list_url = reverse("product-list")
+        detail_url = reverse("product-detail", args=[self.product.pk])
+        self.assertEqual(self.client.get(list_url).data["results"], [])
+        self.assertEqual(self.client.get(detail_url).status_code, 404)
+
+        self.client.force_authenticate(self.admin)
+        response = self.client.patch(
+            reverse("product-approve", args=[self.product.pk]),
+            {"action": "approve"})
+        self.assertEqual(response.status_code, 200)
+        self.client.force_authenticate(None)
+
+        results = self.client.get(list_url).data["results"]
+        self.assertEqual([p["id"] for p in results], [self.product.pk])
+        self.assertEqual(self.client.get(detail_url).status_code, 200)
+
+    def test_variant_change_invalidates_detail(self):
+        self.product.is_active = True
+        self.product.save()
+        url = reverse("product-detail", args=[self.product.pk])
+        self.assertEqual(self.client.get(url).data["variants"], [])
+        ProductVariant.objects.create(product=self.product, size="S", stock=1)
+        self.assertEqual(len(self.client.get(url).data["variants"]), 1)
+
+    def test_product_changes_keep_the_category_tree(self):
+        Category.objects.create(name="Men", slug="men")
+        url = reverse("category-tree")
+        self.client.get(url)
+        self.make_product(self.vendor, name="Another")
+        with self.assertNumQueries(0):
+            self.client.get(url)
+
+
+class ConditionalGetTests(CatalogTestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.vendor = self.make_vendor()
+        self.product = self.make_product(self.vendor)
+        self.url = reverse("product-detail", args=[self.product.pk])
+
+    def test_matching_etag_returns_304_after_one_query(self):
+        etag = self.client.get(self.url)["ETag"]
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+
+    def test_variant_change_changes_the_etag(self):
+        etag = self.client.get(self.url)["ETag"]
+        ProductVariant.objects.create(product=self.product, size="M", stock=1)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_category_delete_changes_the_etag(self):
+        category = Category.objects.create(name="Men", slug="men")
+        Product.objects.filter(pk=self.product.pk).update(category=category)
+        etag = self.client.get(self.url)["ETag"]
+        category.delete()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.data["category"])
+
+    def test_expanded_category_change_changes_the_etag(self):
+        category = Category.objects.create(name="Men", slug="men")
+        Product.objects.filter(pk=self.product.pk).update(category=category)
+        params = {"expand": "category"}
+        etag = self.client.get(self.url, params)["ETag"]
+        category.name = "Mens"
+        category.save()
+        response = self.client.get(self.url, params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["category"]["name"], "Mens")
+        # unexpanded, the body only holds the category's id
+        etag = self.client.get(self.url)["ETag"]
+        category.save()
+        self.assertEqual(self.client.get(
+            self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_if_modified_since(self):
+        last_modified = self.client.get(self.url)["Last-Modified"]
+        response = self.client.get(
+            self.url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+    def test_category_list_revalidation(self):
+        url = reverse("category-list")
+        category = Category.objects.create(name="Men", slug="men")
+        etag = self.client.get(url)["ETag"]
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        category.delete()
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class ProductFastPathTests(CatalogTestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        vendor = self.make_vendor()
+        category = Category.objects.create(name="Men", slug="men")
+        self.make_product(vendor, name="Linen shirt", price="12.50",
+                          description="Cool linen.", category=category)
+        for i in range(3):
+            product = self.make_product(vendor, name=f"Wool coat {i}",
+                                        price=f"{99 + i}.00")
+            ProductImage.objects.create(
+                product=product, image=f"products/{i}.jpg", derivatives={
+                    "sizes": {"thumbnail": {"webp": f"derivatives/{i}.webp"}}})
+            ProductImage.objects.create(product=product, image="")
+            ProductVariant.objects.create(product=product, size="M", stock=i)
+            ProductVariant.objects.create(product=product, color="navy")
+
+    def assert_same_as_serializer(self, url, params):
+        fast = self.client.get(url, params).json()
+        caches["catalog"].clear()
+        with override_settings(PRODUCT_LIST_FAST_PATH=False):
+            slow = self.client.get(url, params).json()
+        self.assertEqual(fast, slow)
+        return fast
+
+    def test_list_matches_the_serializer(self):
+        url = reverse("product-list")
+        data = self.assert_same_as_serializer(url, {"page_size": 2})
+        cursor = parse_qs(urlparse(data["next"]).query)["cursor"][0]
+        data = self.assert_same_as_serializer(
+            url, {"cursor": cursor, "page_size": 2})
+        self.assertEqual(len(data["results"]), 2)
+        data = self.assert_same_as_serializer(url, {"size": "M"})
+        self.assertEqual(len(data["results"]), 3)
+
+    def test_search_matches_the_serializer(self):
+        data = self.assert_same_as_serializer(
+            reverse("product-search"), {"q": "coat"})
+        self.assertEqual(data["count"], 3)
+
+    def test_async_list_matches_the_serializer(self):
+        self.assert_same_as_serializer(reverse("async-product-list"), {})
+
+
+class ImageDerivativeTests(CatalogTestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        settings = override_settings(MEDIA_ROOT=media)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.product = self.make_product(self.make_vendor())
+
+    def upload(self, size=(2400, 1600), name="photo.png"):
+        buffer = BytesIO()
+        Image.effect_noise(size, 64).convert("RGBA").save(buffer, "PNG")
+        return SimpleUploadedFile(name, buffer.getvalue(),
+                                  content_type="image/png")
+
+    def test_derivatives_are_rendered_after_upload(self):
+        image = ProductImage.objects.create(
+            product=self.product, image=self.upload())
+        self.assertEqual(run_pending(), 1)
+        image.refresh_from_db()
+        self.assertEqual(image.derivatives["source"], image.image.name)
+
+        with image.image.storage.open(
+                image.derivatives["sizes"]["thumbnail"]["webp"]) as thumb:
+            self.assertEqual(max(Image.open(thumb).size), 160)
+            self.assertLess(thumb.size * 10, image.image.size)
+
+        response = self.client.get(
+            reverse("product-detail", args=[self.product.pk]))
+        derivatives = response.data["images"][0]["derivatives"]
+        self.assertEqual(set(derivatives), {"thumbnail", "medium", "large"})
+        self.assertTrue(derivatives["medium"]["jpg"].startswith(
+            "http://testserver/media/derivatives/"))
+
+    def test_small_images_are_not_upscaled(self):
+        image = ProductImage.objects.create(
+            product=self.product, image=self.upload((100, 50)))
+        run_pending()
+        image.refresh_from_db()
+        with image.image.storage.open(
+                image.derivatives["sizes"]["large"]["jpg"]) as large:
+            self.assertEqual(Image.open(large).size, (100, 50))
+
+    def test_same_stem_uploads_keep_their_own_derivatives(self):
+        png = ProductImage.objects.create(
+            product=self.product, image=self.upload((300, 200)))
+        jpg = ProductImage.objects.create(
+            product=self.product,
+            image=self.upload((200, 300), name="photo.jpg"))
+        run_pending()
+        png.refresh_from_db()
+        jpg.refresh_from_db()
+        storage = png.image.storage
+        thumbs = [image.derivatives["sizes"]["thumbnail"]["webp"]
+                  for image in (png, jpg)]
+        self.assertNotEqual(*thumbs)
+        with storage.open(thumbs[1]) as thumb:
+            self.assertEqual(Image.open(thumb).size, (107, 160))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            png.delete()
+        self.assertFalse(storage.exists(thumbs[0]))
+        self.assertTrue(storage.exists(thumbs[1]))
+
+    def test_backfill_command(self):
+        image = ProductImage.objects.create(
+            product=self.product, image=self.upload())
+        missing = ProductImage.objects.create(
+            product=self.product, image="products/missing.jpg")
+
+        with self.assertLogs("core.images", "WARNING"):
+            call_command("backfill_image_derivatives", "--workers", "1",
+                         stdout=StringIO())
+        image.refresh_from_db()
+        missing.refresh_from_db()
+        self.assertEqual(len(image.derivatives["sizes"]), 3)
+        self.assertEqual(missing.derivatives, {})
+
+    def test_backfill_keeps_files_until_replaced(self):
+        image = ProductImage.objects.create(
+            product=self.product, image=self.upload((300, 200)))
+        broken = ProductImage.objects.create(
+            product=self.product, image=self.upload((300, 200), "bomb.png"))
+        run_pending()
+        image.refresh_from_db()
+        broken.refresh_from_db()
+        storage = image.image.storage
+
+        def render(name):
+            if name == broken.image.name:
+                raise Image.DecompressionBombError("too many pixels")
+            return render_derivatives(name)
+
+        err = StringIO()
+        with mock.patch("products.management.commands."
+                        "backfill_image_derivatives._render", render):
+            call_command("backfill_image_derivatives", "--workers", "1",
+                         "--force", stdout=StringIO(), stderr=err)
+        self.assertIn("DecompressionBombError", err.getvalue())
+        # re-rendered in place, and not deleted afterwards
+        image.refresh_from_db()
+        for formats in image.derivatives["sizes"].values():
+            self.assertTrue(all(map(storage.exists, formats.values())))
+        # the failed one still has its old, intact derivatives
+        before = broken.derivatives
+        broken.refresh_from_db()
+        self.assertEqual(broken.derivatives, before)
+        for formats in before["sizes"].values():
+            self.assertTrue(all(map(storage.exists, formats.values())))
+
+
+class SeedCatalogTests(APITestCase):
+    def seed(self, seed=0):
+        seeder = CatalogSeeder(vendors=3, products=4, variants=2, images=2,
+                               customers=5, carts=2, orders=10, seed=seed,
+                               batch_size=4)
+        seeder.run()
+        return seeder
+
+    def test_rows_and_foreign_keys_line_up(self):
+        seeder = self.seed()
+        self.assertEqual(Product.objects.count(), 12)
+        self.assertEqual(ProductImage.objects.count(), 24)
+        self.assertEqual(ProductVariant.objects.count(), 24)
+        self.assertEqual(Order.objects.count(), 10)
+        self.assertEqual(User.objects.filter(role="vendor").count(), 3)
+        self.assertEqual(
+            OrderItem.objects.count(), seeder.counts[OrderItem])
+        self.assertGreater(CartItem.objects.count(), 0)
+        # checkout splits carts by vendor, and so does the seeder
+        for order in Order.objects.prefetch_related("items__product"):
+            self.assertEqual(
+                {item.product.vendor_id for item in order.items.all()},
+                {order.vendor_id})
+            self.assertEqual(order.total_price, sum(
+                item.price * item.quantity for item in order.items.all()))
+        self.assertEqual(
+            sum(FacetCount.objects.values_list("count", flat=True)),
+            ProductFacetValue.objects.count())
+
+    def test_same_seed_same_rows(self):
+        def catalog():
+            return list(Product.objects.order_by("-id")[:12].values_list(
+                "name", "price", "is_active"))
+        self.seed(seed=7)
+        first = catalog()
+        self.seed(seed=7)
+        self.assertEqual(catalog(), first)
+        self.seed(seed=8)
+        self.assertNotEqual(catalog(), first)
+
+    def test_command_reports_progress(self):
+        out = StringIO()
+        call_command("seed_catalog", "--vendors", "1", "--products", "2",
+                     "--customers", "2", "--carts", "1", "--orders", "3",
+                     stdout=out)
+        self.assertIn("orders: 3/3 rows", out.getvalue())
+        self.assertIn("rows/s", out.getvalue())
+
+
+class AsyncCatalogTests(CatalogTestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        vendor = self.make_vendor()
+        men = Category.objects.create(name="Men", slug="men")
+        Category.objects.create(name="Shirts", slug="shirts", parent=men)
+        for i in range(3):
+            product = self.make_product(vendor, name=f"Item {i}",
+                                        category=men)
+            ProductImage.objects.create(product=product,
+                                        image=f"products/{i}.jpg")
+            ProductVariant.objects.create(product=product, size="M", stock=i)
+        self.product = product
+
+    def assertSameResponse(self, name, *args, params=None):
+        sync = self.client.get(reverse(name, args=args), params)
+        response = self.client.get(reverse(f"async-{name}", args=args),
+                                   params)
+        self.assertEqual(response.status_code, sync.status_code)
+        # page links point at the view that served them
+        self.assertEqual(
+            json.loads(response.content.replace(b"/api/async/", b"/api/")),
+            sync.json())
+
+    def test_responses_match_the_sync_views(self):
+        self.assertSameResponse("product-list", params={"page_size": 2})
+        self.assertSameResponse("product-list", params={"size": "M"})
+        self.assertSameResponse("product-detail", self.product.pk)
+        self.assertSameResponse("product-detail", 0)
+        self.assertSameResponse("category-list")
+        self.assertSameResponse("category-tree")
+        self.assertSameResponse("product-list", params={"min_price": "x"})
+
+    def test_pages_link_to_the_async_view(self):
+        url = reverse("async-product-list")
+        page = self.client.get(url, {"page_size": 2}).json()
+        self.assertIn(url, page["next"])
+        rest = self.client.get(page["next"]).json()
+        names = [p["name"] for p in page["results"] + rest["results"]]
+        self.assertEqual(names, ["Item 2", "Item 1", "Item 0"])
+        back = self.client.get(rest["previous"]).json()
+        self.assertEqual(back["results"], page["results"])
+
+    def test_detail_revalidation(self):
+        url = reverse("async-product-detail", args=[self.product.pk])
+        etag = self.client.get(url)["ETag"]
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_writes_are_refused(self):
+        response = self.client.post(reverse("async-product-list"))
+        self.assertEqual(response.status_code, 405)
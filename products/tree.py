@@ -0,0 +1,38 @@
+"""
+The nested category tree served by ``CategoryTreeView``.
+
+Built from a single query; the view caches it under the "categories"
+generation, so it is only rebuilt after a category changes.
+"""
+from .models import Category
+
+
+def _categories():
+    return (Category.objects.filter(is_active=True)
+            .order_by("depth", "name")
+            .values("id", "name", "slug", "parent_id"))
+
+
+def _nest(categories):
+    nodes = {}
+    roots = []
+    for category in categories:
+        node = {"id": category["id"], "name": category["name"],
+                "slug": category["slug"], "children": []}
+        if category["parent_id"] is None:
+            roots.append(node)
+        elif category["parent_id"] in nodes:
+            nodes[category["parent_id"]]["children"].append(node)
+        else:
+            continue  # parent is inactive
+        nodes[category["id"]] = node
+    return roots
+
+
+def build_category_tree():
+    """Nested active categories; an inactive category hides its subtree."""
+    return _nest(_categories())
+
+
+async def abuild_category_tree():
+    return _nest([category async for category in _categories()])
@@ -1,16 +1,18 @@
 from django.urls import path
-from .views import (CategoryListView, CategoryCreateView,
+from .views import (CategoryListView, CategoryTreeView, CategoryCreateView,
                     CategoryUpdateDeleteView, ProductListView, ProductCreateView,
                     ProductApprovalView, ProductRejectView, ProductUpdateView, ProductDeleteView,
-                    ProductDetailView
+                    ProductDetailView, ProductSearchView
                     )
 
 urlpatterns = [
     path("categories/", CategoryListView.as_view(), name="category-list"),
+    path("categories/tree/", CategoryTreeView.as_view(), name="category-tree"),
     path("categories/create/", CategoryCreateView.as_view(), name="category-create"),
     path("categories/<int:pk>/", CategoryUpdateDeleteView.as_view(),
          name="category-detail"),
     path("", ProductListView.as_view(), name="product-list"),
+    path("search/", ProductSearchView.as_view(), name="product-search"),
     path("create/", ProductCreateView.as_view(), name="product-create"),
     path("approve/<int:pk>/", ProductApprovalView.as_view(), name="product-approve"),
     path("reject/<int:pk>/", ProductRejectView.as_view(), name="product-reject"),
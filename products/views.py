@@ -1,58 +1,124 @@
 from rest_framework import generics, permissions, status
 from django.shortcuts import get_object_or_404
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework.exceptions import PermissionDenied
+from rest_framework.exceptions import PermissionDenied, ValidationError
 from .models import Category, Product
 from .serializers import CategorySerializer, ProductSerializer
+from .pagination import ProductCursorPagination, ProductSearchPagination
+from .search import search_products
+from .filters import ProductFilterBackend, get_product_filters
+from .facets import facet_counts
+from .fastpath import ProductRowsMixin
+from .tree import build_category_tree
+from .cache import (CATEGORIES, PRODUCTS, CachedResponseMixin,
+                    product_namespace)
+from .conditional import (category_list_etag, category_list_last_modified,
+                          product_etag, product_last_modified)
 # reuse your custom admin permission
+from accounts.authentication import ClaimsJWTAuthentication
 from accounts.permissions import IsAdmin, IsVendor
+from core.serializers import optimize_queryset
 
 
-class CategoryListView(generics.ListAPIView):
+@method_decorator(condition(etag_func=category_list_etag,
+                            last_modified_func=category_list_last_modified),
+                  name="get")
+class CategoryListView(CachedResponseMixin, generics.ListAPIView):
     queryset = Category.objects.filter(is_active=True)
     serializer_class = CategorySerializer
     permission_classes = [permissions.AllowAny]  # anyone can view categories
+    cache_namespaces = (CATEGORIES,)
+
+
+class CategoryTreeView(CachedResponseMixin, generics.ListAPIView):
+    """The full nested category tree, served from cache."""
+    permission_classes = [permissions.AllowAny]
+    cache_namespaces = (CATEGORIES,)
+
+    def list(self, request, *args, **kwargs):
+        return Response(build_category_tree())
 
 
 class CategoryCreateView(generics.CreateAPIView):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     permission_classes = [IsAdmin]  # only admin can create
+    authentication_classes = [ClaimsJWTAuthentication]
 
 
 class CategoryUpdateDeleteView(generics.RetrieveUpdateDestroyAPIView):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     permission_classes = [IsAdmin]
+    authentication_classes = [ClaimsJWTAuthentication]
 
 
-class ProductListView(generics.ListAPIView):
+class ProductListView(CachedResponseMixin, ProductRowsMixin,
+                      generics.ListAPIView):
     queryset = Product.objects.filter(is_active=True)
     serializer_class = ProductSerializer
     permission_classes = [permissions.AllowAny]
+    pagination_class = ProductCursorPagination
+    filter_backends = [ProductFilterBackend]
+
+    def get_queryset(self):
+        # only what ?fields= asked for, plus the cursor's position
+        return optimize_queryset(super().get_queryset(),
+                                 self.get_serializer(), keep=["created_at"])
+
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        if get_product_filters(request):
+            queryset = self.filter_queryset(self.get_queryset())
+        else:
+            queryset = None  # whole catalog: read the materialized counts
+        response.data["facets"] = facet_counts(queryset)
+        return response
+
+
+class ProductSearchView(CachedResponseMixin, ProductRowsMixin,
+                        generics.ListAPIView):
+    """Ranked full-text search over product names and descriptions."""
+    serializer_class = ProductSerializer
+    permission_classes = [permissions.AllowAny]
+    # deleting a category nulls its products' category without touching them
+    cache_namespaces = (PRODUCTS, CATEGORIES)
+    pagination_class = ProductSearchPagination
+
+    def get_queryset(self):
+        text = self.request.query_params.get("q", "").strip()
+        if not text:
+            raise ValidationError({"q": "This query parameter is required."})
+        queryset = optimize_queryset(
+            Product.objects.filter(is_active=True), self.get_serializer())
+        return search_products(queryset, text)
 
 
 class ProductCreateView(generics.CreateAPIView):
     queryset = Product.objects.all()
     serializer_class = ProductSerializer
     permission_classes = [permissions.IsAuthenticated, IsVendor]
+    authentication_classes = [ClaimsJWTAuthentication]
 
     def perform_create(self, serializer):
-        vendor = self.request.user.vendor_profile
-        if not vendor.verified:
+        user = self.request.user
+        if not user.verified:
             raise PermissionDenied("Your seller account is not approved yet.")
-        serializer.save(vendor=vendor)
+        serializer.save(vendor_id=user.vendor_id)
 
 
 class ProductUpdateView(generics.UpdateAPIView):
     queryset = Product.objects.all()
     serializer_class = ProductSerializer
     permission_classes = [permissions.IsAuthenticated, IsVendor]
+    authentication_classes = [ClaimsJWTAuthentication]
 
     def perform_update(self, serializer):
         product = self.get_object()
-        if product.vendor != self.request.user.vendor_profile:
+        if product.vendor_id != self.request.user.vendor_id:
             raise PermissionDenied("You can only update your own products.")
         serializer.save(approved=False)  # re-approval needed on edit
 
@@ -61,15 +127,17 @@ class ProductDeleteView(generics.DestroyAPIView):
     queryset = Product.objects.all()
     serializer_class = ProductSerializer
     permission_classes = [permissions.IsAuthenticated, IsVendor]
+    authentication_classes = [ClaimsJWTAuthentication]
 
     def perform_destroy(self, instance):
-        if instance.vendor != self.request.user.vendor_profile:
+        if instance.vendor_id != self.request.user.vendor_id:
             raise PermissionDenied("You can only delete your own products.")
         instance.delete()
 
 
 class ProductApprovalView(APIView):
     permission_classes = [permissions.IsAuthenticated, IsAdmin]
+    authentication_classes = [ClaimsJWTAuthentication]
 
     def patch(self, request, pk):
         """
@@ -98,6 +166,7 @@ class ProductApprovalView(APIView):
 
 class ProductRejectView(APIView):
     permission_classes = [permissions.IsAuthenticated, IsAdmin]
+    authentication_classes = [ClaimsJWTAuthentication]
 
     def post(self, request, pk):
         try:
@@ -109,7 +178,16 @@ class ProductRejectView(APIView):
             return Response({"error": "Product not found."}, status=404)
 
 
-class ProductDetailView(generics.RetrieveAPIView):
+@method_decorator(condition(etag_func=product_etag,
+                            last_modified_func=product_last_modified),
+                  name="get")
+class ProductDetailView(CachedResponseMixin, generics.RetrieveAPIView):
     queryset = Product.objects.filter(is_active=True)
     serializer_class = ProductSerializer
     permission_classes = [permissions.AllowAny]
+
+    def get_cache_namespaces(self):
+        return (PRODUCTS, product_namespace(self.kwargs["pk"]), CATEGORIES)
+
+    def get_queryset(self):
+        return optimize_queryset(super().get_queryset(), self.get_serializer())